@@ -0,0 +1,169 @@
+"""Benchmark do arquivamento de reservas (flask arquivar-reservas).
+
+Popula um banco temporário com N reservas (por padrão 1 milhão) espalhadas pelos
+últimos dois anos e mede:
+
+- a latência de `reservar_horario` (p50/p99/máximo, uma reserva a cada --intervalo-ms)
+  antes do arquivamento, enquanto ele roda numa thread ao lado, e depois dele: as reservas
+  não devem ficar presas atrás do arquivamento por mais que um lote;
+- o tamanho da tabela `reservas` e de seus índices (páginas no dbstat) antes e depois;
+- a primeira página de "minhas reservas" só com as recentes e com o histórico (view).
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_arquivamento.py --reservas 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time as relogio
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USUARIOS = 1000
+DIAS_DE_HISTORICO = 730
+
+RESERVAS_SQL = """
+INSERT INTO reservas (quadra_id, usuario_id, data, hora_inicio, hora_fim, status, criado_em, atualizado_em)
+WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < :total - 1)
+SELECT 1 + i % :quadras, 2 + (i * 7919) % :usuarios, date(:inicio, '+' || (i / (:quadras * 17)) || ' days'),
+       printf('%02d:00:00.000000', 6 + (i / :quadras) % 17), printf('%02d:00:00.000000', 7 + (i / :quadras) % 17),
+       CASE WHEN i % 10 = 0 THEN 'cancelada' ELSE 'ativa' END, :agora, :agora
+FROM n
+"""
+
+
+def popular(db, n_reservas, quadras):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+    from services.reservas import reconstruir_ocupacao
+
+    db.session.execute(Usuario.__table__.insert(), [
+        {'nome': f'Usuario {i}', 'email': f'u{i}@bench.local', 'senha_hash': 'x'} for i in range(USUARIOS)
+    ])
+    db.session.execute(Quadra.__table__.insert(), [
+        {'nome': f'Quadra {i}', 'endereco': f'Rua Bench, {i}', 'tipo': 'futsal', 'preco_hora': 100.0, 'dono_id': 1}
+        for i in range(quadras)
+    ])
+    dias = n_reservas // (quadras * 17) + 1
+    db.session.execute(db.text(RESERVAS_SQL), {
+        'total': n_reservas, 'quadras': quadras, 'usuarios': USUARIOS,
+        'inicio': (date.today() - timedelta(days=dias - 10)).isoformat(),
+        'agora': f'{date.today().isoformat()} 00:00:00.000000',
+    })
+    db.session.commit()
+    reconstruir_ocupacao()
+
+
+def paginas_da_tabela(db):
+    """Páginas da tabela reservas e de cada um dos seus índices"""
+    return dict(db.session.execute(db.text(
+        "SELECT s.name, COUNT(*) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+        "WHERE m.tbl_name = 'reservas' GROUP BY s.name"
+    )).all())
+
+
+def medir_reservas(app, quadras, quantidade, deslocamento, intervalo_ms):
+    """Latências (ms) de `quantidade` reservas em horários livres, uma a cada `intervalo_ms`"""
+    from services.reservas import reservar_horario
+
+    latencias = []
+    with app.app_context():
+        for i in range(quantidade):
+            n = deslocamento + i
+            dia = date.today() + timedelta(days=30 + n // (quadras * 17))
+            hora = 6 + n // quadras % 17
+            inicio = relogio.perf_counter()
+            reservar_horario(1 + n % quadras, 2 + n % USUARIOS, dia, time(hora), time(hora + 1))
+            latencias.append((relogio.perf_counter() - inicio) * 1000)
+            relogio.sleep(intervalo_ms / 1000)
+    return latencias
+
+
+def resumo(latencias):
+    ordenadas = sorted(latencias)
+    p99 = ordenadas[min(int(len(ordenadas) * 0.99), len(ordenadas) - 1)]
+    return f'{len(latencias):>6} {statistics.median(ordenadas):>8.2f} {p99:>8.2f} {ordenadas[-1]:>8.2f}'
+
+
+def tempo_consulta(app, consulta, repeticoes=50):
+    with app.app_context():
+        consulta()
+        inicio = relogio.perf_counter()
+        for _ in range(repeticoes):
+            consulta()
+        return (relogio.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reservas', type=int, default=1_000_000)
+    parser.add_argument('--dias', type=int, default=90, help='Corte do arquivamento')
+    parser.add_argument('--amostra', type=int, default=500, help='Reservas medidas por fase')
+    parser.add_argument('--intervalo-ms', type=int, default=20, help='Pausa entre duas reservas medidas')
+    args = parser.parse_args()
+    # Quadras suficientes para as reservas cobrirem dois anos, 17 horários por dia
+    quadras = max(10, args.reservas // (DIAS_DE_HISTORICO * 17))
+
+    pasta = tempfile.mkdtemp(prefix='resergol-arquivamento-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from services.arquivamento import arquivar_reservas
+    from models import db
+    from models.reserva_model import Reserva, ReservaHistorico
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        inicio = relogio.perf_counter()
+        popular(db, args.reservas, quadras)
+        print(f'{args.reservas} reservas em {quadras} quadras geradas em {relogio.perf_counter() - inicio:.1f}s')
+        paginas_antes = paginas_da_tabela(db)
+
+    def primeira_pagina(modelo):
+        return lambda: modelo.query.filter_by(usuario_id=2).order_by(
+            modelo.data.desc(), modelo.hora_inicio.desc(), modelo.id.desc()).limit(21).all()
+    pagina_antes = tempo_consulta(app, primeira_pagina(Reserva))
+
+    print(f"\n{'reservar_horario':28} {'n':>6} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    print(f"{'antes':28} {resumo(medir_reservas(app, quadras, args.amostra, 0, args.intervalo_ms))}")
+
+    movidas, segundos = [0], [0.0]
+
+    def arquivar():
+        with app.app_context():
+            inicio = relogio.perf_counter()
+            movidas[0] = arquivar_reservas(dias=args.dias)
+            segundos[0] = relogio.perf_counter() - inicio
+
+    thread = threading.Thread(target=arquivar)
+    thread.start()
+    durante, deslocamento = [], args.amostra
+    while thread.is_alive():
+        durante += medir_reservas(app, quadras, 50, deslocamento, args.intervalo_ms)
+        deslocamento += 50
+    thread.join()
+    print(f"{'durante o arquivamento':28} {resumo(durante)}")
+    print(f"{'depois':28} {resumo(medir_reservas(app, quadras, args.amostra, deslocamento, args.intervalo_ms))}")
+
+    with app.app_context():
+        paginas_depois = paginas_da_tabela(db)
+    pagina_depois = tempo_consulta(app, primeira_pagina(Reserva))
+    pagina_historico = tempo_consulta(app, primeira_pagina(ReservaHistorico))
+
+    print(f'\n{movidas[0]} reservas arquivadas em {segundos[0]:.1f}s ({movidas[0] / max(segundos[0], 1e-9):.0f}/s)')
+    print(f"\n{'páginas':34} {'antes':>8} {'depois':>8}")
+    for nome in sorted(paginas_antes):
+        print(f'{nome:34} {paginas_antes[nome]:>8} {paginas_depois.get(nome, 0):>8}')
+    print(f'\nMinhas reservas, 1ª página: {pagina_antes:.2f} ms antes, {pagina_depois:.2f} ms depois, '
+          f'{pagina_historico:.2f} ms com o histórico')
+
+
+if __name__ == '__main__':
+    main()
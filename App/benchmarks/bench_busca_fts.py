@@ -0,0 +1,119 @@
+"""Benchmark da busca de administração: ilike('%termo%') x índice FTS5.
+
+Popula um banco temporário com N quadras e N usuários e mede o tempo médio de cada
+busca pelos dois caminhos.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_busca_fts.py --linhas 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time as relogio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NOMES = ['Arena', 'Campo', 'Quadra', 'Society', 'Ginásio', 'Estádio', 'Espaço', 'Centro Esportivo']
+COMPLEMENTOS = ['São João', 'Boa Vista', 'Conceição', 'Jardim América', 'Vila Nova', 'Paraíso',
+                'Santa Luzia', 'Bela Vista', 'Ipiranga', 'Liberdade', 'Consolação', 'Pinheiros']
+RUAS = ['Rua', 'Avenida', 'Travessa', 'Alameda']
+TIPOS = ['futebol', 'futsal', 'society', 'volei', 'basquete', 'tenis']
+PRIMEIROS = ['José', 'João', 'Maria', 'Ana', 'Antônio', 'Francisco', 'Luíza', 'Júlia', 'Márcio', 'Conceição']
+SOBRENOMES = ['Silva', 'Souza', 'Araújo', 'Gonçalves', 'Brandão', 'Magalhães', 'Simões', 'Assunção']
+
+# (descrição, texto digitado)
+BUSCAS = [
+    ('palavra inteira', 'Ipiranga'),
+    ('prefixo curto', 'Pinh'),
+    ('duas palavras', 'arena vista'),
+    ('sem acento', 'sao joao'),
+    ('email', 'araujo42'),
+]
+
+
+def popular(db, linhas, semente=42):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    aleatorio = random.Random(semente)
+    usuarios = []
+    for i in range(linhas):
+        primeiro, sobrenome = aleatorio.choice(PRIMEIROS), aleatorio.choice(SOBRENOMES)
+        usuarios.append({
+            'nome': f'{primeiro} {sobrenome}',
+            'email': f'{primeiro.lower()}.{sobrenome.lower()}{i}@exemplo.com',
+            'senha_hash': 'x',
+            'role': 'dono_quadra' if i % 50 == 0 else 'usuario',
+        })
+    db.session.execute(Usuario.__table__.insert(), usuarios)
+
+    quadras = []
+    for i in range(linhas):
+        complemento = aleatorio.choice(COMPLEMENTOS)
+        quadras.append({
+            'nome': f'{aleatorio.choice(NOMES)} {complemento} {i}',
+            'endereco': f'{aleatorio.choice(RUAS)} {aleatorio.choice(COMPLEMENTOS)}, {aleatorio.randint(1, 3000)}',
+            'tipo': aleatorio.choice(TIPOS),
+            'descricao': f'Quadra de {aleatorio.choice(TIPOS)} no bairro {complemento}',
+            'preco_hora': aleatorio.randint(50, 250),
+            'ativa': True,
+            'dono_id': 1 + 50 * aleatorio.randrange(linhas // 50),
+        })
+    db.session.execute(Quadra.__table__.insert(), quadras)
+    db.session.commit()
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = relogio.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (relogio.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-busca-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'busca.db')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+    from models import db
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+    from services.busca import filtro_busca_quadras, filtro_busca_usuarios, sugerir_quadras
+
+    with app.app_context():
+        inicio = relogio.perf_counter()
+        popular(db, args.linhas)
+        print(f'{args.linhas} quadras e {args.linhas} usuários inseridos em {relogio.perf_counter() - inicio:.1f} s\n')
+
+        print(f"{'busca':28} {'ilike (ms)':>11} {'fts5 (ms)':>10} {'linhas ilike':>13} {'linhas fts5':>12}")
+        for descricao, busca in BUSCAS:
+            if descricao == 'email':
+                ilike = Usuario.query.filter(
+                    Usuario.nome.ilike(f'%{busca}%') | Usuario.email.ilike(f'%{busca}%'))
+                fts = Usuario.query.filter(filtro_busca_usuarios(busca))
+            else:
+                ilike = Quadra.query.filter(
+                    Quadra.nome.ilike(f'%{busca}%') | Quadra.endereco.ilike(f'%{busca}%'))
+                fts = Quadra.query.filter(filtro_busca_quadras(busca))
+            tempo_ilike, total_ilike = cronometrar(ilike.count, args.repeticoes)
+            tempo_fts, total_fts = cronometrar(fts.count, args.repeticoes)
+            print(f'{descricao + " (" + busca + ")":28} {tempo_ilike:>11.1f} {tempo_fts:>10.1f} '
+                  f'{total_ilike:>13} {total_fts:>12}')
+
+        tempo, sugestoes = cronometrar(lambda: sugerir_quadras('pinh'), args.repeticoes)
+        print(f'\nautocompletar "pinh" (top {len(sugestoes)} por relevância): {tempo:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark da exportação em streaming: memória e tempo até o primeiro byte.
+
+Popula um banco temporário com N reservas (por padrão 1 milhão) de um mesmo usuário e
+exporta todas pela rota do admin (/admin/usuario/<id>/reservas/exportar) em CSV e em
+NDJSON. Cada medição roda num processo separado, para que o pico de RSS (ru_maxrss)
+seja só o dela. Para comparação, mede também o caminho ingênuo: `.all()` nas linhas e
+o CSV montado inteiro em memória. Falha (código de saída 1) se o streaming passar de
+`--limite-rss-mb` acima do processo já aquecido ou não exportar todas as linhas.
+
+O mmap do SQLite fica desligado nas medições: páginas do arquivo mapeado contam no RSS
+e esconderiam a memória do próprio processo.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_exportacao.py --reservas 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time as relogio
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENHA = 'bench123'
+EMAIL_ADMIN = 'admin@resergol.com'
+QUADRAS = 1000
+
+RESERVAS_SQL = """
+INSERT INTO reservas (quadra_id, usuario_id, data, hora_inicio, hora_fim, status, criado_em, atualizado_em)
+WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < :total - 1)
+SELECT 1 + i % :quadras, :usuario_id, date(:inicio, '+' || (i / :quadras) || ' days'),
+       printf('%02d:00:00.000000', 6 + i % 17), printf('%02d:00:00.000000', 7 + i % 17),
+       CASE WHEN i % 10 = 0 THEN 'cancelada' ELSE 'ativa' END, :agora, :agora
+FROM n
+"""
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def popular(n_reservas):
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from services.senhas import senhas
+    from models import db
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        senha_hash = senhas.gerar_hash(SENHA)
+        Usuario.query.filter_by(email=EMAIL_ADMIN).one().senha_hash = senha_hash
+        dono = Usuario(nome='Dono Bench', email='dono@bench.local', senha_hash=senha_hash, role='dono_quadra')
+        cliente = Usuario(nome='Cliente Bench', email='cliente@bench.local', senha_hash=senha_hash)
+        db.session.add_all([dono, cliente])
+        db.session.flush()
+        db.session.execute(Quadra.__table__.insert(), [
+            {'nome': f'Quadra {i}', 'endereco': f'Rua Bench, {i}', 'tipo': 'futsal', 'preco_hora': 100.0,
+             'dono_id': dono.id} for i in range(QUADRAS)
+        ])
+        inicio = date.today() - timedelta(days=n_reservas // QUADRAS)
+        db.session.execute(db.text(RESERVAS_SQL), {
+            'total': n_reservas, 'quadras': QUADRAS, 'usuario_id': cliente.id, 'inicio': inicio.isoformat(),
+            'agora': f'{date.today().isoformat()} 00:00:00.000000',
+        })
+        db.session.commit()
+        return cliente.id
+
+
+def medir(usuario_id, formato, ingenuo):
+    """Roda no processo filho: exporta e imprime as medidas em JSON"""
+    from app import create_app
+    app = create_app({'SQLITE_MMAP_BYTES': 0})
+    cliente = app.test_client()
+    resposta = cliente.post('/login', data={'email': EMAIL_ADMIN, 'senha': SENHA})
+    assert resposta.status_code == 302, resposta.status_code
+    # Aquece rotas, templates e pools antes de tomar a linha de base
+    cliente.get(f'/admin/usuario/{usuario_id}/reservas/exportar?formato={formato}', buffered=False).close()
+    base = rss_mb()
+
+    inicio = relogio.perf_counter()
+    primeiro_byte, tamanho, linhas = None, 0, 0
+    if ingenuo:
+        import csv
+        import io
+        from models import db
+        from models.reserva_model import Reserva
+        with app.app_context():
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            for r in Reserva.query.filter_by(usuario_id=usuario_id).all():
+                escritor.writerow([r.id, r.data, r.hora_inicio, r.hora_fim, r.status, r.quadra_id, r.criado_em])
+            corpo = buffer.getvalue().encode()
+        primeiro_byte = relogio.perf_counter() - inicio
+        tamanho, linhas = len(corpo), corpo.count(b'\n')
+    else:
+        resposta = cliente.get(f'/admin/usuario/{usuario_id}/reservas/exportar?formato={formato}', buffered=False)
+        assert resposta.status_code == 200, resposta.status_code
+        for pedaco in resposta.response:
+            if pedaco and primeiro_byte is None:
+                primeiro_byte = relogio.perf_counter() - inicio
+            tamanho += len(pedaco)
+            linhas += pedaco.count(b'\n')
+        resposta.close()
+    print(json.dumps({
+        'primeiro_byte_ms': primeiro_byte * 1000, 'total_s': relogio.perf_counter() - inicio,
+        'mb': tamanho / 1024 / 1024, 'linhas': linhas, 'rss_base_mb': base, 'rss_pico_mb': rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reservas', type=int, default=1_000_000)
+    parser.add_argument('--limite-rss-mb', type=float, default=64)
+    parser.add_argument('--medir', nargs=3, metavar=('USUARIO_ID', 'FORMATO', 'INGENUO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        usuario_id, formato, ingenuo = args.medir
+        return medir(int(usuario_id), formato, ingenuo == '1')
+
+    pasta = tempfile.mkdtemp(prefix='resergol-exportacao-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+    inicio = relogio.perf_counter()
+    usuario_id = popular(args.reservas)
+    print(f'{args.reservas} reservas geradas em {relogio.perf_counter() - inicio:.1f}s\n')
+
+    print(f"{'caminho':22} {'1º byte ms':>11} {'total s':>8} {'MB':>7} {'linhas':>9} "
+          f"{'RSS base':>9} {'RSS pico':>9} {'aumento':>8}")
+    falhas = 0
+    for nome, formato, ingenuo in [('streaming CSV', 'csv', '0'), ('streaming NDJSON', 'ndjson', '0'),
+                                   ('ingênuo (.all())', 'csv', '1')]:
+        saida = subprocess.run([sys.executable, __file__, '--medir', str(usuario_id), formato, ingenuo],
+                               capture_output=True, text=True, check=True, env=os.environ)
+        m = json.loads(saida.stdout.strip().splitlines()[-1])
+        aumento = m['rss_pico_mb'] - m['rss_base_mb']
+        print(f"{nome:22} {m['primeiro_byte_ms']:>11.1f} {m['total_s']:>8.1f} {m['mb']:>7.1f} {m['linhas']:>9} "
+              f"{m['rss_base_mb']:>9.1f} {m['rss_pico_mb']:>9.1f} {aumento:>8.1f}")
+        if ingenuo == '0':
+            esperadas = args.reservas + (formato == 'csv')
+            if m['linhas'] != esperadas or aumento > args.limite_rss_mb:
+                falhas += 1
+    if falhas:
+        print(f'\n✗ streaming fora do limite de {args.limite_rss_mb:g} MB ou com linhas faltando')
+        sys.exit(1)
+    print(f'\n✓ streaming dentro do limite de {args.limite_rss_mb:g} MB de RSS')
+
+
+if __name__ == '__main__':
+    main()
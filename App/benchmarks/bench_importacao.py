@@ -0,0 +1,116 @@
+"""Benchmark da importação em lote (flask importar).
+
+Gera em uma pasta temporária os arquivos CSV de uma carga típica (donos e clientes com
+senha, quadras e N reservas históricas, por padrão 100 mil) e importa cada um num banco
+vazio, medindo o tempo de cada etapa. Para comparação, grava uma amostra das mesmas
+reservas uma a uma por `reservar_horario` (um INSERT e um commit por reserva, como na
+tela de reserva) e extrapola para o total. No fim confere que o índice de ocupação e os
+resumos gravados em lote são iguais aos reconstruídos do zero.
+
+O custo do bcrypt vem de BCRYPT_LOG_ROUNDS (4 por padrão aqui); com o custo de produção
+a etapa de usuários é dominada pelos hashes, divididos entre os processos do pool.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_importacao.py --reservas 100000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time as relogio
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TIPOS = ['futebol', 'futsal', 'society', 'volei', 'basquete', 'tenis']
+AMOSTRA_UM_A_UM = 2000
+
+
+def gerar_arquivos(pasta, n_donos, n_clientes, n_quadras, n_reservas, semente=42):
+    aleatorio = random.Random(semente)
+    with open(os.path.join(pasta, 'usuarios.csv'), 'w', newline='') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['nome', 'email', 'role', 'senha'])
+        escritor.writerows([f'Dono {i}', f'dono{i}@bench.local', 'dono_quadra', f'senha-{i}'] for i in range(n_donos))
+        escritor.writerows([f'Cliente {i}', f'cliente{i}@bench.local', 'usuario', f'senha-{i}'] for i in range(n_clientes))
+
+    with open(os.path.join(pasta, 'quadras.csv'), 'w', newline='') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['nome', 'endereco', 'tipo', 'preco_hora', 'dono_email'])
+        escritor.writerows([f'Quadra {i}', f'Rua Bench, {i}', aleatorio.choice(TIPOS), 60 + i % 9 * 10,
+                            f'dono{i % n_donos}@bench.local'] for i in range(n_quadras))
+
+    # Horários distintos por quadra (sem conflitos), do passado para hoje; 10% canceladas
+    inicio = date.today() - timedelta(days=n_reservas // (n_quadras * 17) + 1)
+    with open(os.path.join(pasta, 'reservas.csv'), 'w', newline='') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['usuario_email', 'quadra_id', 'data', 'hora_inicio', 'status'])
+        for i in range(n_reservas):
+            quadra, slot = i % n_quadras, i // n_quadras
+            escritor.writerow([f'cliente{aleatorio.randrange(n_clientes)}@bench.local', quadra + 1,
+                               inicio + timedelta(days=slot // 17), f'{6 + slot % 17:02d}:00',
+                               'cancelada' if aleatorio.random() < 0.1 else 'ativa'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reservas', type=int, default=100_000)
+    parser.add_argument('--quadras', type=int, default=500)
+    parser.add_argument('--donos', type=int, default=200)
+    parser.add_argument('--clientes', type=int, default=2000)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-importacao-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from services.importacao import importar
+    from services.reservas import reservar_horario, reconstruir_ocupacao
+    from services.resumos import reconstruir_resumos
+    from models import db
+
+    inicio = relogio.perf_counter()
+    gerar_arquivos(pasta, args.donos, args.clientes, args.quadras, args.reservas)
+    print(f'Arquivos gerados em {relogio.perf_counter() - inicio:.1f}s ({pasta})\n')
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        print(f"{'etapa':10} {'registros':>10} {'importados':>11} {'erros':>6} {'segundos':>9} {'por segundo':>12}")
+        for tipo in ('usuarios', 'quadras', 'reservas'):
+            with open(os.path.join(pasta, f'{tipo}.csv'), newline='') as arquivo:
+                relatorio = importar(tipo, arquivo, 'csv')
+            print(f'{tipo:10} {relatorio.lidas:>10} {relatorio.importadas:>11} {len(relatorio.erros):>6} '
+                  f'{relatorio.segundos:>9.2f} {relatorio.importadas / relatorio.segundos:>12.0f}')
+        lote_s = relatorio.segundos
+
+        def estado():
+            return [db.session.execute(db.text(f'SELECT * FROM {tabela} ORDER BY 1, 2, 3')).all()
+                    for tabela in ('ocupacao_diaria', 'resumo_diario', 'resumo_mensal', 'resumo_horario')]
+        importado = estado()
+        reconstruir_ocupacao()
+        reconstruir_resumos()
+        consistente = importado == estado()
+
+        # Caminho um a um, numa data livre para não conflitar com o que já foi importado
+        data = date.today() + timedelta(days=1)
+        inicio = relogio.perf_counter()
+        for i in range(AMOSTRA_UM_A_UM):
+            hora = 6 + i // args.quadras % 17
+            reservar_horario(i % args.quadras + 1, 2 + i % args.clientes, data + timedelta(days=i // (args.quadras * 17)),
+                             time(hora), time(hora + 1))
+        um_a_um_s = (relogio.perf_counter() - inicio) / AMOSTRA_UM_A_UM * args.reservas
+
+    print(f'\nUm a um (reservar_horario, {AMOSTRA_UM_A_UM} medidas): ~{um_a_um_s:.1f}s para {args.reservas} reservas '
+          f'({um_a_um_s / lote_s:.0f}x o lote)')
+    print(f"{'✓' if consistente else '✗'} ocupação e resumos do lote iguais aos reconstruídos")
+    if not consistente:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark da inicialização: importar `app`, criar a aplicação e atender a primeira requisição.
+
+Cada medição roda num processo Python novo (como um worker recém-criado), contra um
+banco temporário já inicializado. Mostra a mediana de cada etapa, com e sem a
+pré-compilação dos templates.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_inicializacao.py --repeticoes 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PASTA_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICAO = r'''
+import json, time
+inicio = time.perf_counter()
+import app as modulo
+importado = time.perf_counter()
+aplicacao = modulo.create_app()
+criado = time.perf_counter()
+cliente = aplicacao.test_client()
+resposta = cliente.get('/')
+primeira = time.perf_counter()
+cliente.get('/quadras')
+segunda = time.perf_counter()
+assert resposta.status_code == 200, resposta.status_code
+print(json.dumps({
+    'importar': importado - inicio,
+    'create_app': criado - importado,
+    'primeira_requisicao': primeira - criado,
+    'primeiro_catalogo': segunda - primeira,
+}))
+'''
+
+
+def medir(ambiente, repeticoes):
+    medidas = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', MEDICAO], cwd=PASTA_APP, env=ambiente,
+                               capture_output=True, text=True, check=True)
+        medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {etapa: statistics.median(m[etapa] for m in medidas) * 1000 for etapa in medidas[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-inicializacao-')
+    ambiente = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(pasta, 'inicializacao.db'))
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'inicializar-banco'],
+                   cwd=PASTA_APP, env=ambiente, capture_output=True, check=True)
+
+    cenarios = {
+        'com pré-compilação': dict(ambiente, PRECOMPILAR_TEMPLATES='1'),
+        'sem pré-compilação': dict(ambiente, PRECOMPILAR_TEMPLATES='0'),
+    }
+    print(f"{'cenário':20} {'importar':>9} {'create_app':>11} {'1ª req. /':>10} {'1º /quadras':>12}  (ms, mediana de {args.repeticoes})")
+    for nome, env in cenarios.items():
+        tempos = medir(env, args.repeticoes)
+        print(f"{nome:20} {tempos['importar']:>9.1f} {tempos['create_app']:>11.1f} "
+              f"{tempos['primeira_requisicao']:>10.1f} {tempos['primeiro_catalogo']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
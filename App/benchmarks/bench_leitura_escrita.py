@@ -0,0 +1,148 @@
+"""Benchmark de leituras durante escritas: a vazão de leitura com e sem escritores ativos.
+
+Leitores (GET /reservar/<id>, rota `@somente_leitura`) rodam sozinhos por alguns
+segundos e depois junto com escritores que fazem reservas (POST /reservar/<id>).
+Com o perfil SQLite ligado (WAL + pool somente leitura + fila de escrita) a vazão de
+leitura deve ficar praticamente igual nas duas fases; com `--sem-perfil` os leitores
+disputam a trava do banco com os escritores.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_leitura_escrita.py --leitores 4 --escritores 2 --segundos 5
+    python benchmarks/bench_leitura_escrita.py --sem-perfil
+"""
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time as relogio
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HORAS = [f'{h:02d}:00' for h in range(8, 22)]
+
+
+def preparar_banco(app, db, n_quadras, n_usuarios):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+    from services.senhas import senhas
+
+    with app.app_context():
+        senha_hash = senhas.gerar_hash('bench123')
+        dono = Usuario(nome='Dono Bench', email='dono@bench.local', senha_hash=senha_hash, role='dono_quadra')
+        db.session.add(dono)
+        db.session.flush()
+        quadras = [Quadra(nome=f'Quadra {i}', endereco=f'Rua Bench, {i}', tipo='futsal',
+                          preco_hora=100.0, dono_id=dono.id) for i in range(n_quadras)]
+        usuarios = [Usuario(nome=f'Usuario {i}', email=f'u{i}@bench.local', senha_hash=senha_hash)
+                    for i in range(n_usuarios)]
+        db.session.add_all(quadras + usuarios)
+        db.session.commit()
+        return [q.id for q in quadras], [u.email for u in usuarios]
+
+
+def cliente_logado(app, email):
+    cliente = app.test_client()
+    resposta = cliente.post('/login', data={'email': email, 'senha': 'bench123'})
+    assert resposta.status_code == 302, f'login de {email} falhou ({resposta.status_code})'
+    return cliente
+
+
+def rodar_fase(app, leitores, escritores, quadras, segundos, vagas):
+    """Roda os leitores (e os escritores, se houver) por `segundos`; devolve as medidas"""
+    parar = threading.Event()
+    trava = threading.Lock()
+    medidas = {'leituras': [], 'erros_leitura': 0, 'escritas': 0, 'erros_escrita': 0}
+    amanha = date.today() + timedelta(days=1)
+
+    def ler(cliente, deslocamento):
+        latencias, erros = [], 0
+        for i in itertools.count(deslocamento):
+            if parar.is_set():
+                break
+            dia = amanha + timedelta(days=i % 7)
+            inicio = relogio.perf_counter()
+            resposta = cliente.get(f'/reservar/{quadras[i % len(quadras)]}?data={dia.isoformat()}')
+            latencias.append(relogio.perf_counter() - inicio)
+            erros += resposta.status_code != 200
+        with trava:
+            medidas['leituras'].extend(latencias)
+            medidas['erros_leitura'] += erros
+
+    def escrever(cliente):
+        feitas, erros = 0, 0
+        while not parar.is_set():
+            with trava:
+                quadra_id, dia, hora = next(vagas)
+            resposta = cliente.post(f'/reservar/{quadra_id}', data={'data': dia.isoformat(), 'hora': hora})
+            # Sucesso redireciona para "minhas reservas"; qualquer outra coisa conta como erro
+            if resposta.status_code == 302 and '/minhas-reservas' in resposta.headers.get('Location', ''):
+                feitas += 1
+            else:
+                erros += 1
+        with trava:
+            medidas['escritas'] += feitas
+            medidas['erros_escrita'] += erros
+
+    threads = [threading.Thread(target=ler, args=(c, n * 1000)) for n, c in enumerate(leitores)]
+    threads += [threading.Thread(target=escrever, args=(c,)) for c in escritores]
+    for t in threads:
+        t.start()
+    relogio.sleep(segundos)
+    parar.set()
+    for t in threads:
+        t.join()
+    return medidas
+
+
+def resumir(nome, medidas, segundos):
+    leituras = sorted(medidas['leituras'])
+    p95 = leituras[int(len(leituras) * 0.95)] * 1000 if leituras else 0
+    print(f"{nome:22} {len(leituras) / segundos:>9.0f} {statistics.median(leituras) * 1000:>9.1f} "
+          f"{p95:>9.1f} {medidas['erros_leitura']:>7} {medidas['escritas'] / segundos:>10.0f} "
+          f"{medidas['erros_escrita']:>7}")
+    return len(leituras) / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--leitores', type=int, default=4)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--quadras', type=int, default=50)
+    parser.add_argument('--sem-perfil', action='store_true', help='desliga o perfil SQLite (SQLITE_PERFIL=0)')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-leitura-escrita-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ['SQLITE_PERFIL'] = '0' if args.sem_perfil else '1'
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from models import db
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+    quadras, emails = preparar_banco(app, db, args.quadras, args.leitores + args.escritores)
+
+    leitores = [cliente_logado(app, e) for e in emails[:args.leitores]]
+    escritores = [cliente_logado(app, e) for e in emails[args.leitores:]]
+    # Cada escritor pega uma vaga diferente, para medir escritas e não conflitos
+    vagas = ((q, date.today() + timedelta(days=d), h)
+             for d in range(1, 31) for h in HORAS for q in quadras)
+
+    print(f"perfil SQLite: {'desligado' if args.sem_perfil else 'ligado'}; "
+          f"{args.leitores} leitores, {args.escritores} escritores, {args.segundos:g}s por fase")
+    print(f"{'fase':22} {'leituras/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'erros':>7} {'escritas/s':>10} {'erros':>7}")
+    so_leitura = resumir('só leituras', rodar_fase(app, leitores, [], quadras, args.segundos, vagas), args.segundos)
+    com_escrita = resumir('leituras + escritas', rodar_fase(app, leitores, escritores, quadras, args.segundos, vagas),
+                          args.segundos)
+    print(f'leituras com escritas / só leituras: {com_escrita / so_leitura:.2f}')
+
+
+if __name__ == '__main__':
+    main()
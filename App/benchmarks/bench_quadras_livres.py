@@ -0,0 +1,160 @@
+"""Benchmark da busca de quadras livres do catálogo (/quadras?tipo=&data=&hora=).
+
+Popula um banco temporário com N quadras e M reservas ativas (geradas no próprio
+SQLite) e mede a busca por tipo, data e hora (ou faixa de horas): só a consulta e a
+requisição inteira. Para comparação, mede também o caminho ingênuo de carregar as
+reservas do dia e filtrar as quadras em Python.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_quadras_livres.py --quadras 5000 --reservas 5000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time as relogio
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TIPOS = ['futebol', 'futsal', 'society', 'volei', 'basquete', 'tenis']
+HORAS_POR_DIA = 5  # reservas por quadra por dia
+
+RESERVAS_SQL = """
+INSERT INTO reservas (quadra_id, usuario_id, data, hora_inicio, hora_fim, status, criado_em, atualizado_em)
+WITH RECURSIVE dias(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM dias WHERE n < :dias - 1),
+               vagas(j) AS (SELECT 0 UNION ALL SELECT j + 1 FROM vagas WHERE j < :por_dia - 1)
+SELECT q.id, 1 + (q.id + d.n) % :usuarios, date(:inicio, '+' || d.n || ' days'),
+       printf('%02d:00:00.000000', 6 + (q.id * 7 + d.n * 13 + v.j * 5) % 17),
+       printf('%02d:00:00.000000', 7 + (q.id * 7 + d.n * 13 + v.j * 5) % 17),
+       'ativa', :agora, :agora
+FROM quadras q, dias d, vagas v
+"""
+
+
+def popular(db, n_quadras, n_reservas, semente=42):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    aleatorio = random.Random(semente)
+    n_usuarios = max(n_quadras // 10, 1)
+    db.session.execute(Usuario.__table__.insert(), [
+        {'nome': f'Usuario {i}', 'email': f'u{i}@bench.local', 'senha_hash': 'x',
+         'role': 'dono_quadra' if i % 10 == 0 else 'usuario'}
+        for i in range(n_usuarios)
+    ])
+    db.session.execute(Quadra.__table__.insert(), [
+        {'nome': f'Quadra {i}', 'endereco': f'Rua Bench, {i}', 'tipo': aleatorio.choice(TIPOS),
+         'preco_hora': aleatorio.randint(50, 250), 'ativa': aleatorio.random() > 0.05,
+         'dono_id': 2 + 10 * aleatorio.randrange(n_usuarios // 10 or 1)}
+        for i in range(n_quadras)
+    ])
+    # As reservas cobrem `dias` dias terminando 30 dias à frente de hoje
+    dias = max(n_reservas // (n_quadras * HORAS_POR_DIA), 31)
+    inicio = date.today() + timedelta(days=30 - dias)
+    # Índices recriados depois da carga: ordenar uma vez sai bem mais barato que mantê-los linha a linha
+    indices = db.session.execute(db.text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'reservas' AND sql IS NOT NULL"
+    )).all()
+    for nome, _ in indices:
+        db.session.execute(db.text(f'DROP INDEX {nome}'))
+    db.session.execute(db.text(RESERVAS_SQL), {
+        'dias': dias, 'por_dia': HORAS_POR_DIA, 'usuarios': n_usuarios,
+        'inicio': inicio.isoformat(), 'agora': f'{date.today().isoformat()} 00:00:00.000000',
+    })
+    for _, sql in indices:
+        db.session.execute(db.text(sql))
+    db.session.commit()
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = relogio.perf_counter()
+        resultado = funcao()
+        tempos.append((relogio.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95)], resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quadras', type=int, default=5000)
+    parser.add_argument('--reservas', type=int, default=5_000_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-quadras-livres-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from models import db
+    from models.quadra_model import Quadra
+    from models.reserva_model import Reserva
+    from services.reservas import filtro_quadra_livre
+    from services.paginacao import contar
+    app = create_app()
+
+    with app.app_context():
+        inicializar_banco()
+        inicio = relogio.perf_counter()
+        popular(db, args.quadras, args.reservas)
+        total = db.session.query(db.func.count(Reserva.id)).scalar()
+        print(f'{args.quadras} quadras, {total} reservas geradas em {relogio.perf_counter() - inicio:.1f}s\n')
+
+    amanha = date.today() + timedelta(days=1)
+
+    def consulta(tipo, hora_de, hora_ate):
+        query = Quadra.query.filter_by(ativa=True)
+        if tipo:
+            query = query.filter_by(tipo=tipo)
+        query = query.filter(filtro_quadra_livre(amanha, hora_de, hora_ate))
+        return query.order_by(Quadra.preco_hora, Quadra.id).limit(21).all(), contar(query, limite=501)
+
+    def em_python(tipo, hora_de, hora_ate):
+        """Caminho ingênuo: carrega as quadras e as reservas do dia e cruza em Python"""
+        quadras = Quadra.query.filter_by(ativa=True, tipo=tipo).all()
+        reservas = Reserva.query.filter(Reserva.data == amanha, Reserva.status == 'ativa').all()
+        ocupadas = {}
+        for reserva in reservas:
+            if hora_de <= reserva.hora_inicio.hour <= hora_ate:
+                ocupadas[reserva.quadra_id] = ocupadas.get(reserva.quadra_id, 0) + 1
+        livres = [q for q in quadras if ocupadas.get(q.id, 0) < hora_ate - hora_de + 1]
+        livres.sort(key=lambda q: (q.preco_hora, q.id))
+        return livres[:21], len(livres)
+
+    cenarios = [
+        ('futsal às 19h', 'futsal', 19, 19),
+        ('futsal das 18h às 21h', 'futsal', 18, 21),
+        ('qualquer tipo às 19h', None, 19, 19),
+    ]
+    cliente = app.test_client()
+    print(f"{'cenário':24} {'livres':>7} {'consulta p50':>13} {'p95':>7} {'requisição p50':>15} {'p95':>7}  (ms)")
+    for nome, tipo, hora_de, hora_ate in cenarios:
+        with app.app_context():
+            p50, p95, (_, livres) = cronometrar(lambda: consulta(tipo, hora_de, hora_ate), args.repeticoes)
+            db.session.remove()
+        url = (f'/quadras?tipo={tipo or ""}&data={amanha.isoformat()}&hora={hora_de:02d}:00'
+               f'&hora_ate={hora_ate:02d}:00')
+        r50, r95, resposta = cronometrar(lambda: cliente.get(url), args.repeticoes)
+        assert resposta.status_code == 200, resposta.status_code
+        livres = f'{livres - 1}+' if livres > 500 else livres
+        print(f'{nome:24} {livres:>7} {p50:>13.2f} {p95:>7.2f} {r50:>15.2f} {r95:>7.2f}')
+
+    with app.app_context():
+        p50, _, (_, livres) = cronometrar(lambda: em_python('futsal', 19, 19), 3)
+        print(f"{'em Python (futsal 19h)':24} {livres:>7} {p50:>13.2f}")
+
+        comando = Quadra.query.filter_by(ativa=True, tipo='futsal').filter(
+            filtro_quadra_livre(amanha, 19, 19)).order_by(Quadra.preco_hora, Quadra.id).limit(21)
+        sql = str(comando.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        print('\nplano (futsal às 19h):')
+        for linha in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)):
+            print('  ', linha[3])
+
+
+if __name__ == '__main__':
+    main()
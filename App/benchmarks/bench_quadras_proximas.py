@@ -0,0 +1,135 @@
+"""Benchmark da busca de quadras próximas (/quadras?lat=&lon=&raio=).
+
+Popula um banco temporário com N quadras espalhadas por algumas cidades (mais
+densas nas maiores e perto de cada centro) e mede, para alguns raios, a busca pelo índice R*Tree
+(caixa envolvente + haversine só nas candidatas) e a requisição inteira. Para
+comparação, mede também o caminho sem índice: calcular a distância de todas as
+quadras ativas em Python.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_quadras_proximas.py --quadras 100000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time as relogio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (latitude, longitude, peso) dos centros; o peso é a fatia das quadras de cada cidade
+CIDADES = [
+    (-23.5505, -46.6333, 30), (-22.9068, -43.1729, 18), (-19.9167, -43.9345, 8), (-15.7939, -47.8828, 7),
+    (-12.9714, -38.5014, 6), (-3.7319, -38.5267, 6), (-8.0476, -34.8770, 5), (-30.0346, -51.2177, 5),
+    (-25.4284, -49.2733, 5), (-3.1190, -60.0217, 4), (-1.4558, -48.4902, 3), (-16.6869, -49.2648, 3),
+]
+TIPOS = ['futebol', 'futsal', 'society', 'volei', 'basquete', 'tenis']
+RAIOS_KM = (1, 5, 10, 25)
+
+
+def popular(db, n_quadras, semente=42):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    aleatorio = random.Random(semente)
+    db.session.execute(Usuario.__table__.insert(), [
+        {'nome': f'Dono {i}', 'email': f'dono{i}@bench.local', 'senha_hash': 'x', 'role': 'dono_quadra'}
+        for i in range(100)
+    ])
+    quadras = []
+    for i in range(n_quadras):
+        centro_lat, centro_lon, _ = aleatorio.choices(CIDADES, weights=[c[2] for c in CIDADES])[0]
+        # Distância do centro com cauda longa (até ~60 km) e direção uniforme
+        distancia = min(aleatorio.expovariate(1 / 12), 60)
+        direcao = aleatorio.uniform(0, 2 * math.pi)
+        latitude = centro_lat + distancia * math.cos(direcao) / 111.32
+        longitude = centro_lon + distancia * math.sin(direcao) / (111.32 * math.cos(math.radians(centro_lat)))
+        quadras.append({
+            'nome': f'Quadra {i}', 'endereco': f'Rua Bench, {i}', 'tipo': aleatorio.choice(TIPOS),
+            'preco_hora': aleatorio.randint(50, 250), 'ativa': aleatorio.random() > 0.05,
+            'dono_id': 2 + aleatorio.randrange(100), 'latitude': latitude, 'longitude': longitude,
+        })
+    db.session.execute(Quadra.__table__.insert(), quadras)
+    db.session.commit()
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = relogio.perf_counter()
+        resultado = funcao()
+        tempos.append((relogio.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95)], resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quadras', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-quadras-proximas-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from models import db
+    from models.quadra_model import Quadra
+    from services.geo import quadras_proximas, caixa_envolvente, distancia_km
+    app = create_app()
+
+    with app.app_context():
+        inicializar_banco()
+        inicio = relogio.perf_counter()
+        popular(db, args.quadras)
+        print(f'{args.quadras} quadras geradas em {relogio.perf_counter() - inicio:.1f}s\n')
+
+    # Um ponto a uns 4 km do centro da maior cidade, para os raios pegarem densidades diferentes
+    latitude, longitude = CIDADES[0][0] + 0.03, CIDADES[0][1] - 0.02
+
+    def sem_indice(raio, tipo):
+        linhas = db.session.execute(
+            db.select(Quadra.id, Quadra.latitude, Quadra.longitude).where(Quadra.ativa == True, Quadra.tipo == tipo)
+        ).all()
+        return sorted((d, i) for i, lat, lon in linhas if (d := distancia_km(latitude, longitude, lat, lon)) <= raio)
+
+    cliente = app.test_client()
+    print(f"{'raio':>6} {'candidatas':>11} {'no raio':>8} {'busca p50':>10} {'p95':>7} "
+          f"{'requisição p50':>15} {'p95':>7} {'sem índice':>11}  (ms; tipo futsal)")
+    for raio in RAIOS_KM:
+        filtros = [Quadra.ativa == True, Quadra.tipo == 'futsal']
+        with app.app_context():
+            lat_min, lat_max, lon_min, lon_max = caixa_envolvente(latitude, longitude, raio)
+            candidatas = db.session.execute(db.text(
+                'SELECT count(*) FROM quadras_rtree WHERE max_lat >= :a AND min_lat <= :b AND max_lon >= :c AND min_lon <= :d'
+            ), {'a': lat_min, 'b': lat_max, 'c': lon_min, 'd': lon_max}).scalar()
+            p50, p95, proximas = cronometrar(lambda: quadras_proximas(latitude, longitude, raio, filtros), args.repeticoes)
+            s50, _, referencia = cronometrar(lambda: sem_indice(raio, 'futsal'), 3)
+            assert proximas == referencia, 'o índice perdeu ou sobrou quadras'
+            db.session.remove()
+        url = f'/quadras?tipo=futsal&lat={latitude}&lon={longitude}&raio={raio}'
+        r50, r95, resposta = cronometrar(lambda: cliente.get(url), args.repeticoes)
+        assert resposta.status_code == 200, resposta.status_code
+        print(f'{raio:>4}km {candidatas:>11} {len(proximas):>8} {p50:>10.2f} {p95:>7.2f} '
+              f'{r50:>15.2f} {r95:>7.2f} {s50:>11.2f}')
+
+    with app.app_context():
+        from services.geo import quadras_rtree
+        lat_min, lat_max, lon_min, lon_max = caixa_envolvente(latitude, longitude, 5)
+        comando = (db.select(Quadra.id, Quadra.latitude, Quadra.longitude)
+                   .select_from(quadras_rtree.join(Quadra, Quadra.id == quadras_rtree.c.id))
+                   .where(quadras_rtree.c.max_lat >= lat_min, quadras_rtree.c.min_lat <= lat_max,
+                          quadras_rtree.c.max_lon >= lon_min, quadras_rtree.c.min_lon <= lon_max,
+                          db.func.likely(Quadra.ativa == True), db.func.likely(Quadra.tipo == 'futsal')))
+        sql = str(comando.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        print('\nplano (futsal a 5 km):')
+        for linha in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)):
+            print('  ', linha[3])
+
+
+if __name__ == '__main__':
+    main()
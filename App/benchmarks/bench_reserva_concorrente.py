@@ -0,0 +1,122 @@
+"""Benchmark de concorrência da reserva de horários.
+
+Dispara N reservas em paralelo para o mesmo horário da mesma quadra e mede
+a vazão e quantas reservas duplicadas foram gravadas.
+
+Uso (a partir do diretório App):
+    python benchmarks/bench_reserva_concorrente.py --n 50
+    python benchmarks/bench_reserva_concorrente.py --n 50 --legado
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time as relogio
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def preparar_banco(app, db, n):
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    with app.app_context():
+        dono = Usuario(nome='Dono Bench', email='dono@bench.local', senha_hash='x', role='dono_quadra')
+        db.session.add(dono)
+        db.session.flush()
+        quadra = Quadra(nome='Quadra Bench', endereco='Rua Bench, 1', tipo='futsal',
+                        preco_hora=100.0, dono_id=dono.id)
+        db.session.add(quadra)
+        usuarios = [Usuario(nome=f'Usuario {i}', email=f'u{i}@bench.local', senha_hash='x') for i in range(n)]
+        db.session.add_all(usuarios)
+        db.session.commit()
+        return quadra.id, [u.id for u in usuarios]
+
+
+def reservar_legado(db, Reserva, quadra_id, usuario_id, data, hora_inicio, hora_fim):
+    """Fluxo antigo: checa o conflito e insere em passos separados"""
+    conflito = Reserva.query.filter(
+        Reserva.quadra_id == quadra_id,
+        Reserva.data == data,
+        Reserva.hora_inicio == hora_inicio,
+        Reserva.status == 'ativa'
+    ).first()
+    if conflito:
+        return None
+    reserva = Reserva(quadra_id=quadra_id, usuario_id=usuario_id, data=data,
+                      hora_inicio=hora_inicio, hora_fim=hora_fim, status='ativa')
+    db.session.add(reserva)
+    db.session.commit()
+    return reserva.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=50, help='reservas paralelas no mesmo horário')
+    parser.add_argument('--legado', action='store_true', help='usa o fluxo antigo de checar e depois inserir')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+    from models import db
+    from models.reserva_model import Reserva
+    from services.reservas import reservar_horario
+
+    if args.legado:
+        # Sem o índice único o banco não impede a reserva dupla
+        with app.app_context():
+            db.session.execute(db.text('DROP INDEX IF EXISTS ux_reservas_horario_ativo'))
+            db.session.commit()
+
+    quadra_id, usuarios = preparar_banco(app, db, args.n)
+    data = date.today() + timedelta(days=1)
+    hora_inicio, hora_fim = time(19, 0), time(20, 0)
+    reservar = (lambda *a: reservar_legado(db, Reserva, *a)) if args.legado else reservar_horario
+
+    largada = threading.Barrier(args.n)
+    resultados = {'sucesso': 0, 'ocupado': 0, 'erro': 0}
+    trava = threading.Lock()
+
+    def tentar(usuario_id):
+        with app.app_context():
+            largada.wait()
+            try:
+                resultado = 'sucesso' if reservar(quadra_id, usuario_id, data, hora_inicio, hora_fim) else 'ocupado'
+            except Exception:
+                db.session.rollback()
+                resultado = 'erro'
+        with trava:
+            resultados[resultado] += 1
+
+    threads = [threading.Thread(target=tentar, args=(u,)) for u in usuarios]
+    inicio = relogio.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = relogio.perf_counter() - inicio
+
+    with app.app_context():
+        ativas = Reserva.query.filter_by(quadra_id=quadra_id, data=data,
+                                         hora_inicio=hora_inicio, status='ativa').count()
+
+    print(f"modo:               {'legado' if args.legado else 'atomico'}")
+    print(f'tentativas:         {args.n}')
+    print(f"reservas aceitas:   {resultados['sucesso']}")
+    print(f"horario ocupado:    {resultados['ocupado']}")
+    print(f"erros:              {resultados['erro']}")
+    print(f'reservas duplas:    {max(ativas - 1, 0)}')
+    print(f'tempo total:        {duracao * 1000:.1f} ms')
+    print(f'vazao:              {args.n / duracao:.0f} tentativas/s')
+
+
+if __name__ == '__main__':
+    main()
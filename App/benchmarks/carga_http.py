@@ -0,0 +1,385 @@
+"""Teste de carga HTTP: usuários simulados contra uma instância do ReserGol já rodando.
+
+Não importa a aplicação nem toca no banco: fala só HTTP (urllib, sem dependências), então
+serve tanto para o servidor de desenvolvimento (`python app.py`) quanto para um servidor
+prefork (`gunicorn -w 4 "app:create_app()"`). Cada usuário virtual tem sua própria sessão
+(cookies) e executa fluxos sorteados conforme o --mix:
+
+- navegar: lista /quadras, busca quadras livres por tipo, data e hora e abre /reservar/<id>;
+- reservar: abre /reservar/<id> numa data, escolhe um horário livre, reserva (POST) e
+  confere /minhas-reservas;
+- cancelar: abre /minhas-reservas e cancela uma das reservas;
+- dono: um dono abre /minhas-quadras e as estatísticas de /quadra/<id>/gerenciar-horarios.
+
+Com --taxa 0 (padrão) o modelo é fechado: os --concorrencia usuários repetem fluxos sem
+parar, com --pausa-ms entre requisições. Com --taxa R os fluxos chegam como um processo de
+Poisson de R fluxos/s e são atendidos pelos --concorrencia usuários; o atraso entre a
+chegada e o início de cada fluxo é relatado à parte, para que a fila não esconda a
+latência. Chegadas que ainda estiverem na fila no fim da execução são descartadas.
+
+Os clientes (<prefixo><i>@carga.local, senha --senha) são registrados por /registro na
+primeira execução. Donos de quadra não podem ser criados por HTTP: passe-os com
+--dono email:senha (sem donos o fluxo "dono" fica de fora).
+
+O relatório traz, por rota, requisições, erros (status inesperado, redirecionamento para o
+login ou falha de conexão), vazão e latência p50/p95/p99; com --json grava o mesmo em
+arquivo, e --comparar mostra a diferença para uma execução anterior.
+
+Uso (a partir do diretório App, com o servidor no ar):
+    python benchmarks/carga_http.py --url http://127.0.0.1:5000 --concorrencia 8 --duracao 30
+    python benchmarks/carga_http.py --taxa 20 --dono dono@exemplo.com:senha --json depois.json --comparar antes.json
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import queue
+import random
+import re
+import sys
+import threading
+import time as relogio
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+MIX_PADRAO = 'navegar=55,reservar=25,cancelar=10,dono=10'
+HORIZONTES_DONO = (7, 30, 90)
+DIAS_RESERVAVEIS = 30
+
+RE_RESERVAR = re.compile(r'href="/reservar/(\d+)"')
+RE_HORARIO = re.compile(r'name="hora"\s+value="(\d\d:\d\d)"\s*(disabled)?')
+RE_CANCELAR = re.compile(r'href="/reserva/(\d+)/cancelar"')
+RE_GERENCIAR = re.compile(r'href="/quadra/(\d+)/gerenciar-horarios"')
+RE_ID = re.compile(r'/\d+')
+
+
+def _opcoes(html, nome):
+    """Valores não vazios das <option> do <select name=nome>"""
+    bloco = re.search(rf'name="{nome}"(.*?)</select>', html, re.S)
+    return [valor for valor in re.findall(r'<option value="([^"]*)"', bloco.group(1)) if valor] if bloco else []
+
+
+class _SemRedirecionar(urllib.request.HTTPRedirectHandler):
+    """Devolve o 302 em vez de seguir: cada requisição é medida separadamente"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Medidas:
+    """Latências e contadores de todos os usuários virtuais (protegidos por uma trava)"""
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = Counter()
+        self.status = defaultdict(Counter)
+        self.eventos = Counter()
+        self.atrasos = []
+
+    def requisicao(self, rota, ms, status, erro):
+        with self.trava:
+            self.latencias[rota].append(ms)
+            self.status[rota][status] += 1
+            self.erros[rota] += erro
+
+    def evento(self, nome):
+        with self.trava:
+            self.eventos[nome] += 1
+
+    def atraso(self, ms):
+        with self.trava:
+            self.atrasos.append(ms)
+
+
+class Sessao:
+    """Um usuário virtual: cookies próprios, sem seguir redirecionamentos"""
+
+    def __init__(self, args, medidas):
+        self.base = args.url.rstrip('/')
+        self.timeout = args.timeout
+        self.pausa = args.pausa_ms / 1000
+        self.medidas = medidas
+        self.abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SemRedirecionar)
+
+    def requisitar(self, caminho, dados=None, esperados=(200,), medir=True):
+        """(status, html, Location); status 0 se a conexão falhou"""
+        corpo = urllib.parse.urlencode(dados).encode() if dados is not None else None
+        inicio = relogio.perf_counter()
+        try:
+            with self.abridor.open(self.base + caminho, data=corpo, timeout=self.timeout) as resposta:
+                status, destino, html = resposta.status, '', resposta.read()
+        except urllib.error.HTTPError as erro:
+            status, destino, html = erro.code, erro.headers.get('Location', ''), erro.read()
+        except OSError:
+            status, destino, html = 0, '', b''
+        ms = (relogio.perf_counter() - inicio) * 1000
+        if medir:
+            rota = ('POST ' if dados is not None else 'GET ') + RE_ID.sub('/<id>', caminho.split('?')[0])
+            self.medidas.requisicao(rota, ms, status, status not in esperados or '/login' in destino)
+            if self.pausa:
+                relogio.sleep(self.pausa)
+        return status, html.decode('utf-8', 'replace'), destino
+
+    def entrar(self, email, senha):
+        status, _, destino = self.requisitar('/login', {'email': email, 'senha': senha}, medir=False)
+        if status == 0:
+            sys.exit(f'Sem resposta de {self.base}; o servidor está no ar?')
+        if status != 302 or '/login' in destino:
+            sys.exit(f'Login de {email} falhou (status {status}); confira o e-mail e a senha.')
+
+
+class Contexto:
+    """O que os fluxos sorteiam: quadras, tipos e horários lidos de /quadras"""
+
+    def __init__(self, quadras, tipos, horas):
+        self.quadras, self.tipos, self.horas = quadras, tipos, horas
+
+
+def _data_futura(aleatorio):
+    return (date.today() + timedelta(days=aleatorio.randint(1, DIAS_RESERVAVEIS))).isoformat()
+
+
+def fluxo_navegar(sessao, aleatorio, contexto):
+    sessao.requisitar('/quadras')
+    data = _data_futura(aleatorio)
+    busca = {'data': data, 'hora': aleatorio.choice(contexto.horas)}
+    if contexto.tipos:
+        busca['tipo'] = aleatorio.choice(contexto.tipos)
+    sessao.requisitar('/quadras?' + urllib.parse.urlencode(busca))
+    sessao.requisitar(f'/reservar/{aleatorio.choice(contexto.quadras)}?data={data}')
+
+
+def fluxo_reservar(sessao, aleatorio, contexto):
+    quadra_id, data = aleatorio.choice(contexto.quadras), _data_futura(aleatorio)
+    _, html, _ = sessao.requisitar(f'/reservar/{quadra_id}?data={data}')
+    livres = [hora for hora, ocupado in RE_HORARIO.findall(html) if not ocupado]
+    if not livres:
+        sessao.medidas.evento('sem horário livre')
+        return
+    _, _, destino = sessao.requisitar(f'/reservar/{quadra_id}', {'data': data, 'hora': aleatorio.choice(livres)},
+                                      esperados=(302,))
+    # Sucesso vai para "minhas reservas"; de volta para /reservar, alguém reservou antes
+    sessao.medidas.evento('reservas feitas' if '/minhas-reservas' in destino else 'reservas em conflito')
+    sessao.requisitar('/minhas-reservas')
+
+
+def fluxo_cancelar(sessao, aleatorio, contexto):
+    _, html, _ = sessao.requisitar('/minhas-reservas')
+    reservas = RE_CANCELAR.findall(html)
+    if not reservas:
+        sessao.medidas.evento('nada para cancelar')
+        return
+    sessao.requisitar(f'/reserva/{aleatorio.choice(reservas)}/cancelar', esperados=(302,))
+    sessao.medidas.evento('cancelamentos')
+
+
+def fluxo_dono(sessao, aleatorio, contexto):
+    _, html, _ = sessao.requisitar('/minhas-quadras')
+    quadras = RE_GERENCIAR.findall(html) or contexto.quadras
+    sessao.requisitar(f'/quadra/{aleatorio.choice(quadras)}/gerenciar-horarios'
+                      f'?dias={aleatorio.choice(HORIZONTES_DONO)}')
+
+
+FLUXOS = {'navegar': fluxo_navegar, 'reservar': fluxo_reservar, 'cancelar': fluxo_cancelar, 'dono': fluxo_dono}
+
+
+def ler_mix(texto):
+    mix = {}
+    for parte in texto.split(','):
+        nome, _, peso = parte.partition('=')
+        if nome.strip() not in FLUXOS:
+            raise argparse.ArgumentTypeError(f'fluxo desconhecido: {nome!r} (use {", ".join(FLUXOS)})')
+        mix[nome.strip()] = float(peso or 1)
+    return mix
+
+
+def preparar(args, medidas):
+    """Registra e autentica os clientes e os donos; lê quadras, tipos e horários de /quadras"""
+    def cliente(i):
+        sessao = Sessao(args, medidas)
+        email = f'{args.prefixo}{i}@carga.local'
+        if not args.sem_registro:
+            # Idempotente: com o e-mail já cadastrado volta para /registro sem contar falha de login
+            sessao.requisitar('/registro', {'nome': f'Carga {i}', 'email': email, 'senha': args.senha,
+                                            'confirmar_senha': args.senha}, medir=False)
+        sessao.entrar(email, args.senha)
+        return sessao
+
+    def dono(credencial):
+        email, _, senha = credencial.partition(':')
+        sessao = Sessao(args, medidas)
+        sessao.entrar(email, senha)
+        return sessao
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clientes = list(executor.map(cliente, range(args.concorrencia)))
+        donos = list(executor.map(dono, args.dono))
+
+    status, html, _ = clientes[0].requisitar('/quadras', medir=False)
+    quadras = sorted(set(RE_RESERVAR.findall(html)), key=int)
+    if status != 200 or not quadras:
+        sys.exit(f'Nenhuma quadra para reservar em {args.url}/quadras (status {status}).')
+    return clientes, donos, Contexto(quadras, _opcoes(html, 'tipo'), _opcoes(html, 'hora') or ['19:00'])
+
+
+def executar(args, mix, clientes, donos, contexto, medidas):
+    """Roda os fluxos por --duracao segundos; devolve a duração real"""
+    nomes, pesos = list(mix), list(mix.values())
+    inicio = relogio.perf_counter()
+    fim = inicio + args.duracao
+    chegadas = queue.Queue() if args.taxa else None
+
+    def usuario(i):
+        aleatorio = random.Random(args.semente * 1000 + i)
+        cliente, dono = clientes[i], donos[i % len(donos)] if donos else None
+        while True:
+            if chegadas is not None:
+                chegada = chegadas.get()
+                if chegada is None:
+                    return
+                if relogio.perf_counter() >= fim:
+                    medidas.evento('fluxos descartados')
+                    continue
+                medidas.atraso((relogio.perf_counter() - chegada) * 1000)
+            elif relogio.perf_counter() >= fim:
+                return
+            nome = aleatorio.choices(nomes, pesos)[0]
+            FLUXOS[nome](dono if nome == 'dono' else cliente, aleatorio, contexto)
+            medidas.evento(f'fluxo {nome}')
+
+    threads = [threading.Thread(target=usuario, args=(i,), daemon=True) for i in range(len(clientes))]
+    for thread in threads:
+        thread.start()
+    if chegadas is not None:
+        aleatorio = random.Random(args.semente)
+        proxima = inicio
+        while True:
+            proxima += aleatorio.expovariate(args.taxa)
+            if proxima >= fim:
+                break
+            relogio.sleep(max(0.0, proxima - relogio.perf_counter()))
+            chegadas.put(proxima)
+        for _ in threads:
+            chegadas.put(None)
+    for thread in threads:
+        thread.join()
+    return relogio.perf_counter() - inicio
+
+
+def percentil(ordenadas, p):
+    """Percentil por posição (nearest rank) de uma lista ordenada"""
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)] if ordenadas else 0.0
+
+
+def _estatisticas(latencias, erros, duracao):
+    ordenadas = sorted(latencias)
+    return {
+        'requisicoes': len(ordenadas), 'erros': erros,
+        'taxa_erro': erros / len(ordenadas) if ordenadas else 0.0,
+        'por_segundo': len(ordenadas) / duracao,
+        'p50_ms': percentil(ordenadas, 50), 'p95_ms': percentil(ordenadas, 95),
+        'p99_ms': percentil(ordenadas, 99), 'max_ms': ordenadas[-1] if ordenadas else 0.0,
+    }
+
+
+def montar_relatorio(args, mix, medidas, duracao):
+    rotas = {}
+    for rota in sorted(medidas.latencias):
+        rotas[rota] = _estatisticas(medidas.latencias[rota], medidas.erros[rota], duracao)
+        rotas[rota]['status'] = {str(status): n for status, n in sorted(medidas.status[rota].items())}
+    todas = [ms for latencias in medidas.latencias.values() for ms in latencias]
+    relatorio = {
+        'url': args.url, 'inicio': relogio.strftime('%Y-%m-%dT%H:%M:%S'), 'duracao_s': duracao,
+        'concorrencia': args.concorrencia, 'taxa': args.taxa, 'pausa_ms': args.pausa_ms, 'mix': mix,
+        'semente': args.semente, 'donos': len(args.dono),
+        'total': _estatisticas(todas, sum(medidas.erros.values()), duracao),
+        'rotas': rotas, 'eventos': dict(sorted(medidas.eventos.items())),
+    }
+    if medidas.atrasos:
+        atrasos = sorted(medidas.atrasos)
+        relatorio['atraso_inicio_ms'] = {'p50': percentil(atrasos, 50), 'p95': percentil(atrasos, 95),
+                                         'p99': percentil(atrasos, 99), 'max': atrasos[-1]}
+    return relatorio
+
+
+def imprimir(relatorio):
+    print(f"\n{'rota':42} {'req':>7} {'req/s':>7} {'erros':>6} {'%erro':>6} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'máx ms':>8}")
+    linhas = list(relatorio['rotas'].items()) + [('total', relatorio['total'])]
+    for rota, e in linhas:
+        print(f"{rota:42} {e['requisicoes']:>7} {e['por_segundo']:>7.1f} {e['erros']:>6} {e['taxa_erro']:>6.1%} "
+              f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f} {e['max_ms']:>8.1f}")
+    print('\n' + ', '.join(f'{nome}: {n}' for nome, n in relatorio['eventos'].items()))
+    if 'atraso_inicio_ms' in relatorio:
+        a = relatorio['atraso_inicio_ms']
+        print(f"Atraso entre chegada e início do fluxo: p50 {a['p50']:.1f} ms, p95 {a['p95']:.1f} ms, "
+              f"p99 {a['p99']:.1f} ms, máx {a['max']:.1f} ms")
+
+
+def comparar(relatorio, caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    print(f"\nComparado com {caminho} (atual / anterior):")
+    print(f"{'rota':42} {'req/s':>15} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'%erro':>15}")
+    linhas = [(rota, e, base['rotas'].get(rota)) for rota, e in relatorio['rotas'].items()]
+    for rota, atual, anterior in linhas + [('total', relatorio['total'], base['total'])]:
+        if anterior is None:
+            continue
+        print(f"{rota:42} {atual['por_segundo']:>7.1f}/{anterior['por_segundo']:<7.1f}"
+              + ''.join(f" {atual[campo]:>8.1f}/{anterior[campo]:<8.1f}" for campo in ('p50_ms', 'p95_ms', 'p99_ms'))
+              + f" {atual['taxa_erro']:>6.1%}/{anterior['taxa_erro']:<6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Usuários virtuais (clientes) simultâneos')
+    parser.add_argument('--taxa', type=float, default=0.0,
+                        help='Fluxos por segundo (chegadas de Poisson); 0 = cada usuário emenda um fluxo no outro')
+    parser.add_argument('--duracao', type=float, default=30, help='Segundos de carga')
+    parser.add_argument('--pausa-ms', type=int, default=0, help='Pausa de cada usuário entre requisições')
+    parser.add_argument('--mix', type=ler_mix, default=ler_mix(MIX_PADRAO), help=f'Pesos dos fluxos ({MIX_PADRAO})')
+    parser.add_argument('--dono', action='append', default=[], metavar='EMAIL:SENHA',
+                        help='Dono de quadra para o fluxo "dono" (pode repetir)')
+    parser.add_argument('--prefixo', default='carga', help='Prefixo dos e-mails dos clientes')
+    parser.add_argument('--senha', default='carga-123', help='Senha dos clientes')
+    parser.add_argument('--sem-registro', action='store_true', help='Não registra os clientes (já existem)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=30, help='Segundos por requisição')
+    parser.add_argument('--json', metavar='ARQUIVO', help='Grava o relatório em JSON')
+    parser.add_argument('--comparar', metavar='ARQUIVO', help='Relatório JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    mix = dict(args.mix)
+    if not args.dono and mix.pop('dono', None):
+        print('Sem --dono: o fluxo "dono" fica de fora.', file=sys.stderr)
+    if not mix:
+        sys.exit('O --mix não tem fluxos para rodar.')
+
+    medidas = Medidas()
+    inicio = relogio.perf_counter()
+    clientes, donos, contexto = preparar(args, medidas)
+    print(f'{len(clientes)} clientes e {len(donos)} donos autenticados em {relogio.perf_counter() - inicio:.1f}s; '
+          f'{len(contexto.quadras)} quadras')
+    modelo = f'{args.taxa:g} fluxos/s' if args.taxa else 'modelo fechado'
+    print(f'Carga por {args.duracao:g}s em {args.url} ({args.concorrencia} usuários, {modelo})...')
+
+    duracao = executar(args, mix, clientes, donos, contexto, medidas)
+    relatorio = montar_relatorio(args, mix, medidas, duracao)
+    imprimir(relatorio)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f'Relatório gravado em {args.json}')
+    if args.comparar:
+        comparar(relatorio, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
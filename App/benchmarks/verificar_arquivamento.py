@@ -0,0 +1,73 @@
+"""Confere que o arquivamento pode rodar de novo depois de novas reservas.
+
+Num banco temporário: arquiva as reservas antigas (inclusive as de maior id), faz
+reservas novas, arquiva outra vez e falha se uma reserva nova repetir o id de uma
+arquivada, se o segundo arquivamento falhar ou se o histórico perder linhas.
+
+Uso (a partir do diretório App):
+    python benchmarks/verificar_arquivamento.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    pasta = tempfile.mkdtemp(prefix='resergol-arquivamento-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'verificar.db')
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    from services.arquivamento import arquivar_reservas
+    from models import db
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+    from models.reserva_model import Reserva, ReservaArquivo, ReservaHistorico
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        dono = Usuario.query.filter_by(role='admin').first()
+        quadra = Quadra(nome='Quadra Arquivo', endereco='Rua do Arquivo', tipo='futsal', preco_hora=80.0,
+                        dono_id=dono.id)
+        db.session.add(quadra)
+        db.session.commit()
+
+        def reservar(dias_atras, quantidade):
+            dia = date.today() - timedelta(days=dias_atras)
+            reservas = [Reserva(quadra_id=quadra.id, usuario_id=dono.id, data=dia, hora_inicio=time(6 + i),
+                                hora_fim=time(7 + i), status='ativa') for i in range(quantidade)]
+            db.session.add_all(reservas)
+            db.session.commit()
+            return [reserva.id for reserva in reservas]
+
+        # Só reservas antigas: o arquivamento esvazia a tabela, inclusive o maior id
+        primeiras = reservar(200, 2)
+        arquivadas = arquivar_reservas(dias=90, pausa_ms=0)
+        # Reservas feitas depois do arquivamento, uma delas também antiga
+        novas = reservar(150, 2) + reservar(1, 2)
+        repetidos = set(primeiras) & set(novas)
+        arquivadas += arquivar_reservas(dias=90, pausa_ms=0)
+
+        total = len(primeiras) + len(novas)
+        historico = ReservaHistorico.query.count()
+        linhas = len(ReservaHistorico.query.all())
+        print(f'ids arquivados {primeiras}, ids novos {novas}')
+        print(f'{arquivadas} reserva(s) arquivada(s), {ReservaArquivo.query.count()} no arquivo, '
+              f'{historico} no histórico ({linhas} carregadas)')
+        falhas = []
+        if repetidos:
+            falhas.append(f'ids reusados: {sorted(repetidos)}')
+        if arquivadas != 4 or historico != total or linhas != total:
+            falhas.append(f'esperado 4 arquivadas e {total} no histórico')
+    if falhas:
+        raise SystemExit('✗ ' + '; '.join(falhas))
+    print('✓ arquivamento repetido sem ids reusados')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Confere o orçamento de comandos SQL das páginas de listagem e dos formulários.
+
+Popula um banco temporário, acessa cada rota com poucas e com muitas linhas (GET nas
+páginas, POST nos fluxos de reserva e de edição; os POSTs com o cache de usuários vazio,
+como na primeira requisição depois do login ou em outro worker) e falha se alguma rota estourar o
+orçamento declarado com @orcamento_queries para o método ou se o número de comandos
+crescer com o número de linhas da página.
+
+Uso (a partir do diretório App):
+    python benchmarks/verificar_orcamentos.py --linhas 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENHA = 'senha123'
+
+
+def popular(db, modelos, senha_hash, inicio, quantidade, quadra_do_dono_id, usuario_id):
+    """Cria `quantidade` quadras, usuários e reservas a partir do índice `inicio`"""
+    Usuario, Quadra, Reserva = modelos
+    hoje = date.today()
+    for i in range(inicio, inicio + quantidade):
+        cliente = Usuario(nome=f'Cliente {i}', email=f'cliente{i}@orcamento.local', senha_hash=senha_hash)
+        outro_dono = Usuario(nome=f'Dono {i}', email=f'dono{i}@orcamento.local', senha_hash=senha_hash,
+                             role='dono_quadra')
+        db.session.add_all([cliente, outro_dono])
+        db.session.flush()
+        quadra = Quadra(nome=f'Quadra {i}', endereco=f'Rua {i}', tipo='futsal', preco_hora=80.0,
+                        dono_id=outro_dono.id)
+        db.session.add(quadra)
+        db.session.flush()
+        dia = hoje + timedelta(days=i // 17 % 30)
+        hora = time(6 + i % 17, 0)
+        hora_fim = time(7 + i % 17, 0)
+        # Reserva do usuário de teste em outra quadra e reserva de outro cliente na quadra do dono de teste
+        db.session.add(Reserva(quadra_id=quadra.id, usuario_id=usuario_id, data=dia,
+                               hora_inicio=hora, hora_fim=hora_fim, status='ativa'))
+        db.session.add(Reserva(quadra_id=quadra_do_dono_id, usuario_id=cliente.id, data=dia - timedelta(days=60 + i),
+                               hora_inicio=hora, hora_fim=hora_fim, status='ativa'))
+    db.session.commit()
+
+
+def medir(app, rotas):
+    """Número de comandos SQL de cada rota, por perfil de usuário.
+
+    Cada rota é um caminho (GET) ou um par (caminho, formulário), enviado por POST.
+    """
+    from services.sessao import _cache_usuarios
+
+    medidas = {}
+    for email, caminhos in rotas.items():
+        cliente = app.test_client()
+        cliente.post('/login', data={'email': email, 'senha': SENHA})
+        for rota in caminhos:
+            if isinstance(rota, tuple):
+                metodo, (caminho, formulario) = 'POST', rota
+                # Os GETs anteriores aqueceram o cache; o POST mede o caso frio
+                _cache_usuarios.limpar()
+                resposta = cliente.post(caminho, data=formulario)
+                esperado = 302
+            else:
+                metodo, caminho = 'GET', rota
+                resposta = cliente.get(caminho)
+                esperado = 200
+            if resposta.status_code != esperado:
+                raise SystemExit(f'{metodo} {caminho} respondeu {resposta.status_code}')
+            endpoint = app.url_map.bind('localhost').match(caminho.split('?')[0])[0]
+            medidas[metodo, caminho] = (endpoint, int(resposta.headers['X-Total-Queries']))
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=300, help='linhas por página na segunda medição')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='resergol-orcamento-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'orcamento.db')
+
+    from app import create_app
+    from services.inicializacao import inicializar_banco
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+    from models import db
+    from services.senhas import senhas
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+    from models.reserva_model import Reserva
+    from services.orcamento_queries import limite_do_orcamento
+
+    with app.app_context():
+        senha_hash = senhas.gerar_hash(SENHA)
+        admin = Usuario.query.filter_by(role='admin').first()
+        admin.senha_hash = senha_hash
+        dono = Usuario(nome='Dono Teste', email='dono@orcamento.local', senha_hash=senha_hash, role='dono_quadra')
+        usuario = Usuario(nome='Usuario Teste', email='usuario@orcamento.local', senha_hash=senha_hash)
+        db.session.add_all([dono, usuario])
+        db.session.flush()
+        quadra = Quadra(nome='Quadra do Dono', endereco='Rua Principal', tipo='society', preco_hora=120.0,
+                        dono_id=dono.id)
+        db.session.add(quadra)
+        db.session.commit()
+        quadra_id, usuario_id, dono_id = quadra.id, usuario.id, dono.id
+
+    def rotas(rodada):
+        """Rotas medidas; os POSTs de cada rodada reservam horários diferentes"""
+        amanha = date.today() + timedelta(days=1)
+        reserva = {'data': amanha.isoformat(), 'hora': f'{20 + rodada}:00'}
+        serie = {'dia_semana': str(amanha.weekday()), 'hora': f'{18 + rodada}:00',
+                 'data_inicio': amanha.isoformat(), 'semanas': '8'}
+        edicao = {'nome': f'Quadra do Dono {rodada}', 'endereco': 'Rua Principal', 'tipo': 'society',
+                  'descricao': '', 'preco_hora': '120', 'ativa': 'on', 'dono_id': str(dono_id)}
+        perfil = {'nome': f'Usuario Teste {rodada}', 'email': 'usuario@orcamento.local', 'role': 'usuario'}
+        return {
+            'usuario@orcamento.local': ['/', '/perfil', '/quadras', '/minhas-reservas', f'/reservar/{quadra_id}',
+                                        (f'/reservar/{quadra_id}', reserva),
+                                        (f'/reservar/{quadra_id}/semanal', serie)],
+            'dono@orcamento.local': ['/minhas-quadras', '/minhas-quadras/painel', f'/quadra/{quadra_id}/reservas',
+                                     f'/quadra/{quadra_id}/gerenciar-horarios'],
+            'admin@resergol.com': ['/admin/usuarios', '/admin/quadras', f'/admin/quadra/{quadra_id}/editar',
+                                   f'/admin/quadra/{quadra_id}/reservas',
+                                   (f'/admin/quadra/{quadra_id}/editar', edicao),
+                                   (f'/admin/usuario/{usuario_id}/editar', perfil)],
+        }
+
+    modelos = (Usuario, Quadra, Reserva)
+    with app.app_context():
+        popular(db, modelos, senha_hash, 0, 3, quadra_id, usuario_id)
+    poucas = medir(app, rotas(0))
+    with app.app_context():
+        popular(db, modelos, senha_hash, 3, args.linhas, quadra_id, usuario_id)
+    muitas = medir(app, rotas(1))
+
+    falhas = 0
+    print(f"{'rota':50} {'3 linhas':>9} {args.linhas:>6} lin. {'orçamento':>10}")
+    for (metodo, caminho), (endpoint, total) in muitas.items():
+        limite = limite_do_orcamento(app.view_functions[endpoint], metodo)
+        ok = total <= poucas[metodo, caminho][1] and (limite is None or total <= limite)
+        falhas += not ok
+        print(f"{'✓' if ok else '✗'} {metodo:4} {caminho:43} {poucas[metodo, caminho][1]:>9} {total:>11} "
+              f"{str(limite):>10}")
+    if falhas:
+        raise SystemExit(f'{falhas} rota(s) fora do orçamento')
+
+
+if __name__ == '__main__':
+    main()
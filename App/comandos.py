@@ -0,0 +1,188 @@
+"""Comandos de linha de comando (`flask --app app <comando>`)"""
+from datetime import timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db
+from services.inicializacao import inicializar_banco, EMAIL_ADMIN_PADRAO
+from services.reservas import reconstruir_ocupacao
+from services.resumos import reconstruir_resumos
+from services.busca import reconstruir_indices_busca
+from services.geo import reconstruir_indice_geo
+from services.importacao import importar, formato_do_arquivo, TIPOS_IMPORTACAO, FORMATOS_IMPORTACAO
+from services.catalogo import invalidar_catalogo
+from services.dados_sinteticos import gerar_dados
+from services.arquivamento import arquivar_reservas, contar_para_arquivar, data_de_corte
+from services.migracoes import aplicar_migracoes, versao_atual, verificar_planos, MigracaoBloqueada
+from services.emails import executar_worker, profundidade_fila
+from services.throttle import throttle_login
+from services.templates_cache import precompilar_templates
+
+# Grupo só para registrar os comandos; eles aparecem na raiz do `flask`
+comandos = AppGroup('comandos')
+comando = comandos.command
+
+
+@comando('inicializar-banco')
+def inicializar_banco_comando():
+    """Cria as tabelas, aplica as migrações e cria o admin padrão"""
+    try:
+        aplicadas, admin_criado = inicializar_banco()
+    except MigracaoBloqueada as erro:
+        raise SystemExit(f"✗ Migração interrompida: {erro}")
+    if aplicadas:
+        print(f"✓ Migrações aplicadas: {', '.join(map(str, aplicadas))}")
+    if admin_criado:
+        print(f"✓ Admin criado: {EMAIL_ADMIN_PADRAO} / admin123")
+    print("✓ Banco inicializado")
+
+
+@comando('reconstruir-ocupacao')
+def reconstruir_ocupacao_comando():
+    """Recalcula o índice de ocupação das quadras"""
+    reconstruir_ocupacao()
+    print("✓ Índice de ocupação reconstruído")
+
+
+@comando('reconstruir-resumos')
+def reconstruir_resumos_comando():
+    """Recalcula os resumos de reservas do painel dos donos"""
+    reconstruir_resumos()
+    print("✓ Resumos de reservas reconstruídos")
+
+
+@comando('reconstruir-busca')
+def reconstruir_busca_comando():
+    """Reindexa a busca textual de quadras e usuários e o índice espacial das quadras"""
+    reconstruir_indices_busca()
+    reconstruir_indice_geo()
+    print("✓ Índices de busca reconstruídos")
+
+
+@comando('migrar')
+def migrar_comando():
+    """Aplica as migrações pendentes no banco configurado"""
+    aplicadas = aplicar_migracoes()
+    with db.engine.connect() as conexao:
+        versao = versao_atual(conexao)
+    if aplicadas:
+        print(f"✓ Migrações aplicadas: {', '.join(map(str, aplicadas))}")
+    print(f"✓ Esquema na versão {versao}")
+
+
+@comando('verificar-planos')
+def verificar_planos_comando():
+    """Falha se alguma consulta das rotas de leitura fizer varredura completa de tabela"""
+    falhas = 0
+    for nome, sql, plano, ok in verificar_planos(current_app._get_current_object()):
+        print(f"{'✓' if ok else '✗'} {nome}: {' | '.join(plano)}")
+        if not ok:
+            falhas += 1
+            print(f"    {' '.join(sql.split())}")
+    if falhas:
+        raise SystemExit(f"{falhas} consulta(s) com varredura completa")
+
+
+@comando('importar')
+@click.argument('tipo', type=click.Choice(TIPOS_IMPORTACAO))
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(FORMATOS_IMPORTACAO), help='Padrão: pela extensão do arquivo')
+@click.option('--relatorio', type=click.Path(dir_okay=False), help='Grava os erros por linha neste CSV')
+def importar_comando(tipo, arquivo, formato, relatorio):
+    """Importa usuários, quadras ou reservas de um arquivo CSV ou JSON Lines"""
+    with open(arquivo, encoding='utf-8-sig', newline='') as entrada:
+        resultado = importar(tipo, entrada, formato or formato_do_arquivo(arquivo))
+    if tipo == 'quadras' and resultado.importadas:
+        invalidar_catalogo()
+    print(f"✓ {resultado.importadas} de {resultado.lidas} registro(s) importado(s) em {resultado.segundos:.1f}s")
+    if resultado.erros:
+        print(f"✗ {len(resultado.erros)} linha(s) com erro")
+        if relatorio:
+            with open(relatorio, 'w', encoding='utf-8', newline='') as saida:
+                resultado.escrever_csv(saida)
+            print(f"  Relatório de erros: {relatorio}")
+        else:
+            for linha, erro in sorted(resultado.erros)[:20]:
+                print(f"  linha {linha}: {erro}")
+
+
+@comando('arquivar-reservas')
+@click.option('--dias', type=int, help='Arquiva reservas com data anterior a hoje - DIAS (padrão: ARQUIVAR_APOS_DIAS)')
+@click.option('--lote', type=int, help='Reservas movidas por transação (padrão: ARQUIVAMENTO_LOTE)')
+@click.option('--pausa-ms', type=int, help='Pausa entre lotes, para as reservas novas passarem (padrão: ARQUIVAMENTO_PAUSA_MS)')
+@click.option('--simular', is_flag=True, help='Só conta quantas reservas seriam arquivadas')
+def arquivar_reservas_comando(dias, lote, pausa_ms, simular):
+    """Move as reservas antigas para o arquivo (reservas_arquivo)"""
+    corte = data_de_corte(dias)
+    if simular:
+        print(f"{contar_para_arquivar(dias)} reserva(s) anteriores a {corte:%d/%m/%Y} seriam arquivadas")
+        return
+    movidas = arquivar_reservas(dias=dias, lote=lote, pausa_ms=pausa_ms)
+    print(f"✓ {movidas} reserva(s) anteriores a {corte:%d/%m/%Y} arquivada(s)")
+
+
+@comando('gerar-dados')
+@click.option('--semente', default=42, show_default=True, help='Mesma semente (e mesmo --inicio), mesmos dados')
+@click.option('--clientes', default=20_000, show_default=True)
+@click.option('--donos', default=300, show_default=True)
+@click.option('--quadras', default=2_000, show_default=True)
+@click.option('--reservas', default=1_000_000, show_default=True)
+@click.option('--dias', default=365, show_default=True, help='Dias cobertos pelas reservas (os últimos 30 no futuro)')
+@click.option('--inicio', type=click.DateTime(formats=['%Y-%m-%d']), help='Primeiro dia das reservas (padrão: relativo a hoje)')
+@click.option('--cancelamento', default=0.12, show_default=True, type=click.FloatRange(0, 1),
+              help='Fração das reservas canceladas')
+@click.option('--senha', default='senha123', show_default=True, help='Senha de todos os usuários gerados')
+def gerar_dados_comando(semente, clientes, donos, quadras, reservas, dias, inicio, cancelamento, senha):
+    """Popula um banco vazio com dados sintéticos (determinísticos pela semente)"""
+    try:
+        resultado = gerar_dados(semente=semente, clientes=clientes, donos=donos, quadras=quadras, reservas=reservas,
+                                dias=dias, inicio=inicio.date() if inicio else None, cancelamento=cancelamento,
+                                senha=senha)
+    except ValueError as erro:
+        raise SystemExit(f"✗ {erro}")
+    # Só no fim: um servidor rodando não guarda o catálogo de uma carga pela metade
+    invalidar_catalogo()
+    for nome, segundos in resultado.etapas:
+        print(f"  {nome}: {segundos:.1f}s")
+    print(f"✓ {resultado.clientes} clientes, {resultado.donos} donos e {resultado.quadras} quadras")
+    print(f"✓ {resultado.reservas} reservas ({resultado.canceladas} canceladas) de {resultado.inicio:%d/%m/%Y} "
+          f"a {resultado.inicio + timedelta(days=resultado.dias - 1):%d/%m/%Y}")
+    if resultado.descartadas:
+        print(f"  {resultado.descartadas} reserva(s) sem horário livre descartada(s)")
+    print(f"  Para repetir: --semente {semente} --inicio {resultado.inicio.isoformat()} "
+          f"(usuários dono<i>/cliente<i>@sintetico.local, senha {senha})")
+
+
+@comando('enviar-emails')
+@click.option('--continuo', is_flag=True, help='Continua aguardando novos emails')
+@click.option('--intervalo', default=5, help='Segundos entre verificações no modo contínuo')
+@click.option('--lote', default=50, help='Emails por conexão SMTP')
+def enviar_emails_comando(continuo, intervalo, lote):
+    """Envia os emails pendentes da fila de saída"""
+    enviados, falhas = executar_worker(intervalo=intervalo, tamanho=lote, continuo=continuo)
+    print(f"✓ {enviados} email(s) enviado(s), {falhas} falha(s)")
+
+
+@comando('fila-emails')
+def fila_emails_comando():
+    """Mostra a profundidade da fila de emails"""
+    for status, quantidade in profundidade_fila().items():
+        print(f"{status}: {quantidade}")
+
+
+@comando('limpar-bloqueios')
+def limpar_bloqueios_comando():
+    """Remove os bloqueios de login vencidos"""
+    removidos = throttle_login.limpar_expirados(forcar=True)
+    print(f"✓ {removidos} bloqueio(s) de conta vencido(s) removido(s)")
+
+
+@comando('precompilar-templates')
+def precompilar_templates_comando():
+    """Compila os templates e grava o cache de bytecode"""
+    print(f"✓ {precompilar_templates(current_app)} templates compilados")
+
+
+def registrar_comandos(app):
+    for nome, comando_cli in comandos.commands.items():
+        app.cli.add_command(comando_cli, nome)
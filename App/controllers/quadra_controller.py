@@ -1,34 +1,150 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from models import db
 from models.usuario_model import Usuario
 from models.quadra_model import Quadra
-from models.reserva_model import Reserva
-from datetime import datetime, timedelta
+from models.reserva_model import Reserva, ReservaHistorico
+from services.paginacao import paginar, paginar_lista
+from services.busca import filtro_busca_quadras, sugerir_quadras
+from services.catalogo import resposta_catalogo, invalidar_catalogo
+from services.resumos import painel_quadras
+from services.exportacao import resposta_exportacao, FORMATOS_EXPORTACAO
+from services.arquivamento import fonte_das_reservas
+from services.geo import ler_coordenadas, quadras_proximas, RAIO_PADRAO_KM, RAIO_MAXIMO_KM, RAIOS_BUSCA_KM
+from models.ocupacao_model import HORAS_FUNCIONAMENTO
+from services.reservas import (
+    registrar_cancelamento, estatisticas_ocupacao, filtro_quadra_livre, HORIZONTES_ESTATISTICAS, ROTULOS_HORARIOS,
+    DIAS_SEMANA
+)
+from datetime import datetime, timedelta, date
+
+# Filtros da busca do catálogo (horário livre e distância)
+CAMPOS_BUSCA = ('tipo', 'data', 'hora', 'hora_ate', 'lat', 'lon')
+# Acima disso a busca mostra "mais de N" em vez de contar todas as quadras livres
+LIMITE_CONTAGEM_BUSCA = 500
+
+
+def _filtros_reservas_quadra(quadra_id, modelo=Reserva):
+    """Condições da lista de reservas da quadra (status e data da query string) sobre
+    `modelo` (Reserva ou ReservaHistorico).
+
+    Retorna (condições, filtro_status, filtro_data); data inválida é ignorada.
+    """
+    filtro_status = request.args.get('status', 'todas')
+    filtro_data = request.args.get('data', '')
+    condicoes = [modelo.quadra_id == quadra_id]
+    if filtro_status != 'todas':
+        condicoes.append(modelo.status == filtro_status)
+    if filtro_data:
+        try:
+            condicoes.append(modelo.data == datetime.strptime(filtro_data, '%Y-%m-%d').date())
+        except ValueError:
+            pass
+    return condicoes, filtro_status, filtro_data
 
 class QuadraController:
     
     @staticmethod
     def listar_quadras():
-        quadras = Quadra.query.filter_by(ativa=True).all()
-        return render_template('quadras/listar.html', quadras=quadras)
+        busca = {campo: request.args.get(campo, '').strip() for campo in CAMPOS_BUSCA + ('raio',)}
+        if any(busca[campo] for campo in CAMPOS_BUSCA):
+            return QuadraController.buscar_quadras(busca)
+        
+        def renderizar():
+            quadras = Quadra.query.filter_by(ativa=True).options(joinedload(Quadra.dono)).all()
+            return render_template('quadras/listar.html', quadras=quadras, busca=busca,
+                                   horarios=ROTULOS_HORARIOS, raios=RAIOS_BUSCA_KM)
+        
+        return resposta_catalogo(renderizar)
+    
+    @staticmethod
+    def buscar_quadras(busca):
+        """Quadras ativas do tipo escolhido, livres na data e hora (ou faixa de horas) e/ou
+        perto de um ponto. Com ponto, ordena pela distância; sem, da mais barata para a mais cara."""
+        filtros = [Quadra.ativa == True]
+        if busca['tipo']:
+            filtros.append(Quadra.tipo == busca['tipo'])
+        
+        if busca['data'] or busca['hora'] or busca['hora_ate']:
+            try:
+                data = datetime.strptime(busca['data'], '%Y-%m-%d').date() if busca['data'] else date.today()
+                hora_de = datetime.strptime(busca['hora'], '%H:%M').hour if busca['hora'] else HORAS_FUNCIONAMENTO.start
+                hora_ate = datetime.strptime(busca['hora_ate'], '%H:%M').hour if busca['hora_ate'] else hora_de
+                if not busca['hora'] and not busca['hora_ate']:
+                    hora_ate = HORAS_FUNCIONAMENTO.stop - 1
+            except ValueError:
+                flash('Data ou horário inválido!', 'danger')
+                return redirect(url_for('quadras.listar'))
+            
+            if data < date.today():
+                flash('Não é possível buscar horários em datas passadas!', 'danger')
+                return redirect(url_for('quadras.listar'))
+            if hora_de not in HORAS_FUNCIONAMENTO or hora_ate not in HORAS_FUNCIONAMENTO or hora_ate < hora_de:
+                flash('Faixa de horário inválida!', 'danger')
+                return redirect(url_for('quadras.listar'))
+            
+            filtros.append(filtro_quadra_livre(data, hora_de, hora_ate))
+        
+        contexto = {'busca': busca, 'horarios': ROTULOS_HORARIOS, 'raios': RAIOS_BUSCA_KM}
+        
+        if busca['lat'] or busca['lon']:
+            try:
+                latitude, longitude = ler_coordenadas(busca['lat'], busca['lon'])
+                raio = float(busca['raio'] or RAIO_PADRAO_KM)
+            except ValueError:
+                flash('Localização inválida!', 'danger')
+                return redirect(url_for('quadras.listar'))
+            raio = min(max(raio, 0.1), RAIO_MAXIMO_KM)
+            
+            # Distância exata só para as candidatas do índice espacial; a página é cortada em memória
+            pagina = paginar_lista(quadras_proximas(latitude, longitude, raio, filtros))
+            por_id = {q.id: q for q in Quadra.query.filter(Quadra.id.in_([i for _, i in pagina.itens]))
+                      .options(joinedload(Quadra.dono))}
+            quadras = [por_id[i] for _, i in pagina.itens]
+            distancias = {i: d for d, i in pagina.itens}
+            return render_template('quadras/listar.html', quadras=quadras, pagina=pagina,
+                                   distancias=distancias, **contexto)
+        
+        query = Quadra.query.filter(*filtros)
+        pagina = paginar(query.options(joinedload(Quadra.dono)), [Quadra.preco_hora, Quadra.id],
+                         descendente=False, limite_contagem=LIMITE_CONTAGEM_BUSCA)
+        return render_template('quadras/listar.html', quadras=pagina.itens, pagina=pagina, **contexto)
     
     @staticmethod
     @login_required
     def minhas_quadras():
         if not current_user.is_dono_quadra():
             flash('Você precisa ser dono de quadra para acessar esta página!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         quadras = Quadra.query.filter_by(dono_id=current_user.id).all()
         return render_template('quadras/minhas_quadras.html', quadras=quadras)
     
+    @staticmethod
+    @login_required
+    def painel_dono():
+        """Receita, reservas, cancelamentos e mapa de calor das quadras do dono (só dos resumos)"""
+        if not current_user.is_dono_quadra():
+            flash('Você precisa ser dono de quadra para acessar esta página!', 'danger')
+            return redirect(url_for('principal.index'))
+        
+        quadras = Quadra.query.filter_by(dono_id=current_user.id).order_by(Quadra.nome).all()
+        quadra_id = request.args.get('quadra', type=int)
+        selecionadas = [q for q in quadras if q.id == quadra_id]
+        if not selecionadas:
+            quadra_id, selecionadas = None, quadras
+        
+        return render_template('quadras/painel.html', quadras=quadras, quadra_id=quadra_id,
+                               painel=painel_quadras(selecionadas), dias_semana=DIAS_SEMANA)
+    
     @staticmethod
     @login_required
     def cadastrar_quadra():
         if not current_user.is_dono_quadra():
             flash('Você precisa ser dono de quadra para cadastrar!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         if request.method == 'POST':
             nome = request.form.get('nome')
@@ -39,7 +155,13 @@ class QuadraController:
             
             if not all([nome, endereco, tipo, preco_hora]):
                 flash('Preencha todos os campos obrigatórios!', 'danger')
-                return redirect(url_for('cadastrar_quadra'))
+                return redirect(url_for('quadras.cadastrar'))
+            
+            try:
+                latitude, longitude = ler_coordenadas(request.form.get('latitude'), request.form.get('longitude'))
+            except ValueError:
+                flash('Coordenadas inválidas! Informe latitude (-90 a 90) e longitude (-180 a 180), ou deixe as duas em branco.', 'danger')
+                return redirect(url_for('quadras.cadastrar'))
             
             nova_quadra = Quadra(
                 nome=nome,
@@ -47,13 +169,16 @@ class QuadraController:
                 tipo=tipo,
                 descricao=descricao,
                 preco_hora=float(preco_hora),
+                latitude=latitude,
+                longitude=longitude,
                 dono_id=current_user.id
             )
             db.session.add(nova_quadra)
             db.session.commit()
+            invalidar_catalogo()
             
             flash('Quadra cadastrada com sucesso!', 'success')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
         return render_template('quadras/cadastrar.html')
     
@@ -64,18 +189,26 @@ class QuadraController:
         
         if quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
         if request.method == 'POST':
+            try:
+                latitude, longitude = ler_coordenadas(request.form.get('latitude'), request.form.get('longitude'))
+            except ValueError:
+                flash('Coordenadas inválidas! Informe latitude (-90 a 90) e longitude (-180 a 180), ou deixe as duas em branco.', 'danger')
+                return redirect(url_for('quadras.editar', quadra_id=quadra_id))
+            
             quadra.nome = request.form.get('nome')
             quadra.endereco = request.form.get('endereco')
             quadra.tipo = request.form.get('tipo')
             quadra.descricao = request.form.get('descricao')
             quadra.preco_hora = float(request.form.get('preco_hora'))
+            quadra.latitude, quadra.longitude = latitude, longitude
             
             db.session.commit()
+            invalidar_catalogo()
             flash('Quadra atualizada com sucesso!', 'success')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
         return render_template('quadras/editar.html', quadra=quadra)
     
@@ -86,12 +219,13 @@ class QuadraController:
         
         if quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
         db.session.delete(quadra)
         db.session.commit()
+        invalidar_catalogo()
         flash('Quadra deletada com sucesso!', 'success')
-        return redirect(url_for('minhas_quadras'))
+        return redirect(url_for('quadras.minhas_quadras'))
     
     @staticmethod
     @login_required
@@ -100,59 +234,46 @@ class QuadraController:
         
         if quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
-        filtro_status = request.args.get('status', 'todas')
-        filtro_data = request.args.get('data', '')
-        
-        query = Reserva.query.filter_by(quadra_id=quadra_id)
-        
-        if filtro_status != 'todas':
-            query = query.filter_by(status=filtro_status)
-        
-        if filtro_data:
-            try:
-                data_filtro = datetime.strptime(filtro_data, '%Y-%m-%d').date()
-                query = query.filter_by(data=data_filtro)
-            except:
-                pass
-        
-        reservas = query.order_by(Reserva.data.desc(), Reserva.hora_inicio.desc()).all()
+        modelo, ordem, historico = fonte_das_reservas()
+        condicoes, filtro_status, filtro_data = _filtros_reservas_quadra(quadra_id, modelo)
+        query = modelo.query.filter(*condicoes)
+        pagina = paginar(query.options(joinedload(modelo.usuario)), ordem)
         
         return render_template('quadras/reservas_quadra.html', 
                              quadra=quadra, 
-                             reservas=reservas,
+                             reservas=pagina.itens,
+                             pagina=pagina,
                              filtro_status=filtro_status,
-                             filtro_data=filtro_data)
+                             filtro_data=filtro_data,
+                             historico=historico)
     
     @staticmethod
     @login_required
-    def gerenciar_horarios(quadra_id):
+    def exportar_reservas_quadra(quadra_id):
+        """Reservas da quadra (com os filtros da listagem) em CSV ou NDJSON, em streaming"""
         quadra = Quadra.query.get_or_404(quadra_id)
         
         if quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
-        
-        hoje = datetime.utcnow().date()
-        proximos_dias = [hoje + timedelta(days=i) for i in range(7)]
-        
-        estatisticas = []
-        for dia in proximos_dias:
-            total_reservas = Reserva.query.filter_by(
-                quadra_id=quadra_id,
-                data=dia,
-                status='ativa'
-            ).count()
-            estatisticas.append({
-                'data': dia,
-                'reservas': total_reservas,
-                'disponivel': 17 - total_reservas
-            })
-        
-        return render_template('quadras/gerenciar_horarios.html',
-                             quadra=quadra,
-                             estatisticas=estatisticas)
+            return redirect(url_for('quadras.minhas_quadras'))
+        
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            flash('Formato de exportação inválido!', 'danger')
+            return redirect(url_for('quadras.ver_reservas', quadra_id=quadra_id))
+        
+        modelo, ordem, _ = fonte_das_reservas()
+        condicoes, _, _ = _filtros_reservas_quadra(quadra_id, modelo)
+        consulta = (
+            select(modelo.id, modelo.data, modelo.hora_inicio, modelo.hora_fim, modelo.status,
+                   Usuario.nome.label('usuario'), Usuario.email, modelo.serie_id, modelo.criado_em)
+            .join(Usuario, Usuario.id == modelo.usuario_id)
+            .where(*condicoes)
+            .order_by(*[coluna.desc() for coluna in ordem])
+        )
+        return resposta_exportacao(consulta, f'reservas_quadra_{quadra_id}_{date.today().isoformat()}', formato)
     
     @staticmethod
     @login_required
@@ -161,16 +282,15 @@ class QuadraController:
         
         if reserva.quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
+            return redirect(url_for('quadras.minhas_quadras'))
         
         if reserva.status == 'cancelada':
             flash('Esta reserva já foi cancelada!', 'warning')
-            return redirect(url_for('ver_reservas_quadra', quadra_id=reserva.quadra_id))
+            return redirect(url_for('quadras.ver_reservas', quadra_id=reserva.quadra_id))
         
-        reserva.status = 'cancelada'
-        db.session.commit()
+        registrar_cancelamento(reserva)
         flash(f'Reserva de {reserva.usuario.nome} foi cancelada!', 'success')
-        return redirect(url_for('ver_reservas_quadra', quadra_id=reserva.quadra_id))
+        return redirect(url_for('quadras.ver_reservas', quadra_id=reserva.quadra_id))
 
     @staticmethod
     @login_required
@@ -180,37 +300,20 @@ class QuadraController:
         
         if quadra.dono_id != current_user.id and not current_user.is_admin():
             flash('Você não tem permissão!', 'danger')
-            return redirect(url_for('minhas_quadras'))
-        
-        # Próximos 30 dias
-        hoje = date.today()
-        proximos_dias = [hoje + timedelta(days=i) for i in range(30)]
-        
-        # Coletar estatísticas
-        estatisticas = []
-        for dia in proximos_dias:
-            # Contar reservas ativas
-            reservas_ativas = Reserva.query.filter_by(
-                quadra_id=quadra_id,
-                data=dia,
-                status='ativa'
-            ).count()
-            
-            total_horarios = 17  # 6h às 22h = 17 horários
-            disponiveis = total_horarios - reservas_ativas
-            percentual = (reservas_ativas / total_horarios) * 100
-            
-            estatisticas.append({
-                'data': dia,
-                'dia_semana': ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom'][dia.weekday()],
-                'reservas': reservas_ativas,
-                'disponivel': disponiveis,
-                'percentual': round(percentual, 1)
-            })
+            return redirect(url_for('quadras.minhas_quadras'))
+        
+        # Horizonte escolhido pelo dono (7, 30 ou 90 dias)
+        dias = request.args.get('dias', 30, type=int)
+        if dias not in HORIZONTES_ESTATISTICAS:
+            dias = 30
+        
+        estatisticas = estatisticas_ocupacao(quadra_id, dias)
         
         return render_template('quadras/gerenciar_horarios.html',
                              quadra=quadra,
-                             estatisticas=estatisticas)
+                             estatisticas=estatisticas,
+                             dias=dias,
+                             horizontes=HORIZONTES_ESTATISTICAS)
     
     # ===== ADMIN =====
     
@@ -219,7 +322,7 @@ class QuadraController:
     def admin_listar_quadras():
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         filtro_tipo = request.args.get('tipo', 'todos')
         filtro_status = request.args.get('status', 'todos')
@@ -234,25 +337,34 @@ class QuadraController:
             query = query.filter_by(ativa=(filtro_status == 'ativa'))
         
         if filtro_busca:
-            query = query.filter(
-                (Quadra.nome.ilike(f'%{filtro_busca}%')) | 
-                (Quadra.endereco.ilike(f'%{filtro_busca}%'))
-            )
+            condicao = filtro_busca_quadras(filtro_busca)
+            if condicao is not None:
+                query = query.filter(condicao)
         
-        quadras = query.all()
+        pagina = paginar(query.options(joinedload(Quadra.dono)), [Quadra.id], descendente=False)
         
         return render_template('admin/quadras_admin.html',
-                             quadras=quadras,
+                             quadras=pagina.itens,
+                             pagina=pagina,
                              filtro_tipo=filtro_tipo,
                              filtro_status=filtro_status,
                              filtro_busca=filtro_busca)
     
+    @staticmethod
+    @login_required
+    def admin_sugerir_quadras():
+        """Sugestões da busca de quadras (autocompletar), por relevância"""
+        if not current_user.is_admin():
+            return jsonify({'erro': 'Acesso negado!'}), 403
+        
+        return jsonify(sugerir_quadras(request.args.get('q', '')))
+    
     @staticmethod
     @login_required
     def admin_cadastrar_quadra():
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         if request.method == 'POST':
             nome = request.form.get('nome')
@@ -264,12 +376,18 @@ class QuadraController:
             
             if not all([nome, endereco, tipo, preco_hora, dono_id]):
                 flash('Preencha todos os campos obrigatórios!', 'danger')
-                return redirect(url_for('admin_cadastrar_quadra'))
+                return redirect(url_for('admin.cadastrar_quadra'))
             
             dono = Usuario.query.get(int(dono_id))
             if not dono or not dono.is_dono_quadra():
                 flash('Dono inválido!', 'danger')
-                return redirect(url_for('admin_cadastrar_quadra'))
+                return redirect(url_for('admin.cadastrar_quadra'))
+            
+            try:
+                latitude, longitude = ler_coordenadas(request.form.get('latitude'), request.form.get('longitude'))
+            except ValueError:
+                flash('Coordenadas inválidas! Informe latitude (-90 a 90) e longitude (-180 a 180), ou deixe as duas em branco.', 'danger')
+                return redirect(url_for('admin.cadastrar_quadra'))
             
             nova_quadra = Quadra(
                 nome=nome,
@@ -277,13 +395,16 @@ class QuadraController:
                 tipo=tipo,
                 descricao=descricao,
                 preco_hora=float(preco_hora),
+                latitude=latitude,
+                longitude=longitude,
                 dono_id=int(dono_id)
             )
             db.session.add(nova_quadra)
             db.session.commit()
+            invalidar_catalogo()
             
             flash('Quadra cadastrada com sucesso!', 'success')
-            return redirect(url_for('admin_quadras'))
+            return redirect(url_for('admin.quadras'))
         
         donos = Usuario.query.filter_by(role='dono_quadra').all()
         return render_template('admin/cadastrar_quadra_admin.html', donos=donos)
@@ -293,16 +414,23 @@ class QuadraController:
     def admin_editar_quadra(quadra_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         quadra = Quadra.query.get_or_404(quadra_id)
         
         if request.method == 'POST':
+            try:
+                latitude, longitude = ler_coordenadas(request.form.get('latitude'), request.form.get('longitude'))
+            except ValueError:
+                flash('Coordenadas inválidas! Informe latitude (-90 a 90) e longitude (-180 a 180), ou deixe as duas em branco.', 'danger')
+                return redirect(url_for('admin.editar_quadra', quadra_id=quadra_id))
+            
             quadra.nome = request.form.get('nome')
             quadra.endereco = request.form.get('endereco')
             quadra.tipo = request.form.get('tipo')
             quadra.descricao = request.form.get('descricao')
             quadra.preco_hora = float(request.form.get('preco_hora'))
+            quadra.latitude, quadra.longitude = latitude, longitude
             quadra.ativa = request.form.get('ativa') == 'on'
             
             dono_id = request.form.get('dono_id')
@@ -312,27 +440,33 @@ class QuadraController:
                     quadra.dono_id = int(dono_id)
                 else:
                     flash('Dono inválido!', 'danger')
-                    return redirect(url_for('admin_editar_quadra', quadra_id=quadra_id))
+                    return redirect(url_for('admin.editar_quadra', quadra_id=quadra_id))
             
             db.session.commit()
+            invalidar_catalogo()
             flash('Quadra atualizada com sucesso!', 'success')
-            return redirect(url_for('admin_quadras'))
+            return redirect(url_for('admin.quadras'))
         
         donos = Usuario.query.filter_by(role='dono_quadra').all()
-        return render_template('admin/editar_quadra_admin.html', quadra=quadra, donos=donos)
+        total_reservas = ReservaHistorico.query.filter_by(quadra_id=quadra.id).count()
+        return render_template('admin/editar_quadra_admin.html',
+                             quadra=quadra,
+                             donos=donos,
+                             total_reservas=total_reservas)
     
     @staticmethod
     @login_required
     def admin_remover_quadra(quadra_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         quadra = Quadra.query.get_or_404(quadra_id)
         db.session.delete(quadra)
         db.session.commit()
+        invalidar_catalogo()
         flash('Quadra removida com sucesso!', 'success')
-        return redirect(url_for('admin_quadras'))
+        return redirect(url_for('admin.quadras'))
 
     @staticmethod
     @login_required
@@ -340,32 +474,22 @@ class QuadraController:
         """Admin visualiza todas as reservas de uma quadra"""
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         quadra = Quadra.query.get_or_404(quadra_id)
         
-        filtro_status = request.args.get('status', 'todas')
-        filtro_data = request.args.get('data', '')
-        
-        query = Reserva.query.filter_by(quadra_id=quadra_id)
-        
-        if filtro_status != 'todas':
-            query = query.filter_by(status=filtro_status)
-        
-        if filtro_data:
-            try:
-                data_filtro = datetime.strptime(filtro_data, '%Y-%m-%d').date()
-                query = query.filter_by(data=data_filtro)
-            except:
-                pass
-        
-        reservas = query.order_by(Reserva.data.desc(), Reserva.hora_inicio.desc()).all()
+        modelo, ordem, historico = fonte_das_reservas()
+        condicoes, filtro_status, filtro_data = _filtros_reservas_quadra(quadra_id, modelo)
+        query = modelo.query.filter(*condicoes)
+        pagina = paginar(query.options(joinedload(modelo.usuario)), ordem)
         
         return render_template('admin/reservas_quadra_admin.html', 
                              quadra=quadra, 
-                             reservas=reservas,
+                             reservas=pagina.itens,
+                             pagina=pagina,
                              filtro_status=filtro_status,
-                             filtro_data=filtro_data)
+                             filtro_data=filtro_data,
+                             historico=historico)
     
     @staticmethod
     @login_required
@@ -373,20 +497,19 @@ class QuadraController:
         """Admin cancela uma reserva de uma quadra"""
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         reserva = Reserva.query.get_or_404(reserva_id)
         
         if reserva.quadra_id != quadra_id:
             flash('Reserva não pertence a esta quadra!', 'danger')
-            return redirect(url_for('admin_quadras'))
+            return redirect(url_for('admin.quadras'))
         
         if reserva.status == 'cancelada':
             flash('Esta reserva já foi cancelada!', 'warning')
-            return redirect(url_for('admin_ver_reservas_quadra', quadra_id=quadra_id))
+            return redirect(url_for('admin.ver_reservas_quadra', quadra_id=quadra_id))
         
-        reserva.status = 'cancelada'
-        db.session.commit()
+        registrar_cancelamento(reserva)
         flash(f'Reserva de {reserva.usuario.nome} foi cancelada!', 'success')
-        return redirect(url_for('admin_ver_reservas_quadra', quadra_id=quadra_id))
+        return redirect(url_for('admin.ver_reservas_quadra', quadra_id=quadra_id))
 
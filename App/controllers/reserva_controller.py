@@ -1,8 +1,21 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import current_user, login_required
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from models import db
+from models.usuario_model import Usuario
 from models.quadra_model import Quadra
 from models.reserva_model import Reserva
+from models.serie_model import SerieReserva
+from models.ocupacao_model import HORAS_FUNCIONAMENTO
+from services.paginacao import paginar
+from services.exportacao import resposta_exportacao, FORMATOS_EXPORTACAO
+from services.arquivamento import fonte_das_reservas
+from services.reservas import (
+    ROTULOS_HORARIOS, DIAS_SEMANA, mascara_ocupacao, horario_livre, reservar_horario,
+    registrar_cancelamento, reservar_serie, cancelar_serie, disponibilidade_quadras,
+    versao_disponibilidade, corpo_disponibilidade
+)
 from datetime import datetime, timedelta, date, time
 
 class ReservaController:
@@ -14,10 +27,10 @@ class ReservaController:
         
         if not quadra.ativa:
             flash('Esta quadra não está disponível para reservas!', 'danger')
-            return redirect(url_for('listar_quadras'))
+            return redirect(url_for('quadras.listar'))
         
         # Data escolhida ou hoje
-        data_escolhida = request.form.get('data', date.today().isoformat())
+        data_escolhida = request.values.get('data', date.today().isoformat())
         try:
             data_obj = datetime.strptime(data_escolhida, '%Y-%m-%d').date()
         except:
@@ -34,26 +47,16 @@ class ReservaController:
             flash('Reservas limitadas aos próximos 30 dias!', 'danger')
             data_obj = data_limite
         
-        # Gerar horários disponíveis (6h às 23h)
-        horarios_possiveis = []
-        for hora in range(6, 23):
-            horario_str = f'{hora:02d}:00'
-            horarios_possiveis.append(horario_str)
-        
-        # Buscar reservas ativas e canceladas neste dia
-        reservas_neste_dia = Reserva.query.filter_by(
-            quadra_id=quadra.id,
-            data=data_obj
-        ).all()
-        
-        # Horários já reservados (ativas)
-        horarios_reservados = set()
-        for reserva in reservas_neste_dia:
-            if reserva.status == 'ativa':
-                horarios_reservados.add(reserva.hora_inicio.strftime('%H:%M'))
-        
-        # Horários disponíveis
-        horarios_disponiveis = [h for h in horarios_possiveis if h not in horarios_reservados]
+        # Horários ocupados vêm do índice de ocupação (uma leitura por chave primária)
+        mascara = mascara_ocupacao(quadra.id, data_obj)
+        horarios_dict = [
+            {
+                'horario': rotulo,
+                'disponivel': horario_livre(mascara, hora)
+            }
+            for hora, rotulo in ROTULOS_HORARIOS
+        ]
+        horarios_disponiveis = [h['horario'] for h in horarios_dict if h['disponivel']]
         
         # Processar formulário POST
         if request.method == 'POST' and request.form.get('hora'):
@@ -62,51 +65,33 @@ class ReservaController:
             # Validar horário
             if hora_str not in horarios_disponiveis:
                 flash('Este horário não está mais disponível!', 'danger')
-                return redirect(url_for('reservar_quadra', quadra_id=quadra_id))
+                return redirect(url_for('reservas.reservar', quadra_id=quadra_id))
             
             try:
                 hora_inicio = datetime.strptime(hora_str, '%H:%M').time()
                 hora_fim = (datetime.combine(date.today(), hora_inicio) + timedelta(hours=1)).time()
+                nome_quadra = quadra.nome
                 
-                # Verificar conflito novamente
-                conflito = Reserva.query.filter(
-                    Reserva.quadra_id == quadra.id,
-                    Reserva.data == data_obj,
-                    Reserva.hora_inicio == hora_inicio,
-                    Reserva.status == 'ativa'
-                ).first()
-                
-                if conflito:
-                    flash('Este horário foi reservado por outro usuário! Tente outro.', 'warning')
-                    return redirect(url_for('reservar_quadra', quadra_id=quadra_id))
-                
-                # Criar nova reserva
-                nova_reserva = Reserva(
+                # Inserção condicional: o índice único parcial impede reserva dupla
+                reserva_id = reservar_horario(
                     quadra_id=quadra.id,
                     usuario_id=current_user.id,
                     data=data_obj,
                     hora_inicio=hora_inicio,
-                    hora_fim=hora_fim,
-                    status='ativa'
+                    hora_fim=hora_fim
                 )
-                db.session.add(nova_reserva)
-                db.session.commit()
                 
-                flash(f'Reserva realizada com sucesso! Quadra: {quadra.nome}, Data: {data_obj.strftime("%d/%m/%Y")}, Horário: {hora_str}', 'success')
-                return redirect(url_for('minhas_reservas'))
+                if reserva_id is None:
+                    flash('Este horário foi reservado por outro usuário! Tente outro.', 'warning')
+                    return redirect(url_for('reservas.reservar', quadra_id=quadra_id))
+                
+                flash(f'Reserva realizada com sucesso! Quadra: {nome_quadra}, Data: {data_obj.strftime("%d/%m/%Y")}, Horário: {hora_str}', 'success')
+                return redirect(url_for('reservas.minhas_reservas'))
             
             except Exception as e:
+                db.session.rollback()
                 flash(f'Erro ao realizar reserva: {str(e)}', 'danger')
-                return redirect(url_for('reservar_quadra', quadra_id=quadra_id))
-        
-        # Preparar dados para template
-        horarios_dict = [
-            {
-                'horario': h,
-                'disponivel': h in horarios_disponiveis
-            }
-            for h in horarios_possiveis
-        ]
+                return redirect(url_for('reservas.reservar', quadra_id=quadra_id))
         
         # Calcular data máxima (30 dias a partir de hoje)
         data_maxima = (date.today() + timedelta(days=30)).isoformat()
@@ -118,15 +103,168 @@ class ReservaController:
                              horarios=horarios_dict,
                              horarios_disponiveis=horarios_disponiveis)
     
+    @staticmethod
+    @login_required
+    def reservar_serie(quadra_id):
+        """Reserva o mesmo horário toda semana, por um número de semanas ou até uma data"""
+        quadra = Quadra.query.get_or_404(quadra_id)
+        
+        if not quadra.ativa:
+            flash('Esta quadra não está disponível para reservas!', 'danger')
+            return redirect(url_for('quadras.listar'))
+        
+        horizonte = current_app.config['SERIES_HORIZONTE_DIAS']
+        data_maxima = date.today() + timedelta(days=horizonte)
+        
+        if request.method == 'POST':
+            try:
+                dia_semana = int(request.form.get('dia_semana', ''))
+                hora_inicio = datetime.strptime(request.form.get('hora', ''), '%H:%M').time()
+                data_inicio = datetime.strptime(request.form.get('data_inicio', ''), '%Y-%m-%d').date()
+                if request.form.get('data_fim'):
+                    data_fim = datetime.strptime(request.form['data_fim'], '%Y-%m-%d').date()
+                else:
+                    # Mais semanas que o horizonte seriam cortadas de qualquer forma
+                    semanas = min(int(request.form.get('semanas', '')), horizonte // 7 + 1)
+                    if semanas < 1:
+                        raise ValueError('semanas')
+                    data_fim = data_inicio + timedelta(weeks=semanas, days=-1)
+            except (ValueError, OverflowError):
+                flash('Informe o dia da semana, o horário, a data de início e as semanas ou a data final!', 'danger')
+                return redirect(url_for('reservas.reservar_serie', quadra_id=quadra_id))
+            
+            if dia_semana not in range(7) or hora_inicio.hour not in HORAS_FUNCIONAMENTO or hora_inicio.minute:
+                flash('Dia da semana ou horário inválido!', 'danger')
+                return redirect(url_for('reservas.reservar_serie', quadra_id=quadra_id))
+            
+            if data_inicio < date.today():
+                flash('Não é possível reservar datas passadas!', 'danger')
+                return redirect(url_for('reservas.reservar_serie', quadra_id=quadra_id))
+            
+            if data_inicio > data_maxima:
+                flash(f'A série precisa começar até {data_maxima.strftime("%d/%m/%Y")} (próximos {horizonte} dias)!', 'danger')
+                return redirect(url_for('reservas.reservar_serie', quadra_id=quadra_id))
+            
+            if data_fim > data_maxima:
+                flash(f'Séries limitadas aos próximos {horizonte} dias; a série vai até {data_maxima.strftime("%d/%m/%Y")}.', 'warning')
+                data_fim = data_maxima
+            
+            nome_quadra = quadra.nome
+            hora_fim = (datetime.combine(date.today(), hora_inicio) + timedelta(hours=1)).time()
+            serie_id, reservadas, conflitos = reservar_serie(
+                quadra_id=quadra.id,
+                usuario_id=current_user.id,
+                dia_semana=dia_semana,
+                hora_inicio=hora_inicio,
+                hora_fim=hora_fim,
+                data_inicio=data_inicio,
+                data_fim=data_fim
+            )
+            
+            if serie_id is None:
+                if conflitos:
+                    flash('Este horário já está ocupado em todas as datas escolhidas!', 'danger')
+                else:
+                    flash('Nenhuma data entre o início e o fim cai nesse dia da semana!', 'danger')
+                return redirect(url_for('reservas.reservar_serie', quadra_id=quadra_id))
+            
+            flash(f'Série criada! Quadra: {nome_quadra}, toda {DIAS_SEMANA[dia_semana]} às {hora_inicio.strftime("%H:%M")}: '
+                  f'{len(reservadas)} reserva(s) de {reservadas[0].strftime("%d/%m/%Y")} a {reservadas[-1].strftime("%d/%m/%Y")}', 'success')
+            if conflitos:
+                datas = ', '.join(d.strftime('%d/%m/%Y') for d in conflitos)
+                flash(f'Horário já ocupado (não reservado) em: {datas}', 'warning')
+            return redirect(url_for('reservas.minhas_reservas'))
+        
+        return render_template('reservas/reservar_serie.html',
+                             quadra=quadra,
+                             dias_semana=DIAS_SEMANA,
+                             horarios=ROTULOS_HORARIOS,
+                             hoje=date.today().isoformat(),
+                             data_maxima=data_maxima.isoformat(),
+                             horizonte=horizonte)
+    
+    @staticmethod
+    def disponibilidade():
+        """Matriz de horários ocupados (JSON) de várias quadras num período.
+
+        Parâmetros: `quadras` (ids separados por vírgula) e/ou `tipo`, `inicio`
+        (padrão hoje) e `fim` ou `dias` (padrão 7). A ETag vem das versões dos dias
+        pedidos no índice de ocupação, lida antes de montar a matriz: a revalidação
+        responde 304 sem montá-la, e o corpo montado fica em cache por ETag.
+        """
+        max_dias = current_app.config['DISPONIBILIDADE_MAX_DIAS']
+        max_quadras = current_app.config['DISPONIBILIDADE_MAX_QUADRAS']
+        try:
+            quadra_ids = [int(i) for i in request.args.get('quadras', '').split(',') if i.strip()]
+            inicio = datetime.strptime(request.args.get('inicio', date.today().isoformat()), '%Y-%m-%d').date()
+            if request.args.get('fim'):
+                dias = (datetime.strptime(request.args['fim'], '%Y-%m-%d').date() - inicio).days + 1
+            else:
+                dias = int(request.args.get('dias', 7))
+        except ValueError:
+            return jsonify({'erro': 'Parâmetros inválidos: use quadras=1,2, inicio/fim no formato AAAA-MM-DD ou dias=N'}), 400
+        
+        if not 1 <= dias <= max_dias:
+            return jsonify({'erro': f'O período deve ter de 1 a {max_dias} dias'}), 400
+        if len(quadra_ids) > max_quadras:
+            return jsonify({'erro': f'No máximo {max_quadras} quadras por consulta'}), 400
+        
+        filtros = {'quadra_ids': quadra_ids, 'tipo': request.args.get('tipo'), 'max_quadras': max_quadras}
+        etag = 'disp-' + versao_disponibilidade(inicio, dias, **filtros)
+        
+        if request.if_none_match.contains(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            corpo = corpo_disponibilidade(etag, lambda: jsonify({
+                'inicio': inicio.isoformat(),
+                'dias': dias,
+                'horas': [HORAS_FUNCIONAMENTO.start, HORAS_FUNCIONAMENTO.stop - 1],
+                'quadras': disponibilidade_quadras(inicio, dias, **filtros),
+            }).get_data())
+            resposta = current_app.response_class(corpo, mimetype='application/json')
+        resposta.set_etag(etag)
+        resposta.cache_control.public = True
+        resposta.cache_control.no_cache = True
+        return resposta.make_conditional(request)
+    
     @staticmethod
     @login_required
     def minhas_reservas():
-        """Lista todas as reservas do usuário atual"""
-        reservas = Reserva.query.filter_by(
-            usuario_id=current_user.id
-        ).order_by(Reserva.data.desc(), Reserva.hora_inicio.desc()).all()
+        """Lista as reservas do usuário atual, paginadas por cursor (com ?historico=1,
+        inclui as arquivadas)"""
+        modelo, ordem, historico = fonte_das_reservas()
+        query = modelo.query.filter_by(usuario_id=current_user.id)
+        pagina = paginar(query.options(joinedload(modelo.quadra)), ordem)
+        
+        return render_template('reservas/minhas_reservas.html', reservas=pagina.itens, pagina=pagina,
+                               historico=historico)
+    
+    @staticmethod
+    @login_required
+    def exportar_reservas_usuario(usuario_id=None):
+        """Reservas do usuário atual (ou, para o admin, de qualquer usuário) em CSV ou NDJSON, em streaming"""
+        if usuario_id is None:
+            usuario_id = current_user.id
+        elif not current_user.is_admin():
+            flash('Acesso negado!', 'danger')
+            return redirect(url_for('principal.index'))
+        else:
+            db.get_or_404(Usuario, usuario_id)
+        
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            flash('Formato de exportação inválido!', 'danger')
+            return redirect(url_for('reservas.minhas_reservas'))
         
-        return render_template('reservas/minhas_reservas.html', reservas=reservas)
+        modelo, ordem, _ = fonte_das_reservas()
+        consulta = (
+            select(modelo.id, modelo.data, modelo.hora_inicio, modelo.hora_fim, modelo.status,
+                   Quadra.nome.label('quadra'), Quadra.endereco, modelo.serie_id, modelo.criado_em)
+            .join(Quadra, Quadra.id == modelo.quadra_id)
+            .where(modelo.usuario_id == usuario_id)
+            .order_by(*[coluna.desc() for coluna in ordem])
+        )
+        return resposta_exportacao(consulta, f'reservas_usuario_{usuario_id}_{date.today().isoformat()}', formato)
     
     @staticmethod
     @login_required
@@ -136,18 +274,35 @@ class ReservaController:
         
         if reserva.usuario_id != current_user.id:
             flash('Você não tem permissão para cancelar esta reserva!', 'danger')
-            return redirect(url_for('minhas_reservas'))
+            return redirect(url_for('reservas.minhas_reservas'))
         
         if reserva.status == 'cancelada':
             flash('Esta reserva já foi cancelada!', 'warning')
-            return redirect(url_for('minhas_reservas'))
+            return redirect(url_for('reservas.minhas_reservas'))
         
         # Só pode cancelar reservas futuras
         if reserva.data < date.today():
             flash('Não é possível cancelar reservas passadas!', 'danger')
-            return redirect(url_for('minhas_reservas'))
+            return redirect(url_for('reservas.minhas_reservas'))
         
-        reserva.status = 'cancelada'
-        db.session.commit()
+        registrar_cancelamento(reserva)
         flash('Reserva cancelada com sucesso!', 'success')
-        return redirect(url_for('minhas_reservas'))
+        return redirect(url_for('reservas.minhas_reservas'))
+    
+    @staticmethod
+    @login_required
+    def cancelar_serie(serie_id):
+        """Cancela, de uma vez, as reservas futuras de uma série do usuário"""
+        serie = SerieReserva.query.get_or_404(serie_id)
+        
+        if serie.usuario_id != current_user.id:
+            flash('Você não tem permissão para cancelar esta série!', 'danger')
+            return redirect(url_for('reservas.minhas_reservas'))
+        
+        if serie.status == 'cancelada':
+            flash('Esta série já foi cancelada!', 'warning')
+            return redirect(url_for('reservas.minhas_reservas'))
+        
+        canceladas = cancelar_serie(serie)
+        flash(f'Série cancelada! {canceladas} reserva(s) futura(s) cancelada(s).', 'success')
+        return redirect(url_for('reservas.minhas_reservas'))
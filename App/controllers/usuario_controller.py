@@ -1,8 +1,19 @@
-from flask import render_template, redirect, url_for, flash, request, current_app
+import io
+from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from flask_mail import Message
-from models import db, bcrypt  # ← Importar daqui
+from sqlalchemy import select
+from models import db  # ← Importar daqui
 from models.usuario_model import Usuario
+from services.paginacao import paginar
+from services.exportacao import resposta_exportacao, FORMATOS_EXPORTACAO
+from services.importacao import importar, formato_do_arquivo, TIPOS_IMPORTACAO
+from services.busca import filtro_busca_usuarios, sugerir_usuarios
+from services.emails import enfileirar_email, profundidade_fila
+from services.throttle import throttle_login
+from services.sessao import invalidar_usuario, estatisticas_cache_usuarios
+from services.catalogo import invalidar_catalogo, estatisticas_cache_catalogo
+from services.templates_cache import estatisticas_cache_fragmentos
+from services.armazenamento import estatisticas_fila_escrita
 from itsdangerous import URLSafeTimedSerializer
 from datetime import datetime, timedelta
 
@@ -19,22 +30,20 @@ def validar_token(token, tempo_expiracao=3600):
         return None
 
 def enviar_email_reset(email, token):
-    from app import mail
-    link = url_for('resetar_senha', token=token, _external=True)
-    msg = Message(
+    # Só entra na fila de saída; quem fala com o servidor SMTP é o worker
+    link = url_for('usuarios.resetar_senha', token=token, _external=True)
+    enfileirar_email(
+        email,
         "Redefinir sua senha - ReserGol",
-        sender=current_app.config['MAIL_USERNAME'],
-        recipients=[email]
+        f"Para redefinir sua senha, acesse: {link}"
     )
-    msg.body = f"Para redefinir sua senha, acesse: {link}"
-    mail.send(msg)
 
 class UsuarioController:
     
     @staticmethod
     def registro():
         if current_user.is_authenticated:
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         if request.method == 'POST':
             nome = request.form.get('nome')
@@ -44,39 +53,54 @@ class UsuarioController:
             
             if not nome or not email or not senha or not confirmar_senha:
                 flash('Todos os campos são obrigatórios!', 'danger')
-                return redirect(url_for('registro'))
+                return redirect(url_for('usuarios.registro'))
             
             if senha != confirmar_senha:
                 flash('As senhas não coincidem!', 'danger')
-                return redirect(url_for('registro'))
+                return redirect(url_for('usuarios.registro'))
+            
+            # O hash vem antes da consulta, que já abre a transação de escrita
+            novo_usuario = Usuario(nome=nome, email=email)
+            novo_usuario.definir_senha(senha)
             
             if Usuario.query.filter_by(email=email).first():
                 flash('Este email já está cadastrado!', 'danger')
-                return redirect(url_for('registro'))
+                return redirect(url_for('usuarios.registro'))
             
-            senha_hash = bcrypt.generate_password_hash(senha).decode('utf-8')
-            novo_usuario = Usuario(nome=nome, email=email, senha_hash=senha_hash)
             db.session.add(novo_usuario)
             db.session.commit()
             
             flash('Registro realizado com sucesso! Faça login.', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('usuarios.login'))
         
         return render_template('registro.html')
     
     @staticmethod
     def login():
         if current_user.is_authenticated:
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         if request.method == 'POST':
             email = request.form.get('email')
             senha = request.form.get('senha')
             lembrar = request.form.get('lembrar')
             
-            usuario = Usuario.query.filter_by(email=email).first()
+            ip = request.remote_addr
+            throttle_login.limpar_expirados()
+            
+            # Barrado pelo IP ou por falhas demais no email digitado, antes de ir ao banco
+            bloqueado_ate = throttle_login.bloqueado_ate(email, ip)
+            if bloqueado_ate:
+                tempo_restante = (bloqueado_ate - datetime.utcnow()).total_seconds() / 60
+                flash(f'Muitas tentativas de login. Tente novamente em {int(tempo_restante) + 1} minutos.', 'danger')
+                return render_template('login.html'), 429
+            
+            # Lida pelo pool de leitura: o bcrypt abaixo não segura a fila de escrita, e o
+            # que o login grava (contador, bloqueio, novo hash) não depende desta leitura
+            usuario = Usuario.query.filter_by(email=email).execution_options(pool_leitura=True).first()
             
             if not usuario:
+                throttle_login.registrar_falha(email, ip)
                 flash('Email ou senha incorretos!', 'danger')
                 return render_template('login.html')
             
@@ -86,20 +110,18 @@ class UsuarioController:
                 return render_template('login.html')
             
             if not usuario.check_password(senha):
-                usuario.tentativas_login += 1
-                if usuario.tentativas_login >= 5:
-                    usuario.bloqueado_ate = datetime.utcnow() + timedelta(hours=24)
-                db.session.commit()
+                throttle_login.registrar_falha(email, ip, usuario)
                 flash('Email ou senha incorretos!', 'danger')
                 return render_template('login.html')
             
-            usuario.tentativas_login = 0
-            usuario.bloqueado_ate = None
-            db.session.commit()
+            # Só grava se havia bloqueio/contador a zerar ou se o hash da senha foi refeito
+            if throttle_login.registrar_sucesso(usuario) or db.session.is_modified(usuario):
+                db.session.commit()
+                invalidar_usuario(usuario.id)
             
             login_user(usuario, remember=bool(lembrar))
             flash(f'Bem-vindo, {usuario.nome}!', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         return render_template('login.html')
     
@@ -107,7 +129,7 @@ class UsuarioController:
     def logout():
         logout_user()
         flash('Você saiu da sua conta.', 'success')
-        return redirect(url_for('index'))
+        return redirect(url_for('principal.index'))
     
     @staticmethod
     @login_required
@@ -126,34 +148,41 @@ class UsuarioController:
             
             if not nome or not email:
                 flash('Nome e email são obrigatórios!', 'danger')
-                return redirect(url_for('editar_perfil'))
+                return redirect(url_for('usuarios.editar_perfil'))
             
             usuario_existe = Usuario.query.filter_by(email=email).first()
             if usuario_existe and usuario_existe.id != current_user.id:
                 flash('Este email já está em uso!', 'danger')
-                return redirect(url_for('editar_perfil'))
+                return redirect(url_for('usuarios.editar_perfil'))
+            
+            # current_user vem do cache da sessão; a alteração é feita no registro do banco
+            usuario = usuario_existe if usuario_existe else Usuario.query.get(current_user.id)
             
             if senha_atual or nova_senha or confirmar_nova_senha:
                 if not senha_atual or not nova_senha or not confirmar_nova_senha:
                     flash('Preencha todos os campos de senha!', 'danger')
-                    return redirect(url_for('editar_perfil'))
+                    return redirect(url_for('usuarios.editar_perfil'))
                 
-                if not current_user.check_password(senha_atual):
+                if not usuario.check_password(senha_atual):
                     flash('Senha atual incorreta!', 'danger')
-                    return redirect(url_for('editar_perfil'))
+                    return redirect(url_for('usuarios.editar_perfil'))
                 
                 if nova_senha != confirmar_nova_senha:
                     flash('As novas senhas não coincidem!', 'danger')
-                    return redirect(url_for('editar_perfil'))
+                    return redirect(url_for('usuarios.editar_perfil'))
                 
-                current_user.senha_hash = bcrypt.generate_password_hash(nova_senha).decode('utf-8')
+                usuario.definir_senha(nova_senha)
             
-            current_user.nome = nome
-            current_user.email = email
+            nome_alterado = usuario.nome != nome
+            usuario.nome = nome
+            usuario.email = email
             db.session.commit()
+            invalidar_usuario(usuario.id)
+            if nome_alterado and usuario.is_dono_quadra():
+                invalidar_catalogo()  # o catálogo mostra o nome do dono
             
             flash('Perfil atualizado com sucesso!', 'success')
-            return redirect(url_for('perfil'))
+            return redirect(url_for('usuarios.perfil'))
         
         return render_template('editar_perfil.html')
     
@@ -168,7 +197,7 @@ class UsuarioController:
                 enviar_email_reset(email, token)
             
             flash('Se o email existir, você receberá um link para redefinir sua senha.', 'info')
-            return redirect(url_for('login'))
+            return redirect(url_for('usuarios.login'))
         
         return render_template('esqueci_senha.html')
     
@@ -178,7 +207,7 @@ class UsuarioController:
         
         if not email:
             flash('Link inválido ou expirado!', 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('usuarios.login'))
         
         if request.method == 'POST':
             nova_senha = request.form.get('senha')
@@ -186,18 +215,19 @@ class UsuarioController:
             
             if not nova_senha or not confirmar_senha:
                 flash('Preencha todos os campos!', 'danger')
-                return redirect(url_for('resetar_senha', token=token))
+                return redirect(url_for('usuarios.resetar_senha', token=token))
             
             if nova_senha != confirmar_senha:
                 flash('As senhas não coincidem!', 'danger')
-                return redirect(url_for('resetar_senha', token=token))
+                return redirect(url_for('usuarios.resetar_senha', token=token))
             
-            usuario = Usuario.query.filter_by(email=email).first()
-            usuario.senha_hash = bcrypt.generate_password_hash(nova_senha).decode('utf-8')
+            # Só o id e o novo hash são gravados; o bcrypt fica fora da fila de escrita
+            usuario = Usuario.query.filter_by(email=email).execution_options(pool_leitura=True).first()
+            usuario.definir_senha(nova_senha)
             db.session.commit()
             
             flash('Senha redefinida com sucesso! Faça login.', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('usuarios.login'))
         
         return render_template('resetar_senha.html')
     
@@ -208,25 +238,104 @@ class UsuarioController:
     def admin_listar_usuarios():
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         busca = request.args.get('busca', '')
-        if busca:
-            usuarios = Usuario.query.filter(
-                (Usuario.nome.ilike(f'%{busca}%')) | 
-                (Usuario.email.ilike(f'%{busca}%'))
-            ).all()
-        else:
-            usuarios = Usuario.query.all()
-        
-        return render_template('admin_usuarios.html', usuarios=usuarios, busca=busca)
+        query = Usuario.query
+        condicao = filtro_busca_usuarios(busca) if busca else None
+        if condicao is not None:
+            query = query.filter(condicao)
+        pagina = paginar(query, [Usuario.id], descendente=False)
+        
+        return render_template('admin_usuarios.html', usuarios=pagina.itens, pagina=pagina, busca=busca)
+    
+    @staticmethod
+    @login_required
+    def admin_exportar_usuarios():
+        """Lista de usuários (com a busca da listagem) em CSV ou NDJSON, em streaming"""
+        if not current_user.is_admin():
+            flash('Acesso negado!', 'danger')
+            return redirect(url_for('principal.index'))
+        
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            flash('Formato de exportação inválido!', 'danger')
+            return redirect(url_for('admin.usuarios'))
+        
+        consulta = select(Usuario.id, Usuario.nome, Usuario.email, Usuario.role, Usuario.criado_em,
+                          Usuario.bloqueado_ate).order_by(Usuario.id)
+        busca = request.args.get('busca', '')
+        condicao = filtro_busca_usuarios(busca) if busca else None
+        if condicao is not None:
+            consulta = consulta.where(condicao)
+        return resposta_exportacao(consulta, f'usuarios_{datetime.now().date().isoformat()}', formato)
+    
+    @staticmethod
+    @login_required
+    def admin_importar():
+        """Importação em lote de usuários, quadras ou reservas a partir de um arquivo
+        CSV ou JSON Lines; mostra quantos registros entraram e os erros por linha"""
+        if not current_user.is_admin():
+            flash('Acesso negado!', 'danger')
+            return redirect(url_for('principal.index'))
+        
+        relatorio = None
+        if request.method == 'POST':
+            tipo = request.form.get('tipo')
+            arquivo = request.files.get('arquivo')
+            if tipo not in TIPOS_IMPORTACAO or not arquivo or not arquivo.filename:
+                flash('Escolha o tipo e o arquivo a importar!', 'danger')
+                return redirect(url_for('admin.importar'))
+            
+            entrada = io.TextIOWrapper(arquivo.stream, encoding='utf-8-sig', newline='')
+            relatorio = importar(tipo, entrada, formato_do_arquivo(arquivo.filename))
+            if tipo == 'quadras' and relatorio.importadas:
+                invalidar_catalogo()
+            flash(f'{relatorio.importadas} de {relatorio.lidas} registro(s) importado(s).',
+                  'success' if not relatorio.erros else 'warning')
+        
+        return render_template('admin/importar.html', relatorio=relatorio, tipos=TIPOS_IMPORTACAO,
+                               erros_exibidos=sorted(relatorio.erros)[:200] if relatorio else [])
+    
+    @staticmethod
+    @login_required
+    def admin_sugerir_usuarios():
+        """Sugestões da busca de usuários (autocompletar), por relevância"""
+        if not current_user.is_admin():
+            return jsonify({'erro': 'Acesso negado!'}), 403
+        
+        return jsonify(sugerir_usuarios(request.args.get('q', '')))
+    
+    @staticmethod
+    @login_required
+    def admin_fila_emails():
+        """Profundidade da fila de emails, para monitoramento"""
+        if not current_user.is_admin():
+            return jsonify({'erro': 'Acesso negado!'}), 403
+        
+        return jsonify(profundidade_fila())
+    
+    @staticmethod
+    @login_required
+    def admin_metricas():
+        """Contadores do processo (cache de usuários) e fila de emails, em JSON"""
+        if not current_user.is_admin():
+            return jsonify({'erro': 'Acesso negado!'}), 403
+        
+        return jsonify({
+            'cache_usuarios': estatisticas_cache_usuarios(),
+            'cache_catalogo': estatisticas_cache_catalogo(),
+            'cache_fragmentos': estatisticas_cache_fragmentos(),
+            'fila_escrita': estatisticas_fila_escrita(),
+            'fila_emails': profundidade_fila(),
+        })
     
     @staticmethod
     @login_required
     def admin_editar_usuario(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         
@@ -237,21 +346,26 @@ class UsuarioController:
             
             if not nome or not email:
                 flash('Nome e email são obrigatórios!', 'danger')
-                return redirect(url_for('admin_editar_usuario', usuario_id=usuario_id))
+                return redirect(url_for('admin.editar_usuario', usuario_id=usuario_id))
             
             usuario_existe = Usuario.query.filter_by(email=email).first()
             if usuario_existe and usuario_existe.id != usuario.id:
                 flash('Este email já está em uso!', 'danger')
-                return redirect(url_for('admin_editar_usuario', usuario_id=usuario_id))
+                return redirect(url_for('admin.editar_usuario', usuario_id=usuario_id))
             
+            # O catálogo mostra o nome do dono; decidido antes do commit, que expira o usuário
+            muda_catalogo = usuario.nome != nome and bool(usuario.quadras)
             usuario.nome = nome
             usuario.email = email
             if usuario.id != current_user.id:
                 usuario.role = role
             
             db.session.commit()
+            invalidar_usuario(usuario_id)
+            if muda_catalogo:
+                invalidar_catalogo()
             flash('Usuário atualizado com sucesso!', 'success')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         return render_template('admin_editar_usuario.html', usuario=usuario)
     
@@ -260,100 +374,109 @@ class UsuarioController:
     def promover_para_dono(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         
         if usuario.role == 'admin':
             flash('Não é possível alterar o role de um administrador!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         usuario.role = 'dono_quadra'
         db.session.commit()
+        invalidar_usuario(usuario.id)
         flash(f'{usuario.nome} foi promovido para Dono de Quadra!', 'success')
-        return redirect(url_for('admin_usuarios'))
+        return redirect(url_for('admin.usuarios'))
     
     @staticmethod
     @login_required
     def rebaixar_para_usuario(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         
         if usuario.role == 'admin':
             flash('Não é possível alterar o role de um administrador!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         usuario.role = 'usuario'
         db.session.commit()
+        invalidar_usuario(usuario.id)
         flash(f'{usuario.nome} foi rebaixado para Usuário Comum!', 'success')
-        return redirect(url_for('admin_usuarios'))
+        return redirect(url_for('admin.usuarios'))
     
     @staticmethod
     @login_required
     def admin_remover_usuario(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         
         if usuario.id == current_user.id:
             flash('Você não pode remover sua própria conta!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         if usuario.role == 'admin':
             flash('Não é possível remover outro administrador!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         nome = usuario.nome
+        tinha_quadras = bool(usuario.quadras)
         db.session.delete(usuario)
         db.session.commit()
+        invalidar_usuario(usuario_id)
+        if tinha_quadras:
+            invalidar_catalogo()
         
         flash(f'Usuário {nome} foi removido com sucesso!', 'success')
-        return redirect(url_for('admin_usuarios'))
+        return redirect(url_for('admin.usuarios'))
     
     @staticmethod
     @login_required
     def admin_desbloquear_usuario(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         usuario.tentativas_login = 0
         usuario.bloqueado_ate = None
         db.session.commit()
+        invalidar_usuario(usuario.id)
+        throttle_login.desbloquear_conta(usuario.email)
         
         flash(f'{usuario.nome} foi desbloqueado!', 'success')
-        return redirect(url_for('admin_usuarios'))
+        return redirect(url_for('admin.usuarios'))
     
     @staticmethod
     @login_required
     def admin_bloquear_usuario(usuario_id):
         if not current_user.is_admin():
             flash('Acesso negado!', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('principal.index'))
         
         usuario = Usuario.query.get_or_404(usuario_id)
         
         if usuario.id == current_user.id:
             flash('Você não pode bloquear sua própria conta!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         if usuario.role == 'admin':
             flash('Não é possível bloquear outro administrador!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         if usuario.esta_bloqueado():
             flash(f'{usuario.nome} já está bloqueado!', 'warning')
-            return redirect(url_for('admin_usuarios'))
+            return redirect(url_for('admin.usuarios'))
         
         usuario.bloqueado_ate = datetime.utcnow() + timedelta(hours=24)
         usuario.tentativas_login = 5
         db.session.commit()
+        invalidar_usuario(usuario.id)
         
         flash(f'{usuario.nome} foi bloqueado por 24 horas!', 'success')
-        return redirect(url_for('admin_usuarios'))
+        return redirect(url_for('admin.usuarios'))
@@ -0,0 +1,13 @@
+from models import db
+
+
+class BloqueioLogin(db.Model):
+    """Bloqueio de login por IP ou email, compartilhado entre processos (opcional)"""
+    __tablename__ = 'bloqueios_login'
+    
+    # 'ip:<endereço>' ou 'conta:<email>'
+    chave = db.Column(db.String(255), primary_key=True)
+    bloqueado_ate = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<BloqueioLogin {self.chave} até {self.bloqueado_ate}>'
@@ -0,0 +1,26 @@
+from models import db, datetime
+
+
+class EmailPendente(db.Model):
+    """Email na fila de saída (outbox), enviado pelo worker fora da requisição"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_proxima', 'status', 'proxima_tentativa_em'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(120), nullable=False)
+    assunto = db.Column(db.String(255), nullable=False)
+    corpo = db.Column(db.Text, nullable=False)
+    
+    # pendente -> enviado, ou falhou (dead letter) após erro permanente ou excesso de tentativas
+    status = db.Column(db.String(20), default='pendente', nullable=False)
+    tentativas = db.Column(db.Integer, default=0, nullable=False)
+    proxima_tentativa_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    enviado_em = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<EmailPendente {self.id} - {self.destinatario}>'
@@ -0,0 +1,23 @@
+from models import db
+
+# Horários de funcionamento das quadras (6h às 22h, reservas de 1 hora)
+HORAS_FUNCIONAMENTO = range(6, 23)
+
+
+class OcupacaoDiaria(db.Model):
+    """Índice de ocupação: um bit por hora reservada de cada quadra em cada dia"""
+    __tablename__ = 'ocupacao_diaria'
+    
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    mascara = db.Column(db.Integer, nullable=False, default=0)
+    # Sobe a cada mudança da máscara (trigger da migração 13); é o validador da disponibilidade
+    versao = db.Column(db.Integer, nullable=False, server_default='0')
+    
+    @staticmethod
+    def bit(hora):
+        """Bit que representa a hora na máscara"""
+        return 1 << hora
+    
+    def __repr__(self):
+        return f'<OcupacaoDiaria {self.quadra_id} - {self.data}>'
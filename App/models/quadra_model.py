@@ -1,7 +1,15 @@
 from models import db, datetime
 
+# Tipos oferecidos nos formulários de quadra
+TIPOS_QUADRA = ('futebol', 'futsal', 'society', 'tenis', 'basquete', 'volei', 'beach_tennis')
+
 class Quadra(db.Model):
     __tablename__ = 'quadras'
+    __table_args__ = (
+        # Busca do catálogo: filtra por tipo (ou só por ativa) e já lê na ordem de preço
+        db.Index('ix_quadras_tipo_ativa_preco', 'tipo', 'ativa', 'preco_hora'),
+        db.Index('ix_quadras_ativa_preco', 'ativa', 'preco_hora'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(120), nullable=False)
@@ -9,13 +17,25 @@ class Quadra(db.Model):
     tipo = db.Column(db.String(50), nullable=False)
     descricao = db.Column(db.Text, nullable=True)
     preco_hora = db.Column(db.Float, nullable=False)
-    ativa = db.Column(db.Boolean, default=True)
+    ativa = db.Column(db.Boolean, default=True, index=True)
+    
+    # Localização (opcional); indexada no R*Tree quadras_rtree para a busca por distância
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
-    dono_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    # Muda a cada edição; é a versão do cartão da quadra no cache de fragmentos
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    dono_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, index=True)
     
     # Relacionamento - usar string para evitar referência circular
     reservas = db.relationship('Reserva', backref='quadra', lazy=True, cascade='all, delete-orphan')
+    reservas_arquivadas = db.relationship('ReservaArquivo', lazy=True, cascade='all, delete-orphan')
+    ocupacao = db.relationship('OcupacaoDiaria', lazy=True, cascade='all, delete-orphan')
+    series = db.relationship('SerieReserva', lazy=True, cascade='all, delete-orphan')
+    resumos_diarios = db.relationship('ResumoDiario', lazy=True, cascade='all, delete-orphan')
+    resumos_mensais = db.relationship('ResumoMensal', lazy=True, cascade='all, delete-orphan')
+    resumos_horarios = db.relationship('ResumoHorario', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Quadra {self.nome}>'
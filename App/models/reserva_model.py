@@ -1,11 +1,23 @@
+from sqlalchemy import MetaData
 from models import db, datetime
 
 class Reserva(db.Model):
     __tablename__ = 'reservas'
+    __table_args__ = (
+        # No máximo uma reserva ativa por horário de cada quadra (garantido pelo banco)
+        db.Index('ux_reservas_horario_ativo', 'quadra_id', 'data', 'hora_inicio',
+                 unique=True, sqlite_where=db.text("status = 'ativa'")),
+        db.Index('ix_reservas_quadra_data_status', 'quadra_id', 'data', 'status'),
+        db.Index('ix_reservas_usuario_data_hora', 'usuario_id', 'data', 'hora_inicio'),
+        db.Index('ix_reservas_quadra_data_hora', 'quadra_id', 'data', 'hora_inicio'),
+        # Ids de reservas arquivadas não voltam a ser usados (migração 14)
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    serie_id = db.Column(db.Integer, db.ForeignKey('series_reserva.id'), nullable=True, index=True)
     
     data = db.Column(db.Date, nullable=False)
     hora_inicio = db.Column(db.Time, nullable=False)
@@ -17,3 +29,68 @@ class Reserva(db.Model):
     
     def __repr__(self):
         return f'<Reserva {self.id} - {self.data}>'
+
+
+# Ordem das listagens de reservas (mais recentes primeiro); o id desempata a paginação
+ORDEM_RESERVAS = [Reserva.data, Reserva.hora_inicio, Reserva.id]
+
+
+class ReservaArquivo(db.Model):
+    """Reservas antigas movidas de `reservas` pelo arquivamento (mesmo id e colunas).
+
+    Só servem ao histórico; o caminho de reserva nunca lê esta tabela.
+    """
+    __tablename__ = 'reservas_arquivo'
+    __table_args__ = (
+        db.Index('ix_reservas_arquivo_usuario_data_hora', 'usuario_id', 'data', 'hora_inicio'),
+        db.Index('ix_reservas_arquivo_quadra_data_hora', 'quadra_id', 'data', 'hora_inicio'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    serie_id = db.Column(db.Integer, db.ForeignKey('series_reserva.id'), nullable=True)
+    
+    data = db.Column(db.Date, nullable=False)
+    hora_inicio = db.Column(db.Time, nullable=False)
+    hora_fim = db.Column(db.Time, nullable=False)
+    status = db.Column(db.String(20))
+    
+    criado_em = db.Column(db.DateTime)
+    atualizado_em = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ReservaArquivo {self.id} - {self.data}>'
+
+
+class ReservaHistorico(db.Model):
+    """Somente leitura: a view `reservas_historico` (reservas + reservas_arquivo), usada
+    pelas listagens e exportações quando o usuário pede as reservas antigas.
+
+    A view é criada pela migração 11; a tabela fica fora do `db.metadata` para que o
+    `create_all` não a crie como tabela.
+    """
+    __table__ = db.Table(
+        'reservas_historico', MetaData(),
+        db.Column('id', db.Integer, primary_key=True),
+        db.Column('quadra_id', db.Integer),
+        db.Column('usuario_id', db.Integer),
+        db.Column('serie_id', db.Integer),
+        db.Column('data', db.Date),
+        db.Column('hora_inicio', db.Time),
+        db.Column('hora_fim', db.Time),
+        db.Column('status', db.String(20)),
+        db.Column('criado_em', db.DateTime),
+        db.Column('atualizado_em', db.DateTime),
+        db.Column('arquivada', db.Boolean),
+    )
+    
+    quadra = db.relationship('Quadra', primaryjoin='foreign(ReservaHistorico.quadra_id) == Quadra.id', viewonly=True)
+    usuario = db.relationship('Usuario', primaryjoin='foreign(ReservaHistorico.usuario_id) == Usuario.id',
+                              viewonly=True)
+    
+    def __repr__(self):
+        return f'<ReservaHistorico {self.id} - {self.data}>'
+
+
+ORDEM_HISTORICO = [ReservaHistorico.data, ReservaHistorico.hora_inicio, ReservaHistorico.id]
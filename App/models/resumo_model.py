@@ -0,0 +1,40 @@
+from models import db
+
+
+class ResumoDiario(db.Model):
+    """Resumo por quadra e dia da reserva: reservas ativas e canceladas"""
+    __tablename__ = 'resumo_diario'
+
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    reservas = db.Column(db.Integer, nullable=False, default=0)
+    canceladas = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumoDiario {self.quadra_id} - {self.data}>'
+
+
+class ResumoMensal(db.Model):
+    """Resumo por quadra e mês da reserva (`mes` é o primeiro dia do mês)"""
+    __tablename__ = 'resumo_mensal'
+
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), primary_key=True)
+    mes = db.Column(db.Date, primary_key=True)
+    reservas = db.Column(db.Integer, nullable=False, default=0)
+    canceladas = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumoMensal {self.quadra_id} - {self.mes:%Y-%m}>'
+
+
+class ResumoHorario(db.Model):
+    """Reservas ativas por quadra, dia da semana (0 = segunda) e hora: o mapa de calor do painel"""
+    __tablename__ = 'resumo_horario'
+
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), primary_key=True)
+    dia_semana = db.Column(db.Integer, primary_key=True)
+    hora = db.Column(db.Integer, primary_key=True)
+    reservas = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumoHorario {self.quadra_id} - {self.dia_semana} {self.hora}h>'
@@ -0,0 +1,23 @@
+from models import db, datetime
+
+class SerieReserva(db.Model):
+    """Reserva semanal recorrente: mesma quadra, dia da semana e horário por várias semanas"""
+    __tablename__ = 'series_reserva'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    quadra_id = db.Column(db.Integer, db.ForeignKey('quadras.id'), nullable=False, index=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, index=True)
+    
+    dia_semana = db.Column(db.Integer, nullable=False)  # 0 = segunda, como date.weekday()
+    hora_inicio = db.Column(db.Time, nullable=False)
+    hora_fim = db.Column(db.Time, nullable=False)
+    data_inicio = db.Column(db.Date, nullable=False)
+    data_fim = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), default='ativa')
+    
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    reservas = db.relationship('Reserva', backref='serie', lazy=True)
+    
+    def __repr__(self):
+        return f'<SerieReserva {self.id} - {self.data_inicio} a {self.data_fim}>'
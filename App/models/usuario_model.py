@@ -1,4 +1,5 @@
-from models import db, UserMixin, bcrypt, datetime
+from models import db, UserMixin, datetime
+from services.senhas import senhas, ServicoSenhasOcupado
 
 class Usuario(UserMixin, db.Model):
     __tablename__ = 'usuarios'
@@ -7,31 +8,41 @@ class Usuario(UserMixin, db.Model):
     nome = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     senha_hash = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.String(20), default='usuario')
+    role = db.Column(db.String(20), default='usuario', index=True)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Sistema de bloqueio
     tentativas_login = db.Column(db.Integer, default=0)
-    bloqueado_ate = db.Column(db.DateTime, nullable=True)
+    bloqueado_ate = db.Column(db.DateTime, nullable=True, index=True)
     
     # Relacionamentos - usar strings para evitar referência circular
     quadras = db.relationship('Quadra', backref='dono', lazy=True, foreign_keys='Quadra.dono_id')
     reservas = db.relationship('Reserva', backref='usuario', lazy=True, foreign_keys='Reserva.usuario_id')
     
     def check_password(self, senha):
-        """Verifica se a senha está correta"""
-        return bcrypt.check_password_hash(self.senha_hash, senha)
-    
-    def esta_bloqueado(self):
-        """Verifica se o usuário está bloqueado"""
-        if self.bloqueado_ate is None:
-            return False
-        if datetime.utcnow() > self.bloqueado_ate:
-            self.bloqueado_ate = None
-            db.session.commit()
+        """Verifica se a senha está correta.
+        
+        Se o hash foi gerado com outro custo, é refeito com o custo atual; quem chamou
+        grava a alteração junto com o restante do login.
+        """
+        if not senhas.verificar(senha, self.senha_hash):
             return False
+        if senhas.precisa_rehash(self.senha_hash):
+            try:
+                self.senha_hash = senhas.gerar_hash(senha)
+            except ServicoSenhasOcupado:
+                pass  # fica para o próximo login
         return True
     
+    def definir_senha(self, senha):
+        """Grava o hash da nova senha"""
+        self.senha_hash = senhas.gerar_hash(senha)
+    
+    def esta_bloqueado(self):
+        """Verifica se o usuário está bloqueado (só leitura; bloqueios vencidos são
+        limpos em lote por services.throttle)"""
+        return self.bloqueado_ate is not None and datetime.utcnow() < self.bloqueado_ate
+    
     def is_dono_quadra(self):
         """Verifica se é dono de quadra"""
         return self.role == 'dono_quadra'
@@ -0,0 +1,10 @@
+from routes.principal import principal_bp
+from routes.usuarios import usuarios_bp
+from routes.admin import admin_bp
+from routes.quadras import quadras_bp
+from routes.reservas import reservas_bp
+
+
+def registrar_blueprints(app):
+    for blueprint in (principal_bp, usuarios_bp, admin_bp, quadras_bp, reservas_bp):
+        app.register_blueprint(blueprint)
@@ -0,0 +1,130 @@
+"""Área do administrador: usuários, quadras e monitoramento"""
+from flask import Blueprint
+from flask_login import login_required
+from services.orcamento_queries import orcamento_queries
+from services.armazenamento import somente_leitura
+from controllers.usuario_controller import UsuarioController
+from controllers.quadra_controller import QuadraController
+from controllers.reserva_controller import ReservaController
+
+admin_bp = Blueprint('admin', __name__)
+
+# ===== USUÁRIOS =====
+@admin_bp.route('/admin/usuarios')
+@orcamento_queries(3)
+@somente_leitura
+@login_required
+def usuarios():
+    return UsuarioController.admin_listar_usuarios()
+
+@admin_bp.route('/admin/usuarios/exportar')
+@somente_leitura
+@login_required
+def exportar_usuarios():
+    return UsuarioController.admin_exportar_usuarios()
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/reservas/exportar')
+@somente_leitura
+@login_required
+def exportar_reservas_usuario(usuario_id):
+    return ReservaController.exportar_reservas_usuario(usuario_id)
+
+@admin_bp.route('/admin/importar', methods=['GET', 'POST'])
+@somente_leitura
+@login_required
+def importar():
+    return UsuarioController.admin_importar()
+
+@admin_bp.route('/admin/usuarios/sugestoes')
+@somente_leitura
+@login_required
+def sugerir_usuarios():
+    return UsuarioController.admin_sugerir_usuarios()
+
+@admin_bp.route('/admin/emails/fila')
+@somente_leitura
+@login_required
+def fila_emails():
+    return UsuarioController.admin_fila_emails()
+
+@admin_bp.route('/admin/metricas')
+@somente_leitura
+@login_required
+def metricas():
+    return UsuarioController.admin_metricas()
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/editar', methods=['GET', 'POST'])
+@orcamento_queries(2, POST=5)
+@somente_leitura
+@login_required
+def editar_usuario(usuario_id):
+    return UsuarioController.admin_editar_usuario(usuario_id)
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/promover')
+@login_required
+def promover_usuario(usuario_id):
+    return UsuarioController.promover_para_dono(usuario_id)
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/rebaixar')
+@login_required
+def rebaixar_usuario(usuario_id):
+    return UsuarioController.rebaixar_para_usuario(usuario_id)
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/remover')
+@login_required
+def remover_usuario(usuario_id):
+    return UsuarioController.admin_remover_usuario(usuario_id)
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/desbloquear')
+@login_required
+def desbloquear_usuario(usuario_id):
+    return UsuarioController.admin_desbloquear_usuario(usuario_id)
+
+@admin_bp.route('/admin/usuario/<int:usuario_id>/bloquear')
+@login_required
+def bloquear_usuario(usuario_id):
+    return UsuarioController.admin_bloquear_usuario(usuario_id)
+
+# ===== QUADRAS =====
+@admin_bp.route('/admin/quadras')
+@orcamento_queries(3)
+@somente_leitura
+@login_required
+def quadras():
+    return QuadraController.admin_listar_quadras()
+
+@admin_bp.route('/admin/quadras/sugestoes')
+@somente_leitura
+@login_required
+def sugerir_quadras():
+    return QuadraController.admin_sugerir_quadras()
+
+@admin_bp.route('/admin/quadra/nova', methods=['GET', 'POST'])
+@somente_leitura
+@login_required
+def cadastrar_quadra():
+    return QuadraController.admin_cadastrar_quadra()
+
+@admin_bp.route('/admin/quadra/<int:quadra_id>/editar', methods=['GET', 'POST'])
+@orcamento_queries(4, POST=4)
+@somente_leitura
+@login_required
+def editar_quadra(quadra_id):
+    return QuadraController.admin_editar_quadra(quadra_id)
+
+@admin_bp.route('/admin/quadra/<int:quadra_id>/remover')
+@login_required
+def remover_quadra(quadra_id):
+    return QuadraController.admin_remover_quadra(quadra_id)
+
+@admin_bp.route('/admin/quadra/<int:quadra_id>/reservas')
+@orcamento_queries(4)
+@somente_leitura
+@login_required
+def ver_reservas_quadra(quadra_id):
+    return QuadraController.admin_ver_reservas_quadra(quadra_id)
+
+@admin_bp.route('/admin/quadra/<int:quadra_id>/reserva/<int:reserva_id>/cancelar')
+@login_required
+def cancelar_reserva_quadra(quadra_id, reserva_id):
+    return QuadraController.admin_cancelar_reserva_quadra(quadra_id, reserva_id)
@@ -0,0 +1,12 @@
+"""Página inicial"""
+from flask import Blueprint, render_template
+from services.orcamento_queries import orcamento_queries
+from services.armazenamento import somente_leitura
+
+principal_bp = Blueprint('principal', __name__)
+
+@principal_bp.route('/')
+@orcamento_queries(1)
+@somente_leitura
+def index():
+    return render_template('index.html')
@@ -0,0 +1,70 @@
+"""Catálogo de quadras e área do dono de quadra"""
+from flask import Blueprint
+from flask_login import login_required
+from services.orcamento_queries import orcamento_queries
+from services.armazenamento import somente_leitura
+from controllers.quadra_controller import QuadraController
+
+quadras_bp = Blueprint('quadras', __name__)
+
+@quadras_bp.route('/quadras')
+@orcamento_queries(3)
+@somente_leitura
+def listar():
+    return QuadraController.listar_quadras()
+
+@quadras_bp.route('/minhas-quadras')
+@orcamento_queries(2)
+@somente_leitura
+@login_required
+def minhas_quadras():
+    return QuadraController.minhas_quadras()
+
+@quadras_bp.route('/minhas-quadras/painel')
+@orcamento_queries(5)
+@somente_leitura
+@login_required
+def painel():
+    return QuadraController.painel_dono()
+
+@quadras_bp.route('/cadastrar-quadra', methods=['GET', 'POST'])
+@somente_leitura
+@login_required
+def cadastrar():
+    return QuadraController.cadastrar_quadra()
+
+@quadras_bp.route('/quadra/<int:quadra_id>/editar', methods=['GET', 'POST'])
+@somente_leitura
+@login_required
+def editar(quadra_id):
+    return QuadraController.editar_quadra(quadra_id)
+
+@quadras_bp.route('/quadra/<int:quadra_id>/deletar')
+@login_required
+def deletar(quadra_id):
+    return QuadraController.deletar_quadra(quadra_id)
+
+@quadras_bp.route('/quadra/<int:quadra_id>/reservas')
+@orcamento_queries(4)
+@somente_leitura
+@login_required
+def ver_reservas(quadra_id):
+    return QuadraController.ver_reservas_quadra(quadra_id)
+
+@quadras_bp.route('/quadra/<int:quadra_id>/reservas/exportar')
+@somente_leitura
+@login_required
+def exportar_reservas(quadra_id):
+    return QuadraController.exportar_reservas_quadra(quadra_id)
+
+@quadras_bp.route('/quadra/<int:quadra_id>/gerenciar-horarios')
+@orcamento_queries(3)
+@somente_leitura
+@login_required
+def gerenciar_horarios(quadra_id):
+    return QuadraController.gerenciar_horarios(quadra_id)
+
+@quadras_bp.route('/quadra/<int:quadra_id>/reserva/<int:reserva_id>/cancelar-dono')
+@login_required
+def cancelar_reserva(quadra_id, reserva_id):
+    return QuadraController.cancelar_reserva_dono(reserva_id)
@@ -0,0 +1,51 @@
+"""Reservas do usuário"""
+from flask import Blueprint
+from flask_login import login_required
+from services.orcamento_queries import orcamento_queries
+from services.armazenamento import somente_leitura
+from controllers.reserva_controller import ReservaController
+
+reservas_bp = Blueprint('reservas', __name__)
+
+@reservas_bp.route('/reservar/<int:quadra_id>', methods=['GET', 'POST'])
+@orcamento_queries(4, POST=8)
+@somente_leitura
+@login_required
+def reservar(quadra_id):
+    return ReservaController.reservar(quadra_id)
+
+@reservas_bp.route('/reservar/<int:quadra_id>/semanal', methods=['GET', 'POST'])
+@orcamento_queries(6, POST=9)
+@somente_leitura
+@login_required
+def reservar_serie(quadra_id):
+    return ReservaController.reservar_serie(quadra_id)
+
+@reservas_bp.route('/disponibilidade')
+@orcamento_queries(2)
+@somente_leitura
+def disponibilidade():
+    return ReservaController.disponibilidade()
+
+@reservas_bp.route('/minhas-reservas')
+@orcamento_queries(3)
+@somente_leitura
+@login_required
+def minhas_reservas():
+    return ReservaController.minhas_reservas()
+
+@reservas_bp.route('/minhas-reservas/exportar')
+@somente_leitura
+@login_required
+def exportar_minhas_reservas():
+    return ReservaController.exportar_reservas_usuario()
+
+@reservas_bp.route('/reserva/<int:reserva_id>/cancelar')
+@login_required
+def cancelar(reserva_id):
+    return ReservaController.cancelar_reserva(reserva_id)
+
+@reservas_bp.route('/serie/<int:serie_id>/cancelar')
+@login_required
+def cancelar_serie(serie_id):
+    return ReservaController.cancelar_serie(serie_id)
@@ -0,0 +1,45 @@
+"""Cadastro, login e perfil do usuário"""
+from flask import Blueprint
+from flask_login import login_required
+from services.orcamento_queries import orcamento_queries
+from services.armazenamento import somente_leitura
+from controllers.usuario_controller import UsuarioController
+
+usuarios_bp = Blueprint('usuarios', __name__)
+
+@usuarios_bp.route('/registro', methods=['GET', 'POST'])
+@somente_leitura
+def registro():
+    return UsuarioController.registro()
+
+@usuarios_bp.route('/login', methods=['GET', 'POST'])
+@somente_leitura
+def login():
+    return UsuarioController.login()
+
+@usuarios_bp.route('/logout')
+def logout():
+    return UsuarioController.logout()
+
+@usuarios_bp.route('/perfil')
+@orcamento_queries(1)
+@somente_leitura
+@login_required
+def perfil():
+    return UsuarioController.perfil()
+
+@usuarios_bp.route('/editar-perfil', methods=['GET', 'POST'])
+@somente_leitura
+@login_required
+def editar_perfil():
+    return UsuarioController.editar_perfil()
+
+@usuarios_bp.route('/esqueci-senha', methods=['GET', 'POST'])
+@somente_leitura
+def esqueci_senha():
+    return UsuarioController.esqueci_senha()
+
+@usuarios_bp.route('/resetar-senha/<token>', methods=['GET', 'POST'])
+@somente_leitura
+def resetar_senha(token):
+    return UsuarioController.resetar_senha(token)
@@ -0,0 +1,186 @@
+"""Perfil de armazenamento SQLite para acesso concorrente.
+
+- Toda conexão abre com WAL, `busy_timeout`, `synchronous=NORMAL` e mmap; no WAL os
+  leitores não esperam pelos escritores.
+- Rotas marcadas com `@somente_leitura` leem de um segundo pool de conexões com
+  `PRAGMA query_only` (bind 'leitura'). Em GET/HEAD tudo vai para ele, e uma escrita
+  acidental ali falha. Nos demais métodos tudo vai para o pool de escrita: um
+  formulário que lê, altera e grava faz tudo dentro da mesma transação BEGIN IMMEDIATE,
+  sem gravar por cima de um commit que aconteceu depois da leitura. A exceção é a
+  consulta marcada com `execution_options(pool_leitura=True)`, para buscas cujo
+  resultado não entra no que é gravado (as do login e do throttle), de modo que o bcrypt
+  que vem depois delas não segure a fila de escrita.
+- As transações do pool de escrita começam com BEGIN IMMEDIATE, então pegam a trava de
+  escrita logo no início em vez de disputá-la no meio da transação. Antes do BEGIN elas
+  entram numa fila de um escritor por vez, limitada a `ESCRITAS_MAX_PENDENTES` (acima
+  disso a requisição é recusada com 503), e saem dela no commit/rollback. Num POST a
+  transação começa na primeira consulta: o que vem antes dela (o hash do cadastro) e
+  depois do commit (a renderização) fica fora da fila; a troca de senha no perfil
+  confere a senha atual dentro dela.
+
+Com `SQLITE_PERFIL = False` (ou outro banco que não SQLite) nada disso é ligado.
+"""
+import threading
+from flask import g, has_request_context, request, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+BIND_LEITURA = 'leitura'
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+# Opção de execução que manda um SELECT para o pool de leitura também em POST
+OPCAO_POOL_LEITURA = 'pool_leitura'
+
+
+class FilaEscritaCheia(Exception):
+    pass
+
+
+class SessaoRoteada(Session):
+    """Sessão que lê pelo pool somente leitura durante rotas `@somente_leitura`"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('somente_leitura'):
+            engine = self._db.engines.get(BIND_LEITURA)
+            if engine is not None and self._usa_leitura(clause):
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _usa_leitura(clause):
+        if request.method in METODOS_LEITURA:
+            return True
+        return (getattr(clause, 'is_select', False)
+                and clause.get_execution_options().get(OPCAO_POOL_LEITURA, False))
+
+
+def somente_leitura(view):
+    """Marca a rota para ler pelo pool somente leitura"""
+    view.somente_leitura = True
+    return view
+
+
+class FilaEscrita:
+    """Um escritor por vez, na ordem de chegada, com limite de requisições esperando"""
+
+    def __init__(self, max_pendentes=32, timeout=10):
+        self.max_pendentes = max_pendentes
+        self.timeout = timeout
+        self.recusadas = 0
+        self._condicao = threading.Condition()
+        self._proxima_senha = 0
+        self._atendendo = 0
+        self._desistentes = set()
+
+    def _avancar(self):
+        self._atendendo += 1
+        while self._atendendo in self._desistentes:
+            self._desistentes.discard(self._atendendo)
+            self._atendendo += 1
+        self._condicao.notify_all()
+
+    def entrar(self):
+        with self._condicao:
+            pendentes = self._proxima_senha - self._atendendo - len(self._desistentes)
+            if pendentes > self.max_pendentes:
+                self.recusadas += 1
+                raise FilaEscritaCheia('Fila de escrita cheia')
+            senha = self._proxima_senha
+            self._proxima_senha += 1
+            if not self._condicao.wait_for(lambda: self._atendendo == senha, timeout=self.timeout):
+                self._desistentes.add(senha)
+                self.recusadas += 1
+                raise FilaEscritaCheia('Tempo de espera da fila de escrita esgotado')
+
+    def sair(self):
+        with self._condicao:
+            self._avancar()
+
+    def estatisticas(self):
+        with self._condicao:
+            return {
+                'esperando': max(self._proxima_senha - self._atendendo - len(self._desistentes) - 1, 0),
+                'recusadas': self.recusadas,
+            }
+
+
+def _eh_sqlite(uri):
+    return uri.startswith('sqlite:') and ':memory:' not in uri and uri != 'sqlite://'
+
+
+def configurar_binds(app):
+    """Acrescenta o bind somente leitura; chamar antes de `db.init_app`"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not app.config.get('SQLITE_PERFIL', True) or not _eh_sqlite(uri):
+        return False
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.setdefault(BIND_LEITURA, uri)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    return True
+
+
+def _pragmas(app, somente_leitura_):
+    comandos = [
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA busy_timeout={int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(app.config.get('SQLITE_MMAP_BYTES', 256 * 1024 * 1024))}",
+    ]
+    if somente_leitura_:
+        comandos.append('PRAGMA query_only=ON')
+
+    def ao_conectar(conexao_dbapi, registro):
+        # O BEGIN passa a ser emitido por nós (ver ao_iniciar), não pelo driver
+        conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        for comando in comandos:
+            cursor.execute(comando)
+        cursor.close()
+    return ao_conectar
+
+
+def init_armazenamento(app, db):
+    """Liga os pragmas, o pool de leitura e a fila de escrita; chamar depois de `db.init_app`"""
+    if BIND_LEITURA not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    fila = FilaEscrita(int(app.config.get('ESCRITAS_MAX_PENDENTES', 32)),
+                       float(app.config.get('ESCRITAS_TIMEOUT', 10)))
+    app.extensions['fila_escrita'] = fila
+
+    with app.app_context():
+        escrita_engine = db.engines[None]
+        leitura_engine = db.engines[BIND_LEITURA]
+    event.listen(escrita_engine, 'connect', _pragmas(app, False))
+    event.listen(leitura_engine, 'connect', _pragmas(app, True))
+
+    @event.listens_for(escrita_engine, 'begin')
+    def iniciar_escrita(conexao):
+        fila.entrar()
+        try:
+            conexao.exec_driver_sql('BEGIN IMMEDIATE')
+        except Exception:
+            fila.sair()
+            raise
+        conexao.info['na_fila_escrita'] = True
+
+    @event.listens_for(escrita_engine, 'commit')
+    @event.listens_for(escrita_engine, 'rollback')
+    def encerrar_escrita(conexao):
+        # Dispara logo antes do COMMIT; o próximo BEGIN IMMEDIATE espera por ele no busy_timeout
+        if conexao.info.pop('na_fila_escrita', False):
+            fila.sair()
+
+    @event.listens_for(leitura_engine, 'begin')
+    def iniciar_leitura(conexao):
+        conexao.exec_driver_sql('BEGIN')
+
+    @app.before_request
+    def escolher_conexao():
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'somente_leitura', False):
+            g.somente_leitura = True
+
+
+def estatisticas_fila_escrita():
+    fila = current_app.extensions.get('fila_escrita')
+    return fila.estatisticas() if fila else None
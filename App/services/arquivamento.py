@@ -0,0 +1,91 @@
+"""Arquivamento de reservas antigas.
+
+Reservas com data anterior ao corte (hoje - ARQUIVAR_APOS_DIAS), ativas ou canceladas,
+saem da tabela `reservas` e vão, com o mesmo id, para `reservas_arquivo`. Assim a tabela
+lida e escrita a cada reserva (e seus índices) fica do tamanho da janela recente, e não
+do histórico inteiro. A tabela `reservas` usa AUTOINCREMENT (migração 14), então o id de
+uma reserva arquivada nunca é dado a uma reserva nova.
+
+A cópia é feita em lotes pequenos, cada um em sua própria transação (INSERT ... SELECT e
+DELETE pelos ids do lote), com uma pausa entre eles: uma reserva feita durante o
+arquivamento espera no máximo um lote pela trava de escrita. Os lotes avançam por faixas
+de id, então uma execução percorre a tabela uma única vez e nenhuma transação examina
+mais que uma faixa.
+
+O índice de ocupação e os resumos do painel não mudam: os resumos já contam as
+reservas arquivadas, e o `reconstruir-resumos` lê a view `reservas_historico`.
+"""
+import time as relogio
+from datetime import date, timedelta
+from flask import current_app, request
+from sqlalchemy import select, delete, insert
+from models import db
+from models.reserva_model import Reserva, ReservaArquivo, ReservaHistorico, ORDEM_RESERVAS, ORDEM_HISTORICO
+
+# Colunas copiadas para o arquivo (e unidas na view reservas_historico)
+COLUNAS_RESERVA = 'id, quadra_id, usuario_id, serie_id, data, hora_inicio, hora_fim, status, criado_em, atualizado_em'
+ARQUIVAR_APOS_DIAS_PADRAO = 90
+LOTE_ARQUIVAMENTO_PADRAO = 500
+PAUSA_ARQUIVAMENTO_MS_PADRAO = 50
+
+
+def data_de_corte(dias=None, hoje=None):
+    """Reservas com data anterior a esta são arquivadas"""
+    if dias is None:
+        dias = int(current_app.config.get('ARQUIVAR_APOS_DIAS', ARQUIVAR_APOS_DIAS_PADRAO))
+    return (hoje or date.today()) - timedelta(days=max(dias, 1))
+
+
+def arquivar_reservas(dias=None, lote=None, pausa_ms=None, limite=None):
+    """Move para `reservas_arquivo` as reservas anteriores ao corte, em lotes.
+
+    Retorna quantas foram movidas; `limite` para depois de mover aproximadamente esse número.
+    """
+    config = current_app.config
+    corte = data_de_corte(dias)
+    lote = lote or int(config.get('ARQUIVAMENTO_LOTE', LOTE_ARQUIVAMENTO_PADRAO))
+    if pausa_ms is None:
+        pausa_ms = int(config.get('ARQUIVAMENTO_PAUSA_MS', PAUSA_ARQUIVAMENTO_MS_PADRAO))
+
+    colunas = [coluna.strip() for coluna in COLUNAS_RESERVA.split(',')]
+    tabela = Reserva.__table__
+    # Cada transação examina no máximo `janela` ids, mesmo onde não há nada a mover
+    janela = lote * 10
+    maior_id = db.session.execute(select(db.func.max(tabela.c.id))).scalar() or 0
+    db.session.rollback()
+    movidas, ultimo_id = 0, 0
+    while ultimo_id < maior_id and (limite is None or movidas < limite):
+        ids = db.session.execute(
+            select(tabela.c.id)
+            .where(tabela.c.id > ultimo_id, tabela.c.id <= ultimo_id + janela, tabela.c.data < corte)
+            .order_by(tabela.c.id).limit(lote)
+        ).scalars().all()
+        if not ids:
+            db.session.rollback()
+            ultimo_id += janela
+            continue
+        db.session.execute(insert(ReservaArquivo.__table__).from_select(
+            colunas, select(*[tabela.c[coluna] for coluna in colunas]).where(tabela.c.id.in_(ids))
+        ))
+        db.session.execute(delete(tabela).where(tabela.c.id.in_(ids)))
+        db.session.commit()
+        movidas += len(ids)
+        ultimo_id = ids[-1] if len(ids) == lote else ultimo_id + janela
+        if pausa_ms:
+            relogio.sleep(pausa_ms / 1000)
+    return movidas
+
+
+def contar_para_arquivar(dias=None):
+    """Quantas reservas o próximo arquivamento moveria"""
+    return db.session.execute(
+        select(db.func.count()).select_from(Reserva).where(Reserva.data < data_de_corte(dias))
+    ).scalar()
+
+
+def fonte_das_reservas():
+    """(modelo, ordem, historico) das listagens de reservas: com ?historico=1 a view
+    com as arquivadas (ReservaHistorico), senão só a tabela reservas"""
+    if request.args.get('historico') == '1':
+        return ReservaHistorico, ORDEM_HISTORICO, True
+    return Reserva, ORDEM_RESERVAS, False
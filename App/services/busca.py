@@ -0,0 +1,75 @@
+"""Busca textual das telas de administração (SQLite FTS5).
+
+As tabelas `quadras_fts` e `usuarios_fts` são índices de conteúdo externo mantidos
+por triggers (ver migração 5). O tokenizador remove acentos, então "sao" encontra
+"São", e cada palavra digitada vira uma busca por prefixo.
+"""
+import re
+from sqlalchemy import text, Integer
+from models import db
+from models.usuario_model import Usuario
+from models.quadra_model import Quadra
+
+LIMITE_SUGESTOES = 10
+
+
+def termo_fts(busca):
+    """Converte o texto digitado em uma consulta FTS5 (todas as palavras, por prefixo)"""
+    palavras = re.findall(r'\w+', busca or '')
+    if not palavras:
+        return None
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+def _ids_encontrados(tabela, termo):
+    return text(f'SELECT rowid FROM {tabela} WHERE {tabela} MATCH :termo').bindparams(
+        termo=termo).columns(rowid=Integer)
+
+
+def filtro_busca_quadras(busca):
+    """Condição para Quadra.query; None se a busca não tiver nenhuma palavra"""
+    termo = termo_fts(busca)
+    if termo is None:
+        return None
+    return Quadra.id.in_(_ids_encontrados('quadras_fts', termo))
+
+
+def filtro_busca_usuarios(busca):
+    """Condição para Usuario.query; None se a busca não tiver nenhuma palavra"""
+    termo = termo_fts(busca)
+    if termo is None:
+        return None
+    return Usuario.id.in_(_ids_encontrados('usuarios_fts', termo))
+
+
+def _sugestoes(tabela, colunas, busca, limite):
+    termo = termo_fts(busca)
+    if termo is None:
+        return []
+    linhas = db.session.execute(text(
+        f'SELECT rowid, {colunas} FROM {tabela} WHERE {tabela} MATCH :termo ORDER BY rank LIMIT :limite'
+    ), {'termo': termo, 'limite': limite})
+    return [dict(linha._mapping) for linha in linhas]
+
+
+def sugerir_quadras(busca, limite=LIMITE_SUGESTOES):
+    """Quadras mais relevantes para a busca (ordem do bm25), para autocompletar"""
+    return [
+        {'id': s['rowid'], 'nome': s['nome'], 'endereco': s['endereco']}
+        for s in _sugestoes('quadras_fts', 'nome, endereco', busca, limite)
+    ]
+
+
+def sugerir_usuarios(busca, limite=LIMITE_SUGESTOES):
+    """Usuários mais relevantes para a busca (ordem do bm25), para autocompletar"""
+    return [
+        {'id': s['rowid'], 'nome': s['nome'], 'email': s['email']}
+        for s in _sugestoes('usuarios_fts', 'nome, email', busca, limite)
+    ]
+
+
+def reconstruir_indices_busca():
+    """Reindexa as tabelas de busca a partir de quadras e usuarios"""
+    db.session.execute(text("INSERT INTO quadras_fts(quadras_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO usuarios_fts(usuarios_fts) VALUES ('rebuild')"))
+    db.session.commit()
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """Cache em memória do processo, com descarte do item menos usado e tempo de vida opcional"""
+
+    def __init__(self, tamanho_maximo=1024, ttl=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor guardado ou `padrao` se não existir ou tiver expirado"""
+        with self._trava:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is not _AUSENTE:
+                valor, expira_em = item
+                if expira_em is None or expira_em > time.monotonic():
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return valor
+                del self._itens[chave]
+            self.falhas += 1
+            return padrao
+
+    def guardar(self, chave, valor):
+        expira_em = time.monotonic() + self.ttl if self.ttl else None
+        with self._trava:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave):
+        with self._trava:
+            self._itens.pop(chave, None)
+
+    def invalidar_se(self, condicao):
+        """Remove todas as chaves para as quais `condicao(chave)` é verdadeira"""
+        with self._trava:
+            for chave in [c for c in self._itens if condicao(c)]:
+                del self._itens[chave]
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                'itens': len(self._itens),
+                'acertos': self.acertos,
+                'falhas': self.falhas
+            }
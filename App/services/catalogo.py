@@ -0,0 +1,92 @@
+"""Cache e GET condicional do catálogo público de quadras (/quadras).
+
+A versão do catálogo fica num arquivo em `instance/` (compartilhado pelos processos)
+e muda sempre que uma quadra é criada, editada, desativada ou removida. Com ela a
+rota responde `304 Not Modified` para quem já tem a versão atual e guarda o HTML
+renderizado por versão e por perfil do visitante (a barra de navegação muda com o
+usuário logado), sem consultar o banco nem renderizar o template de novo.
+"""
+import hashlib
+import os
+import time as relogio
+from datetime import datetime, timezone
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from services.cache import CacheLRU
+
+ARQUIVO_VERSAO = 'catalogo.versao'
+
+_cache_paginas = CacheLRU(1024)
+_versao_lida = {'mtime': None, 'versao': None}
+
+
+def _caminho():
+    return os.path.join(current_app.instance_path, ARQUIVO_VERSAO)
+
+
+def invalidar_catalogo():
+    """Gera uma nova versão do catálogo (chamar depois do commit que alterou quadras)"""
+    caminho = _caminho()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}'
+    with open(temporario, 'w') as arquivo:
+        arquivo.write(str(relogio.time_ns()))
+    os.replace(temporario, caminho)
+    _cache_paginas.limpar()
+
+
+def versao_catalogo():
+    """Versão atual (nanossegundos da última alteração); só relê o arquivo se ele mudou"""
+    caminho = _caminho()
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        invalidar_catalogo()
+        mtime = os.stat(caminho).st_mtime_ns
+    if _versao_lida['mtime'] != mtime:
+        with open(caminho) as arquivo:
+            _versao_lida['versao'] = int(arquivo.read().strip() or 0)
+        _versao_lida['mtime'] = mtime
+    return _versao_lida['versao']
+
+
+def _variante():
+    """Parte da página que depende do visitante (barra de navegação)"""
+    if not current_user.is_authenticated:
+        return 'anonimo'
+    return f'{current_user.id}:{current_user.role}:{current_user.nome}'
+
+
+def resposta_catalogo(renderizar):
+    """Resposta de /quadras com ETag/Last-Modified; `renderizar()` só roda se não houver cache"""
+    # Mensagens flash pendentes fazem parte da página e são consumidas ao renderizar
+    if session.get('_flashes') or request.args:
+        return renderizar()
+
+    versao = versao_catalogo()
+    variante = _variante()
+    etag = f'catalogo-{versao}-{hashlib.sha1(variante.encode()).hexdigest()[:12]}'
+    modificado_em = datetime.fromtimestamp(versao // 10**9, tz=timezone.utc)
+
+    if request.if_none_match.contains(etag):
+        resposta = make_response('', 304)
+    else:
+        chave = (versao, variante)
+        html = _cache_paginas.obter(chave)
+        if html is None:
+            html = renderizar()
+            _cache_paginas.guardar(chave, html)
+        resposta = make_response(html)
+
+    resposta.set_etag(etag)
+    resposta.last_modified = modificado_em
+    resposta.cache_control.no_cache = True
+    if variante == 'anonimo':
+        resposta.cache_control.public = True
+    else:
+        resposta.cache_control.private = True
+    return resposta.make_conditional(request)
+
+
+def estatisticas_cache_catalogo():
+    return _cache_paginas.estatisticas()
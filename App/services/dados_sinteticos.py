@@ -0,0 +1,294 @@
+"""Gerador de dados sintéticos para benchmarks (flask gerar-dados).
+
+Popula um banco novo com clientes, donos, quadras e reservas com a forma de uma base real:
+
+- quadras: tipo e faixa de preço sorteados de PERFIS_TIPO, espalhadas ao redor de
+  CENTRO_MAPA; poucos donos concentram muitas quadras;
+- reservas: a popularidade das quadras e a frequência dos clientes seguem distribuições
+  log-normais (umas poucas quadras lotam, a maioria fica com pouco movimento), os
+  horários se concentram no fim da tarde (PESOS_HORA) e o fim de semana tem mais
+  reservas (PESOS_DIA_SEMANA); uma fração `cancelamento` sai cancelada.
+
+Com a mesma semente e o mesmo `inicio` as linhas são idênticas (ids, datas e até o hash
+das senhas), para que benchmarks e comparações rodem sobre os mesmos dados.
+
+As reservas são gravadas em lotes (executemany direto no driver) com os índices de consulta da
+tabela removidos e recriados no fim (o índice único de horário ativo fica): cada índice é montado com uma ordenação só, em vez de milhões de
+inserções espalhadas pelas árvores. Depois o índice de ocupação e os resumos são
+reconstruídos e as estatísticas do planejador atualizadas (ANALYZE).
+"""
+import base64
+import math
+import random
+import time as relogio
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+import bcrypt
+from flask import current_app
+from sqlalchemy import select, func
+from models import db
+from models.usuario_model import Usuario
+from models.quadra_model import Quadra
+from models.reserva_model import Reserva
+from models.ocupacao_model import HORAS_FUNCIONAMENTO
+from services.senhas import senhas, TAMANHO_MAXIMO_SENHA
+from services.reservas import reconstruir_ocupacao
+from services.resumos import reconstruir_resumos
+
+DOMINIO_SINTETICO = 'sintetico.local'
+LOTE_GERACAO = 50_000
+# Dias no fim do período que ficam no futuro (a janela em que se reserva)
+DIAS_FUTUROS = 30
+# Acima desta fração dos horários ocupados as quadras populares não têm mais vaga
+OCUPACAO_MAXIMA = 0.5
+TENTATIVAS_POR_RESERVA = 20
+
+# tipo: (peso, preço mínimo, preço máximo)
+PERFIS_TIPO = {
+    'society': (30, 120, 250),
+    'futsal': (25, 80, 180),
+    'futebol': (12, 200, 450),
+    'beach_tennis': (12, 60, 150),
+    'tenis': (10, 60, 160),
+    'volei': (6, 50, 110),
+    'basquete': (5, 50, 110),
+}
+PESOS_HORA = {6: 2, 7: 3, 8: 4, 9: 4, 10: 4, 11: 3, 12: 3, 13: 3, 14: 3, 15: 4, 16: 5,
+              17: 8, 18: 12, 19: 14, 20: 13, 21: 9, 22: 5}
+# Segunda a domingo
+PESOS_DIA_SEMANA = (1.0, 0.9, 1.0, 1.1, 1.3, 1.8, 1.5)
+# Desvio do log da popularidade (quadras) e da frequência (clientes)
+SIGMA_QUADRAS = 1.0
+SIGMA_CLIENTES = 1.2
+FRACAO_QUADRAS_INATIVAS = 0.03
+CENTRO_MAPA = (-23.5505, -46.6333)
+RAIO_MAPA_GRAUS = 0.25
+
+NOMES = ('Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Lucas', 'Mariana', 'Mateus', 'Natália', 'Pedro', 'Rafaela', 'Rodrigo', 'Sofia', 'Thiago')
+SOBRENOMES = ('Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima', 'Martins', 'Oliveira',
+              'Pereira', 'Ribeiro', 'Rodrigues', 'Santos', 'Silva', 'Souza')
+BAIRROS = ('Centro', 'Pinheiros', 'Mooca', 'Tatuapé', 'Santana', 'Lapa', 'Butantã', 'Ipiranga', 'Vila Mariana',
+           'Perdizes', 'Itaquera', 'Morumbi', 'Saúde', 'Penha', 'Jabaquara')
+RUAS = ('Rua das Flores', 'Avenida Brasil', 'Rua do Campo', 'Rua São Jorge', 'Avenida Paulista',
+        'Rua da Paz', 'Rua Bela Vista', 'Avenida do Estado')
+PREFIXOS_QUADRA = ('Arena', 'Quadra', 'Clube', 'Espaço', 'Complexo')
+
+# Direto no driver, com os valores já no formato em que o SQLAlchemy grava datas e horas
+# no SQLite: converter milhões de parâmetros um a um custaria mais que o próprio INSERT
+INSERIR_RESERVAS_SQL = ('INSERT INTO reservas (quadra_id, usuario_id, data, hora_inicio, hora_fim, status, '
+                        'criado_em, atualizado_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+FORMATO_DATA_HORA = '%Y-%m-%d %H:%M:%S.%f'
+
+
+class ResultadoGeracao:
+    def __init__(self, semente, inicio, dias):
+        self.semente = semente
+        self.inicio = inicio
+        self.dias = dias
+        self.clientes = 0
+        self.donos = 0
+        self.quadras = 0
+        self.reservas = 0
+        self.canceladas = 0
+        # Reservas que não acharam horário livre depois de TENTATIVAS_POR_RESERVA sorteios
+        self.descartadas = 0
+        self.etapas = []
+
+    def etapa(self, nome, inicio):
+        self.etapas.append((nome, relogio.perf_counter() - inicio))
+
+
+def _hash_da_semente(senha, aleatorio):
+    """Hash bcrypt com sal tirado do gerador: o mesmo a cada execução com a mesma semente.
+
+    Só para dados sintéticos; as senhas reais usam o sal aleatório de services.senhas.
+    """
+    sal = base64.b64encode(aleatorio.getrandbits(128).to_bytes(16, 'big')).decode()[:22]
+    sal = sal.translate(str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/',
+                                      './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'))
+    return bcrypt.hashpw(senha.encode('utf-8')[:TAMANHO_MAXIMO_SENHA], f'$2b${senhas.custo:02d}${sal}'.encode()).decode()
+
+
+def _pesos_lognormais(aleatorio, quantidade, sigma):
+    """Pesos acumulados (para random.choices) de uma popularidade log-normal"""
+    return list(accumulate(math.exp(aleatorio.gauss(0, sigma)) for _ in range(quantidade)))
+
+
+def _reservas_por_dia(total, inicio, dias):
+    """Quantas reservas cabem a cada dia, proporcional ao peso do dia da semana; soma `total`"""
+    pesos = list(accumulate(PESOS_DIA_SEMANA[(inicio + timedelta(days=d)).weekday()] for d in range(dias)))
+    alvos = [math.floor(total * acumulado / pesos[-1]) for acumulado in pesos]
+    return [alvo - anterior for alvo, anterior in zip(alvos, [0] + alvos[:-1])]
+
+
+def banco_vazio():
+    """Só o admin padrão: nenhum outro usuário, quadra ou reserva"""
+    return (db.session.execute(select(func.count()).select_from(Usuario)).scalar() <= 1
+            and db.session.execute(select(func.count()).select_from(Quadra)).scalar() == 0
+            and db.session.execute(select(func.count()).select_from(Reserva)).scalar() == 0)
+
+
+def _gerar_usuarios(aleatorio, resultado, clientes, donos, senha, criado_em):
+    senha_hash = _hash_da_semente(senha, aleatorio)
+    linhas = [{'nome': f'{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}',
+               'email': f'{papel}{i}@{DOMINIO_SINTETICO}', 'role': role, 'senha_hash': senha_hash,
+               'criado_em': criado_em, 'tentativas_login': 0}
+              for papel, role, quantidade in (('dono', 'dono_quadra', donos), ('cliente', 'usuario', clientes))
+              for i in range(quantidade)]
+    for pedaco in range(0, len(linhas), LOTE_GERACAO):
+        db.session.execute(Usuario.__table__.insert(), linhas[pedaco:pedaco + LOTE_GERACAO])
+    db.session.commit()
+    resultado.clientes, resultado.donos = clientes, donos
+
+    ids = dict(db.session.execute(
+        select(Usuario.email, Usuario.id).where(Usuario.email.like(f'%@{DOMINIO_SINTETICO}'))
+    ).all())
+    return ([ids[f'dono{i}@{DOMINIO_SINTETICO}'] for i in range(donos)],
+            [ids[f'cliente{i}@{DOMINIO_SINTETICO}'] for i in range(clientes)])
+
+
+def _gerar_quadras(aleatorio, resultado, quantidade, ids_donos, criado_em):
+    tipos = list(PERFIS_TIPO)
+    pesos_tipo = list(accumulate(peso for peso, _, _ in PERFIS_TIPO.values()))
+    pesos_donos = _pesos_lognormais(aleatorio, len(ids_donos), SIGMA_QUADRAS)
+    linhas = []
+    for i in range(quantidade):
+        tipo = aleatorio.choices(tipos, cum_weights=pesos_tipo)[0]
+        _, minimo, maximo = PERFIS_TIPO[tipo]
+        bairro = aleatorio.choice(BAIRROS)
+        linhas.append({
+            'nome': f'{aleatorio.choice(PREFIXOS_QUADRA)} {tipo.replace("_", " ").title()} {bairro} {i + 1}',
+            'endereco': f'{aleatorio.choice(RUAS)}, {aleatorio.randint(1, 3000)} - {bairro}',
+            'tipo': tipo,
+            'preco_hora': float(aleatorio.randrange(minimo, maximo + 1, 5)),
+            'ativa': aleatorio.random() >= FRACAO_QUADRAS_INATIVAS,
+            'latitude': round(CENTRO_MAPA[0] + aleatorio.uniform(-RAIO_MAPA_GRAUS, RAIO_MAPA_GRAUS), 6),
+            'longitude': round(CENTRO_MAPA[1] + aleatorio.uniform(-RAIO_MAPA_GRAUS, RAIO_MAPA_GRAUS), 6),
+            'dono_id': aleatorio.choices(ids_donos, cum_weights=pesos_donos)[0],
+            'criado_em': criado_em,
+        })
+    db.session.execute(Quadra.__table__.insert(), linhas)
+    db.session.commit()
+    resultado.quadras = quantidade
+    return db.session.execute(select(Quadra.id).where(Quadra.ativa.is_(True)).order_by(Quadra.id)).scalars().all()
+
+
+def _gerar_reservas(aleatorio, resultado, total, ids_quadras, ids_clientes, inicio, dias, cancelamento):
+    horas = list(HORAS_FUNCIONAMENTO)
+    pesos_hora = list(accumulate(PESOS_HORA[hora] for hora in horas))
+    pesos_quadras = _pesos_lognormais(aleatorio, len(ids_quadras), SIGMA_QUADRAS)
+    pesos_clientes = _pesos_lognormais(aleatorio, len(ids_clientes), SIGMA_CLIENTES)
+    inicios = {hora: f'{hora:02d}:00:00.000000' for hora in horas}
+    fins = {hora: f'{(hora + 1) % 24:02d}:00:00.000000' for hora in horas}
+
+    def sortear_horario():
+        return (aleatorio.choices(ids_quadras, cum_weights=pesos_quadras)[0],
+                aleatorio.choices(horas, cum_weights=pesos_hora)[0])
+
+    def gravar(lote):
+        db.session.connection().exec_driver_sql(INSERIR_RESERVAS_SQL, lote)
+        db.session.commit()
+        resultado.reservas += len(lote)
+
+    lote = []
+    for deslocamento, quantidade in enumerate(_reservas_por_dia(total, inicio, dias)):
+        dia = inicio + timedelta(days=deslocamento)
+        data = dia.isoformat()
+        meio_dia = datetime.combine(dia, time(12))
+        # Reservadas de 0 a 14 dias antes; canceladas um dia depois de reservar
+        criadas = [(meio_dia - timedelta(days=antecedencia)).strftime(FORMATO_DATA_HORA) for antecedencia in range(16)]
+        quadras = aleatorio.choices(ids_quadras, cum_weights=pesos_quadras, k=quantidade)
+        horarios = aleatorio.choices(horas, cum_weights=pesos_hora, k=quantidade)
+        clientes = aleatorio.choices(ids_clientes, cum_weights=pesos_clientes, k=quantidade)
+        antecedencias = aleatorio.choices(range(1, 16), k=quantidade)
+        ocupados = set()
+        for quadra_id, hora, usuario_id, antecedencia in zip(quadras, horarios, clientes, antecedencias):
+            if aleatorio.random() < cancelamento:
+                lote.append((quadra_id, usuario_id, data, inicios[hora], fins[hora], 'cancelada',
+                             criadas[antecedencia], criadas[antecedencia - 1]))
+                resultado.canceladas += 1
+                continue
+            # Horário já tomado por uma reserva ativa: sorteia outro
+            tentativas = 0
+            while (quadra_id, hora) in ocupados and tentativas < TENTATIVAS_POR_RESERVA:
+                quadra_id, hora = sortear_horario()
+                tentativas += 1
+            if (quadra_id, hora) in ocupados:
+                resultado.descartadas += 1
+                continue
+            ocupados.add((quadra_id, hora))
+            lote.append((quadra_id, usuario_id, data, inicios[hora], fins[hora], 'ativa',
+                         criadas[antecedencia], criadas[antecedencia]))
+        if len(lote) >= LOTE_GERACAO:
+            gravar(lote)
+            lote = []
+    if lote:
+        gravar(lote)
+
+
+def _recriar_indices(indices):
+    for indice in indices:
+        indice.create(db.session.connection(), checkfirst=True)
+    db.session.commit()
+
+
+def gerar_dados(semente=42, clientes=20_000, donos=300, quadras=2_000, reservas=1_000_000, dias=365,
+                inicio=None, cancelamento=0.12, senha='senha123'):
+    """Popula o banco (vazio) com dados sintéticos; retorna o ResultadoGeracao.
+
+    `inicio` é o primeiro dia das reservas; por padrão os últimos DIAS_FUTUROS dias do
+    período ficam no futuro. Levanta ValueError se o banco já tiver dados ou se as reservas
+    pedidas não couberem nos horários das quadras.
+    """
+    inicio = inicio or date.today() - timedelta(days=max(dias - DIAS_FUTUROS, 0))
+    if not banco_vazio():
+        raise ValueError('o banco já tem usuários, quadras ou reservas; gere os dados num banco novo '
+                         '(DATABASE_URL apontando para outro arquivo)')
+    if min(clientes, donos, quadras, dias) < 1:
+        raise ValueError('clientes, donos, quadras e dias precisam ser pelo menos 1')
+    capacidade = quadras * (1 - FRACAO_QUADRAS_INATIVAS) * dias * len(HORAS_FUNCIONAMENTO)
+    if reservas * (1 - cancelamento) > OCUPACAO_MAXIMA * capacidade:
+        raise ValueError(f'{reservas} reservas não cabem em {quadras} quadras por {dias} dias '
+                         f'(máximo de {OCUPACAO_MAXIMA:.0%} dos horários ocupados); '
+                         'aumente as quadras ou os dias')
+
+    aleatorio = random.Random(semente)
+    resultado = ResultadoGeracao(semente, inicio, dias)
+    criado_em = datetime.combine(inicio - timedelta(days=DIAS_FUTUROS), time(12))
+    # Cache maior (256 MB) na conexão do gerador, para montar os índices no fim
+    db.session.connection().exec_driver_sql('PRAGMA cache_size=-262144')
+
+    etapa = relogio.perf_counter()
+    ids_donos, ids_clientes = _gerar_usuarios(aleatorio, resultado, clientes, donos, senha, criado_em)
+    ids_quadras = _gerar_quadras(aleatorio, resultado, quadras, ids_donos, criado_em)
+    resultado.etapa('usuários e quadras', etapa)
+
+    etapa = relogio.perf_counter()
+    # Só os índices de consulta saem durante a carga; o único segue garantindo um horário por quadra
+    indices = [indice for indice in Reserva.__table__.indexes if not indice.unique]
+    for indice in indices:
+        indice.drop(db.session.connection())
+    db.session.commit()
+    try:
+        _gerar_reservas(aleatorio, resultado, reservas, ids_quadras, ids_clientes, inicio, dias, cancelamento)
+    except BaseException:
+        db.session.rollback()
+        try:
+            _recriar_indices(indices)
+        except Exception:
+            current_app.logger.exception('Falha ao recriar os índices de reservas')
+        raise
+    _recriar_indices(indices)
+    resultado.etapa('reservas', etapa)
+
+    etapa = relogio.perf_counter()
+    reconstruir_ocupacao()
+    reconstruir_resumos()
+    resultado.etapa('ocupação e resumos', etapa)
+
+    etapa = relogio.perf_counter()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    resultado.etapa('ANALYZE', etapa)
+    return resultado
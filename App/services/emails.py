@@ -0,0 +1,161 @@
+"""Fila de saída (outbox) de emails.
+
+As requisições só gravam o email em `email_outbox` com `enfileirar_email`; o envio
+acontece no worker (`flask enviar-emails`), em lotes sobre uma única conexão SMTP.
+Falhas temporárias são repetidas com espera exponencial; falhas permanentes (5xx,
+destinatário recusado) e emails que esgotam as tentativas ficam como 'falhou'.
+
+Cada lote é reservado de uma vez (UPDATE ... RETURNING para 'enviando') antes de
+abrir a conexão SMTP, então dois workers nunca pegam o mesmo email. Se o worker cair
+no meio do lote, os emails voltam a ficar disponíveis depois de `PRAZO_ENVIO`.
+
+Para testar localmente, suba um servidor SMTP de mentira (`pip install aiosmtpd`) e
+aponte a configuração (senha vazia desliga o login SMTP):
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=0 MAIL_PASSWORD= flask --app app enviar-emails
+"""
+import smtplib
+import time as relogio
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, update
+from models import db
+from models.email_model import EmailPendente
+
+TAMANHO_LOTE = 50
+MAX_TENTATIVAS = 6
+ESPERA_BASE = timedelta(seconds=30)
+ESPERA_MAXIMA = timedelta(hours=1)
+# Depois disso um email 'enviando' é considerado abandonado e volta para a fila
+PRAZO_ENVIO = timedelta(minutes=10)
+
+
+def enfileirar_email(destinatario, assunto, corpo):
+    """Grava o email na fila; o envio fica para o worker"""
+    email = EmailPendente(destinatario=destinatario, assunto=assunto, corpo=corpo)
+    db.session.add(email)
+    db.session.commit()
+    return email.id
+
+
+def profundidade_fila():
+    """Quantidade de emails por status, mais os pendentes já vencidos para envio"""
+    contagem = dict(db.session.query(EmailPendente.status, func.count(EmailPendente.id))
+                    .group_by(EmailPendente.status).all())
+    prontos = EmailPendente.query.filter(
+        EmailPendente.status == 'pendente',
+        EmailPendente.proxima_tentativa_em <= datetime.utcnow()
+    ).count()
+    return {
+        'pendente': contagem.get('pendente', 0),
+        'prontos_para_envio': prontos,
+        'enviando': contagem.get('enviando', 0),
+        'enviado': contagem.get('enviado', 0),
+        'falhou': contagem.get('falhou', 0),
+    }
+
+
+def _falha_permanente(erro):
+    """Erros em que repetir o envio não adianta (o servidor recusou de vez)"""
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(erro, smtplib.SMTPAuthenticationError):
+        # Problema de configuração: pode ser corrigido sem perder os emails
+        return False
+    codigo = getattr(erro, 'smtp_code', None)
+    return isinstance(codigo, int) and 500 <= codigo < 600
+
+
+def _registrar_falha(email, erro, agora):
+    email.tentativas += 1
+    email.ultimo_erro = f'{type(erro).__name__}: {erro}'[:1000]
+    if _falha_permanente(erro) or email.tentativas >= MAX_TENTATIVAS:
+        email.status = 'falhou'
+    else:
+        email.status = 'pendente'
+        espera = min(ESPERA_BASE * 2 ** (email.tentativas - 1), ESPERA_MAXIMA)
+        email.proxima_tentativa_em = agora + espera
+
+
+def _mail():
+    """Estado do Flask-Mail da aplicação, criado no primeiro envio"""
+    if 'mail' not in current_app.extensions:
+        from flask_mail import Mail
+        Mail(current_app._get_current_object())
+    return current_app.extensions['mail']
+
+
+def reservar_lote(tamanho, agora):
+    """Marca até `tamanho` emails vencidos como 'enviando' numa só instrução e devolve-os.
+
+    Também retoma os 'enviando' cujo prazo passou (worker que caiu no meio do lote).
+    """
+    vencidos = db.session.query(EmailPendente.id).filter(
+        EmailPendente.status.in_(('pendente', 'enviando')),
+        EmailPendente.proxima_tentativa_em <= agora
+    ).order_by(EmailPendente.proxima_tentativa_em, EmailPendente.id).limit(tamanho)
+    ids = db.session.execute(
+        update(EmailPendente)
+        .where(EmailPendente.id.in_(vencidos.scalar_subquery()))
+        .values(status='enviando', proxima_tentativa_em=agora + PRAZO_ENVIO)
+        .returning(EmailPendente.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.commit()
+    if not ids:
+        return []
+    return EmailPendente.query.filter(EmailPendente.id.in_(ids)).order_by(EmailPendente.id).all()
+
+
+def processar_lote(tamanho=TAMANHO_LOTE):
+    """Envia até `tamanho` emails vencidos por uma só conexão SMTP.
+
+    Retorna (enviados, falhas). Cada email é confirmado no banco logo após o envio,
+    para que uma queda do worker não reenvie o lote inteiro.
+    """
+    agora = datetime.utcnow()
+    lote = reservar_lote(tamanho, agora)
+    if not lote:
+        return 0, 0
+
+    from flask_mail import Message
+    remetente = current_app.config['MAIL_DEFAULT_SENDER']
+    enviados = falhas = 0
+    try:
+        with _mail().connect() as conexao:
+            for email in lote:
+                mensagem = Message(email.assunto, sender=remetente, recipients=[email.destinatario])
+                mensagem.body = email.corpo
+                try:
+                    conexao.send(mensagem)
+                except (smtplib.SMTPException, OSError) as erro:
+                    _registrar_falha(email, erro, agora)
+                    falhas += 1
+                else:
+                    email.status = 'enviado'
+                    email.tentativas += 1
+                    email.enviado_em = datetime.utcnow()
+                    enviados += 1
+                db.session.commit()
+    except (smtplib.SMTPException, OSError) as erro:
+        # Sem conexão com o servidor: o restante do lote volta para a fila com espera
+        for email in lote:
+            if email.status == 'enviando':
+                _registrar_falha(email, erro, agora)
+                falhas += 1
+        db.session.commit()
+        current_app.logger.warning(f'Falha na conexão SMTP: {erro}')
+    return enviados, falhas
+
+
+def executar_worker(intervalo=5, tamanho=TAMANHO_LOTE, continuo=True):
+    """Processa a fila em lotes; em modo contínuo, dorme `intervalo` segundos quando ela esvazia"""
+    total_enviados = total_falhas = 0
+    while True:
+        enviados, falhas = processar_lote(tamanho)
+        total_enviados += enviados
+        total_falhas += falhas
+        if enviados + falhas == 0:
+            if not continuo:
+                return total_enviados, total_falhas
+            relogio.sleep(intervalo)
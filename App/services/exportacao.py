@@ -0,0 +1,81 @@
+"""Exportação de listagens em CSV ou NDJSON, em streaming.
+
+A consulta é lida em lotes (`yield_per`, cursor do servidor) e cada lote vira um
+pedaço da resposta assim que chega; nenhuma lista com todas as linhas é montada, então
+a memória fica constante qualquer que seja o número de linhas, e o primeiro pedaço sai
+logo depois do primeiro lote. A resposta roda com `stream_with_context`, dentro da
+mesma requisição (e da mesma transação de leitura, ou seja, de um mesmo instantâneo).
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from flask import Response, stream_with_context
+from models import db
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+LOTE_EXPORTACAO = 1000
+
+
+def _texto(valor):
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    return valor
+
+
+def _celula_csv(valor):
+    if valor is None:
+        return ''
+    valor = _texto(valor)
+    # Texto começando com =, +, - ou @ viraria fórmula ao abrir o CSV numa planilha
+    if isinstance(valor, str) and valor[:1] in ('=', '+', '-', '@'):
+        return "'" + valor
+    return valor
+
+
+def _linhas_csv(colunas, resultado):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    yield buffer.getvalue()
+    for lote in resultado:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([[_celula_csv(v) for v in linha] for linha in lote])
+        yield buffer.getvalue()
+
+
+def _linhas_ndjson(colunas, resultado):
+    for lote in resultado:
+        yield ''.join(
+            json.dumps(dict(zip(colunas, map(_texto, linha))), ensure_ascii=False) + '\n' for linha in lote
+        )
+
+
+def resposta_exportacao(consulta, nome_arquivo, formato):
+    """Response em streaming com as linhas de `consulta` (um select de colunas rotuladas).
+
+    `formato` é uma chave de FORMATOS_EXPORTACAO; os nomes das colunas vêm dos rótulos.
+    """
+    colunas = [coluna.name for coluna in consulta.selected_columns]
+
+    def lotes():
+        resultado = db.session.execute(consulta.execution_options(yield_per=LOTE_EXPORTACAO))
+        try:
+            yield from resultado.partitions()
+        finally:
+            resultado.close()
+
+    gerador = _linhas_csv if formato == 'csv' else _linhas_ndjson
+    return Response(
+        stream_with_context(gerador(colunas, lotes())),
+        content_type=FORMATOS_EXPORTACAO[formato],
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome_arquivo}.{formato}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        },
+    )
@@ -0,0 +1,98 @@
+"""Busca de quadras por distância ("perto de mim").
+
+As coordenadas das quadras ficam num índice R*Tree do SQLite (`quadras_rtree`,
+mantido por triggers; ver migração 9). A busca pega no índice só as quadras dentro
+do retângulo que envolve o círculo pedido e calcula a distância exata (haversine)
+apenas para essas candidatas.
+"""
+import math
+from sqlalchemy import select, func, text, Table, MetaData, Column, Integer, Float
+from models import db
+from models.quadra_model import Quadra
+
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU_LATITUDE = 111.32
+
+# Raios oferecidos na busca do catálogo
+RAIOS_BUSCA_KM = (1, 2, 5, 10, 25, 50)
+RAIO_PADRAO_KM = 5
+RAIO_MAXIMO_KM = 50
+
+# Tabela virtual criada pela migração 9 (metadata à parte para o create_all não tocar nela)
+quadras_rtree = Table(
+    'quadras_rtree', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('min_lat', Float), Column('max_lat', Float),
+    Column('min_lon', Float), Column('max_lon', Float),
+)
+
+
+def ler_coordenadas(latitude, longitude):
+    """(latitude, longitude) em float, ou (None, None) se as duas vierem vazias.
+
+    Levanta ValueError se só uma vier preenchida ou se estiverem fora do intervalo.
+    """
+    latitude, longitude = (latitude or '').strip(), (longitude or '').strip()
+    if not latitude and not longitude:
+        return None, None
+    latitude, longitude = float(latitude.replace(',', '.')), float(longitude.replace(',', '.'))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('Coordenadas fora do intervalo')
+    return latitude, longitude
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Distância pelo círculo máximo (haversine), em km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def caixa_envolvente(latitude, longitude, raio_km):
+    """(lat_min, lat_max, lon_min, lon_max) do retângulo que contém o círculo"""
+    delta_lat = raio_km / KM_POR_GRAU_LATITUDE
+    lat_min, lat_max = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+    cosseno = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    if cosseno < 1e-6 or raio_km / (KM_POR_GRAU_LATITUDE * cosseno) >= 180:
+        return lat_min, lat_max, -180.0, 180.0
+    delta_lon = raio_km / (KM_POR_GRAU_LATITUDE * cosseno)
+    # Perto do antimeridiano o retângulo daria a volta; usa a faixa inteira de longitudes
+    if longitude - delta_lon < -180 or longitude + delta_lon > 180:
+        return lat_min, lat_max, -180.0, 180.0
+    return lat_min, lat_max, longitude - delta_lon, longitude + delta_lon
+
+
+def quadras_proximas(latitude, longitude, raio_km, filtros=()):
+    """[(distancia_km, quadra_id)] das quadras a até `raio_km`, da mais próxima para a mais distante.
+
+    `filtros` são condições extras sobre Quadra (ativa, tipo, horário livre...), aplicadas
+    na mesma consulta que lê as candidatas do R*Tree.
+    """
+    lat_min, lat_max, lon_min, lon_max = caixa_envolvente(latitude, longitude, raio_km)
+    # likely() diz ao planejador que os filtros de Quadra descartam pouco; assim ele parte
+    # do R*Tree e lê cada candidata pela chave primária, em vez de percorrer o índice de tipo
+    candidatas = db.session.execute(
+        select(Quadra.id, Quadra.latitude, Quadra.longitude)
+        .select_from(quadras_rtree.join(Quadra, Quadra.id == quadras_rtree.c.id))
+        .where(quadras_rtree.c.max_lat >= lat_min, quadras_rtree.c.min_lat <= lat_max,
+               quadras_rtree.c.max_lon >= lon_min, quadras_rtree.c.min_lon <= lon_max,
+               *[func.likely(filtro) for filtro in filtros])
+    ).all()
+    proximas = []
+    for quadra_id, lat, lon in candidatas:
+        distancia = distancia_km(latitude, longitude, lat, lon)
+        if distancia <= raio_km:
+            proximas.append((distancia, quadra_id))
+    proximas.sort()
+    return proximas
+
+
+def reconstruir_indice_geo():
+    """Recarrega o R*Tree a partir das coordenadas de quadras"""
+    db.session.execute(text('DELETE FROM quadras_rtree'))
+    db.session.execute(text(
+        'INSERT INTO quadras_rtree (id, min_lat, max_lat, min_lon, max_lon) '
+        'SELECT id, latitude, latitude, longitude, longitude FROM quadras '
+        'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+    ))
+    db.session.commit()
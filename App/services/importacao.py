@@ -0,0 +1,351 @@
+"""Importação em lote de usuários (donos), quadras e reservas históricas.
+
+O arquivo (CSV com cabeçalho ou JSON Lines, um objeto por linha) é lido registro a
+registro; cada registro é validado e os válidos são gravados em lotes de
+LOTE_IMPORTACAO, um INSERT de várias linhas (executemany) e um commit por lote. Donos,
+usuários e quadras são resolvidos por email (e nome da quadra) com uma consulta por
+lote. Registros com problema não param a importação: entram no relatório com o número
+da linha e o motivo.
+
+Colunas:
+    usuarios  nome, email, role (usuario | dono_quadra), senha ou senha_hash (bcrypt)
+    quadras   nome, endereco, tipo, preco_hora, dono_email, descricao, ativa, latitude, longitude
+    reservas  usuario_email, quadra_id ou (dono_email, quadra), data (AAAA-MM-DD),
+              hora_inicio (HH:MM), hora_fim, status (ativa | cancelada)
+
+Usuários sem senha ficam com um hash que não confere com nenhuma senha; entram pelo
+"esqueci minha senha". As senhas em texto viram hash no pool de processos do serviço
+de senhas, um lote por vez.
+"""
+import csv
+import json
+import time as relogio
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from models import db
+from models.usuario_model import Usuario
+from models.quadra_model import Quadra, TIPOS_QUADRA
+from models.reserva_model import Reserva
+from models.ocupacao_model import HORAS_FUNCIONAMENTO
+from services.senhas import senhas, custo_do_hash
+from services.geo import ler_coordenadas
+from services.reservas import registrar_reservas_em_lote
+
+TIPOS_IMPORTACAO = ('usuarios', 'quadras', 'reservas')
+FORMATOS_IMPORTACAO = ('csv', 'jsonl')
+LOTE_IMPORTACAO = 5000
+ROLES_IMPORTACAO = ('usuario', 'dono_quadra')
+STATUS_IMPORTACAO = ('ativa', 'cancelada')
+# Não é um hash bcrypt: nenhuma senha confere até o usuário redefinir a sua
+SENHA_BLOQUEADA = '!importado'
+
+
+class RelatorioImportacao:
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.lidas = 0
+        self.importadas = 0
+        self.erros = []
+        self.segundos = 0.0
+
+    def erro(self, linha, mensagem):
+        self.erros.append((linha, mensagem))
+
+    def escrever_csv(self, arquivo):
+        """Relatório de erros por linha, em CSV"""
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['linha', 'erro'])
+        escritor.writerows(sorted(self.erros))
+
+
+def formato_do_arquivo(nome):
+    """'csv' ou 'jsonl' pela extensão do arquivo"""
+    return 'csv' if nome.lower().endswith('.csv') else 'jsonl'
+
+
+def ler_registros(arquivo, formato):
+    """(número da linha, registro) de um arquivo de texto; o registro é um dict ou,
+    se a linha não puder ser lida, a exceção com o motivo"""
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+    for numero, linha in enumerate(arquivo, 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield numero, ValueError(f'JSON inválido: {erro.msg}')
+            continue
+        yield numero, registro if isinstance(registro, dict) else ValueError('a linha não é um objeto JSON')
+
+
+# ===== VALIDAÇÃO (um registro por vez) =====
+
+def _texto(registro, campo, obrigatorio=True):
+    valor = registro.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if obrigatorio and not valor:
+        raise ValueError(f'campo obrigatório: {campo}')
+    return valor or None
+
+
+def _email(registro, campo):
+    email = _texto(registro, campo).lower()
+    if '@' not in email:
+        raise ValueError(f'{campo} inválido: {email}')
+    return email
+
+
+def _booleano(registro, campo, padrao):
+    valor = registro.get(campo)
+    if valor is None or valor == '':
+        return padrao
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().lower()
+    if texto in ('1', 'true', 'sim', 's', 'yes'):
+        return True
+    if texto in ('0', 'false', 'nao', 'não', 'n', 'no'):
+        return False
+    raise ValueError(f'{campo} inválido: {valor}')
+
+
+def _hora(texto, campo):
+    try:
+        return time.fromisoformat(texto)
+    except ValueError:
+        raise ValueError(f'{campo} inválida: {texto}')
+
+
+def validar_usuario(registro):
+    role = _texto(registro, 'role', obrigatorio=False) or 'usuario'
+    if role not in ROLES_IMPORTACAO:
+        raise ValueError(f'role inválida: {role}')
+    senha_hash = _texto(registro, 'senha_hash', obrigatorio=False)
+    if senha_hash and custo_do_hash(senha_hash) is None:
+        raise ValueError('senha_hash não é um hash bcrypt')
+    return {
+        'nome': _texto(registro, 'nome'),
+        'email': _email(registro, 'email'),
+        'role': role,
+        'senha': _texto(registro, 'senha', obrigatorio=False),
+        'senha_hash': senha_hash,
+    }
+
+
+def validar_quadra(registro):
+    tipo = _texto(registro, 'tipo').lower()
+    if tipo not in TIPOS_QUADRA:
+        raise ValueError(f'tipo inválido: {tipo}')
+    try:
+        preco_hora = float(_texto(registro, 'preco_hora').replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"preco_hora inválido: {registro.get('preco_hora')}")
+    if preco_hora <= 0:
+        raise ValueError('preco_hora deve ser maior que zero')
+    latitude, longitude = registro.get('latitude'), registro.get('longitude')
+    try:
+        latitude, longitude = ler_coordenadas(None if latitude is None else str(latitude),
+                                              None if longitude is None else str(longitude))
+    except ValueError:
+        raise ValueError('coordenadas inválidas')
+    return {
+        'nome': _texto(registro, 'nome'),
+        'endereco': _texto(registro, 'endereco'),
+        'tipo': tipo,
+        'descricao': _texto(registro, 'descricao', obrigatorio=False),
+        'preco_hora': preco_hora,
+        'ativa': _booleano(registro, 'ativa', True),
+        'latitude': latitude,
+        'longitude': longitude,
+        'dono_email': _email(registro, 'dono_email'),
+    }
+
+
+def validar_reserva(registro):
+    texto = _texto(registro, 'data')
+    try:
+        if len(texto) != 10:
+            raise ValueError
+        data = date.fromisoformat(texto)
+    except ValueError:
+        raise ValueError(f'data inválida: {texto}')
+    hora_inicio = _hora(_texto(registro, 'hora_inicio'), 'hora_inicio')
+    if hora_inicio.minute or hora_inicio.hour not in HORAS_FUNCIONAMENTO:
+        raise ValueError(f'hora_inicio fora dos horários de funcionamento: {hora_inicio:%H:%M}')
+    hora_fim = _texto(registro, 'hora_fim', obrigatorio=False)
+    if hora_fim:
+        hora_fim = _hora(hora_fim, 'hora_fim')
+    else:
+        hora_fim = (datetime.combine(data, hora_inicio) + timedelta(hours=1)).time()
+    status = (_texto(registro, 'status', obrigatorio=False) or 'ativa').lower()
+    if status not in STATUS_IMPORTACAO:
+        raise ValueError(f'status inválido: {status}')
+
+    quadra_id = _texto(registro, 'quadra_id', obrigatorio=False)
+    if quadra_id:
+        if not quadra_id.isdigit():
+            raise ValueError(f'quadra_id inválido: {quadra_id}')
+        quadra = int(quadra_id)
+    else:
+        quadra = (_email(registro, 'dono_email'), _texto(registro, 'quadra'))
+    return {
+        'usuario_email': _email(registro, 'usuario_email'),
+        'quadra': quadra,
+        'data': data,
+        'hora_inicio': hora_inicio,
+        'hora_fim': hora_fim,
+        'status': status,
+    }
+
+
+# ===== GRAVAÇÃO (um lote por vez) =====
+
+def _ids_por_email(emails, role=None):
+    consulta = select(Usuario.email, Usuario.id).where(Usuario.email.in_(emails))
+    if role:
+        consulta = consulta.where(Usuario.role == role)
+    return dict(db.session.execute(consulta).all())
+
+
+def gravar_usuarios(lote, relatorio, vistos):
+    existentes = set(_ids_por_email({u['email'] for _, u in lote}))
+    validos = []
+    for numero, usuario in lote:
+        if usuario['email'] in existentes or usuario['email'] in vistos:
+            relatorio.erro(numero, f"email já cadastrado: {usuario['email']}")
+            continue
+        vistos.add(usuario['email'])
+        validos.append(usuario)
+
+    com_senha = [u for u in validos if u['senha'] and not u['senha_hash']]
+    for usuario, senha_hash in zip(com_senha, senhas.gerar_hashes([u['senha'] for u in com_senha])):
+        usuario['senha_hash'] = senha_hash
+    agora = datetime.utcnow()
+    linhas = [{'nome': u['nome'], 'email': u['email'], 'role': u['role'], 'criado_em': agora,
+               'senha_hash': u['senha_hash'] or SENHA_BLOQUEADA, 'tentativas_login': 0} for u in validos]
+    if linhas:
+        db.session.execute(Usuario.__table__.insert(), linhas)
+    return len(linhas)
+
+
+def gravar_quadras(lote, relatorio, vistos):
+    donos = _ids_por_email({q['dono_email'] for _, q in lote}, role='dono_quadra')
+    agora = datetime.utcnow()
+    linhas = []
+    for numero, quadra in lote:
+        dono_id = donos.get(quadra.pop('dono_email'))
+        if dono_id is None:
+            relatorio.erro(numero, 'dono não encontrado (ou não é dono de quadra)')
+            continue
+        linhas.append({**quadra, 'dono_id': dono_id, 'criado_em': agora})
+    if linhas:
+        db.session.execute(Quadra.__table__.insert(), linhas)
+    return len(linhas)
+
+
+def _resolver_quadras(chaves):
+    """{chave: quadra_id} para ids (int) e pares (email do dono, nome da quadra)"""
+    ids = {c for c in chaves if isinstance(c, int)}
+    pares = {c for c in chaves if not isinstance(c, int)}
+    resolvidas = {}
+    if ids:
+        resolvidas.update((i, i) for i in db.session.execute(select(Quadra.id).where(Quadra.id.in_(ids))).scalars())
+    if pares:
+        linhas = db.session.execute(
+            select(Usuario.email, Quadra.nome, Quadra.id)
+            .join(Quadra, Quadra.dono_id == Usuario.id)
+            .where(tuple_(Usuario.email, Quadra.nome).in_(pares))
+        ).all()
+        for email, nome, quadra_id in linhas:
+            # Nome repetido no mesmo dono: ambíguo, a reserva não é importada
+            resolvidas[(email, nome)] = None if (email, nome) in resolvidas else quadra_id
+    return resolvidas
+
+
+def gravar_reservas(lote, relatorio, vistos):
+    usuarios = _ids_por_email({r['usuario_email'] for _, r in lote})
+    quadras = _resolver_quadras({r['quadra'] for _, r in lote})
+    agora = datetime.utcnow()
+    linhas, numeros = [], {}
+    for numero, reserva in lote:
+        usuario_id = usuarios.get(reserva['usuario_email'])
+        quadra_id = quadras.get(reserva['quadra'])
+        if usuario_id is None:
+            relatorio.erro(numero, f"usuário não encontrado: {reserva['usuario_email']}")
+            continue
+        if quadra_id is None:
+            relatorio.erro(numero, 'quadra não encontrada' if reserva['quadra'] not in quadras
+                           else 'quadra ambígua: o dono tem mais de uma quadra com esse nome')
+            continue
+        linhas.append({'quadra_id': quadra_id, 'usuario_id': usuario_id, 'data': reserva['data'],
+                       'hora_inicio': reserva['hora_inicio'], 'hora_fim': reserva['hora_fim'],
+                       'status': reserva['status'], 'criado_em': agora, 'atualizado_em': agora})
+        if reserva['status'] == 'ativa':
+            numeros.setdefault((quadra_id, reserva['data'], reserva['hora_inicio']), []).append(numero)
+    if not linhas:
+        return 0
+
+    # O índice único parcial decide os conflitos com reservas ativas (já gravadas ou
+    # repetidas no arquivo); as que não voltam no RETURNING não foram inseridas
+    tabela = Reserva.__table__
+    inseridas = db.session.execute(
+        insert(tabela).on_conflict_do_nothing(
+            index_elements=['quadra_id', 'data', 'hora_inicio'],
+            # Literal: parâmetros no WHERE do índice não combinam com executemany
+            index_where=text("status = 'ativa'")
+        ).returning(tabela.c.quadra_id, tabela.c.data, tabela.c.hora_inicio, tabela.c.status),
+        linhas
+    ).all()
+    ativas_inseridas = {(q, d, h) for q, d, h, status in inseridas if status == 'ativa'}
+    for chave, linhas_do_horario in numeros.items():
+        rejeitadas = linhas_do_horario[1:] if chave in ativas_inseridas else linhas_do_horario
+        for numero in rejeitadas:
+            relatorio.erro(numero, 'horário já ocupado por outra reserva ativa')
+
+    registrar_reservas_em_lote([(q, d, h.hour, status) for q, d, h, status in inseridas])
+    return len(inseridas)
+
+
+VALIDADORES = {'usuarios': validar_usuario, 'quadras': validar_quadra, 'reservas': validar_reserva}
+GRAVADORES = {'usuarios': gravar_usuarios, 'quadras': gravar_quadras, 'reservas': gravar_reservas}
+
+
+def importar(tipo, arquivo, formato, lote=LOTE_IMPORTACAO):
+    """Importa os registros de `arquivo` (aberto em modo texto); retorna o RelatorioImportacao"""
+    relatorio = RelatorioImportacao(tipo)
+    validar, gravar = VALIDADORES[tipo], GRAVADORES[tipo]
+    vistos = set()
+    pendentes = []
+    inicio = relogio.perf_counter()
+
+    def gravar_pendentes():
+        relatorio.importadas += gravar(pendentes, relatorio, vistos)
+        db.session.commit()
+        pendentes.clear()
+
+    numero = 0
+    try:
+        for numero, registro in ler_registros(arquivo, formato):
+            relatorio.lidas += 1
+            try:
+                if isinstance(registro, Exception):
+                    raise registro
+                pendentes.append((numero, validar(registro)))
+            except ValueError as erro:
+                relatorio.erro(numero, str(erro))
+                continue
+            if len(pendentes) >= lote:
+                gravar_pendentes()
+    except (UnicodeDecodeError, csv.Error) as erro:
+        # Arquivo corrompido ou em outra codificação: o que já foi lido é gravado
+        relatorio.erro(numero + 1, f'leitura interrompida: {erro}')
+    if pendentes:
+        gravar_pendentes()
+
+    relatorio.segundos = relogio.perf_counter() - inicio
+    return relatorio
@@ -0,0 +1,40 @@
+"""Criação do esquema e dos dados iniciais.
+
+Roda por comando (`flask inicializar-banco`) e não ao importar a aplicação, para que
+vários processos do servidor não disputem a criação das tabelas e do admin.
+"""
+from models import db
+from models.usuario_model import Usuario
+# Registra todas as tabelas no metadata antes do create_all
+from models import quadra_model, reserva_model, ocupacao_model, email_model, bloqueio_model, serie_model, resumo_model  # noqa: F401
+from services.migracoes import aplicar_migracoes
+
+EMAIL_ADMIN_PADRAO = 'admin@resergol.com'
+# Hash de 'admin123' (custo 12). Evita rodar o bcrypt na inicialização;
+# no primeiro login o hash é refeito com o custo configurado.
+SENHA_ADMIN_PADRAO_HASH = '$2b$12$BR9fAbm4je8hyUru19aSleysPL9FuRChc6JQabBmJty56iiFCYmjG'
+
+
+def criar_admin_padrao():
+    """Cria o admin padrão se ainda não existir; retorna True se criou"""
+    if Usuario.query.filter_by(email=EMAIL_ADMIN_PADRAO).first():
+        return False
+    admin = Usuario(
+        nome='Administrador',
+        email=EMAIL_ADMIN_PADRAO,
+        senha_hash=SENHA_ADMIN_PADRAO_HASH,
+        role='admin'
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+
+def inicializar_banco():
+    """Cria as tabelas, aplica as migrações pendentes e cria o admin padrão.
+
+    Retorna (migrações aplicadas, admin criado).
+    """
+    db.create_all()
+    aplicadas = aplicar_migracoes()
+    return aplicadas, criar_admin_padrao()
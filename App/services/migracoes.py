@@ -0,0 +1,441 @@
+"""Migrações versionadas do esquema SQLite.
+
+`db.create_all()` só cria tabelas que ainda não existem; índices, colunas novas e
+ajustes de dados em um banco já em uso ficam aqui. Cada migração roda uma única vez,
+em ordem, dentro de uma transação, e a versão aplicada fica registrada em `schema_versao`.
+Os passos são idempotentes, pois num banco novo o `create_all` já criou os índices
+declarados nos models.
+"""
+import contextvars
+import html
+import re
+from itertools import islice
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from models import db, datetime
+from services.resumos import RECONSTRUIR_RESUMOS_SQL
+from models.reserva_model import Reserva
+from services.arquivamento import COLUNAS_RESERVA
+
+class MigracaoBloqueada(Exception):
+    """Dados do banco impedem a migração; precisam ser corrigidos por alguém antes"""
+
+
+def _recusar_reservas_duplicadas(conexao):
+    """Bancos antigos podem ter duas reservas ativas no mesmo horário. Cancelar uma delas
+    aqui tiraria a reserva de um cliente sem aviso, então a migração para e lista os
+    horários para o admin resolver."""
+    duplicadas = conexao.execute(text(
+        """SELECT quadra_id, data, hora_inicio, group_concat(id, ', ') FROM reservas
+           WHERE status = 'ativa' GROUP BY quadra_id, data, hora_inicio HAVING COUNT(*) > 1
+           ORDER BY quadra_id, data, hora_inicio"""
+    )).all()
+    if duplicadas:
+        horarios = '\n'.join(f'  quadra {quadra_id}, {data} {str(hora)[:5]}: reservas {ids}'
+                             for quadra_id, data, hora, ids in duplicadas)
+        raise MigracaoBloqueada(
+            f'{len(duplicadas)} horário(s) com mais de uma reserva ativa:\n{horarios}\n'
+            'Cancele as reservas excedentes (em /admin/quadra/<id>/reservas) avisando os clientes '
+            'e rode de novo `flask --app app inicializar-banco`.'
+        )
+
+
+def _adicionar_serie_id(conexao):
+    colunas = [linha[1] for linha in conexao.execute(text('PRAGMA table_info(reservas)'))]
+    if 'serie_id' not in colunas:
+        conexao.execute(text('ALTER TABLE reservas ADD COLUMN serie_id INTEGER REFERENCES series_reserva (id)'))
+
+
+def _adicionar_coordenadas(conexao):
+    colunas = [linha[1] for linha in conexao.execute(text('PRAGMA table_info(quadras)'))]
+    for coluna in ('latitude', 'longitude'):
+        if coluna not in colunas:
+            conexao.execute(text(f'ALTER TABLE quadras ADD COLUMN {coluna} FLOAT'))
+
+
+def _adicionar_versao_ocupacao(conexao):
+    colunas = [linha[1] for linha in conexao.execute(text('PRAGMA table_info(ocupacao_diaria)'))]
+    if 'versao' not in colunas:
+        conexao.execute(text('ALTER TABLE ocupacao_diaria ADD COLUMN versao INTEGER NOT NULL DEFAULT 0'))
+
+
+def _adicionar_atualizado_em_quadras(conexao):
+    colunas = [linha[1] for linha in conexao.execute(text('PRAGMA table_info(quadras)'))]
+    if 'atualizado_em' not in colunas:
+        conexao.execute(text('ALTER TABLE quadras ADD COLUMN atualizado_em DATETIME'))
+
+
+VIEW_HISTORICO_SQL = f"""CREATE VIEW IF NOT EXISTS reservas_historico AS
+    SELECT {COLUNAS_RESERVA}, 0 AS arquivada FROM reservas
+    UNION ALL
+    SELECT {COLUNAS_RESERVA}, 1 AS arquivada FROM reservas_arquivo"""
+
+
+def _reservas_com_autoincrement(conexao):
+    """Reconstrói `reservas` com AUTOINCREMENT, para que um id arquivado nunca seja reusado.
+
+    Sem ele o SQLite dá a uma reserva nova o maior id da tabela + 1, que pode ser o id de
+    uma reserva já movida para `reservas_arquivo`. Reservas vivas que já repetiram um id
+    do arquivo ganham um id novo.
+    """
+    ddl = conexao.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'reservas'")).scalar()
+    if 'AUTOINCREMENT' in ddl.upper():
+        return
+    conexao.execute(text('DROP VIEW IF EXISTS reservas_historico'))
+    conexao.execute(text("""CREATE TABLE reservas_nova (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quadra_id INTEGER NOT NULL REFERENCES quadras (id),
+        usuario_id INTEGER NOT NULL REFERENCES usuarios (id),
+        serie_id INTEGER REFERENCES series_reserva (id),
+        data DATE NOT NULL,
+        hora_inicio TIME NOT NULL,
+        hora_fim TIME NOT NULL,
+        status VARCHAR(20),
+        criado_em DATETIME,
+        atualizado_em DATETIME)"""))
+    conexao.execute(text("""INSERT INTO sqlite_sequence (name, seq) SELECT 'reservas_nova', MAX(
+        (SELECT COALESCE(MAX(id), 0) FROM reservas), (SELECT COALESCE(MAX(id), 0) FROM reservas_arquivo))"""))
+    sem_id = COLUNAS_RESERVA.replace('id, ', '', 1)
+    conexao.execute(text(f"""INSERT INTO reservas_nova ({COLUNAS_RESERVA}) SELECT {COLUNAS_RESERVA} FROM reservas
+        WHERE id NOT IN (SELECT id FROM reservas_arquivo)"""))
+    conexao.execute(text(f"""INSERT INTO reservas_nova ({sem_id}) SELECT {sem_id} FROM reservas
+        WHERE id IN (SELECT id FROM reservas_arquivo) ORDER BY id"""))
+    conexao.execute(text('DROP TABLE reservas'))
+    conexao.execute(text('ALTER TABLE reservas_nova RENAME TO reservas'))
+    for indice in Reserva.__table__.indexes:
+        indice.create(conexao)
+    conexao.execute(text(VIEW_HISTORICO_SQL))
+
+
+MIGRACOES = [
+    (1, 'Índice único parcial de horários ativos', [
+        _recusar_reservas_duplicadas,
+        """CREATE UNIQUE INDEX IF NOT EXISTS ux_reservas_horario_ativo
+           ON reservas (quadra_id, data, hora_inicio) WHERE status = 'ativa'""",
+    ]),
+    (2, 'Carga inicial do índice de ocupação', [
+        'DELETE FROM ocupacao_diaria',
+        """INSERT INTO ocupacao_diaria (quadra_id, data, mascara)
+           SELECT quadra_id, data, SUM(1 << CAST(substr(hora_inicio, 1, 2) AS INTEGER))
+           FROM reservas WHERE status = 'ativa'
+           GROUP BY quadra_id, data""",
+    ]),
+    (3, 'Índices das consultas dos controllers', [
+        'CREATE INDEX IF NOT EXISTS ix_reservas_quadra_data_status ON reservas (quadra_id, data, status)',
+        'CREATE INDEX IF NOT EXISTS ix_reservas_usuario_data_hora ON reservas (usuario_id, data, hora_inicio)',
+        'CREATE INDEX IF NOT EXISTS ix_quadras_ativa ON quadras (ativa)',
+        'CREATE INDEX IF NOT EXISTS ix_quadras_dono_id ON quadras (dono_id)',
+        'CREATE INDEX IF NOT EXISTS ix_usuarios_role ON usuarios (role)',
+    ]),
+    (4, 'Índice da paginação das reservas por quadra', [
+        'CREATE INDEX IF NOT EXISTS ix_reservas_quadra_data_hora ON reservas (quadra_id, data, hora_inicio)',
+    ]),
+    (5, 'Busca textual (FTS5) de quadras e usuários', [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS quadras_fts USING fts5(
+               nome, endereco, descricao, tipo, content='quadras', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+        """CREATE TRIGGER IF NOT EXISTS quadras_fts_insert AFTER INSERT ON quadras BEGIN
+               INSERT INTO quadras_fts (rowid, nome, endereco, descricao, tipo)
+               VALUES (new.id, new.nome, new.endereco, new.descricao, new.tipo);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS quadras_fts_delete AFTER DELETE ON quadras BEGIN
+               INSERT INTO quadras_fts (quadras_fts, rowid, nome, endereco, descricao, tipo)
+               VALUES ('delete', old.id, old.nome, old.endereco, old.descricao, old.tipo);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS quadras_fts_update AFTER UPDATE OF nome, endereco, descricao, tipo
+           ON quadras BEGIN
+               INSERT INTO quadras_fts (quadras_fts, rowid, nome, endereco, descricao, tipo)
+               VALUES ('delete', old.id, old.nome, old.endereco, old.descricao, old.tipo);
+               INSERT INTO quadras_fts (rowid, nome, endereco, descricao, tipo)
+               VALUES (new.id, new.nome, new.endereco, new.descricao, new.tipo);
+           END""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS usuarios_fts USING fts5(
+               nome, email, content='usuarios', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_insert AFTER INSERT ON usuarios BEGIN
+               INSERT INTO usuarios_fts (rowid, nome, email) VALUES (new.id, new.nome, new.email);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_delete AFTER DELETE ON usuarios BEGIN
+               INSERT INTO usuarios_fts (usuarios_fts, rowid, nome, email)
+               VALUES ('delete', old.id, old.nome, old.email);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS usuarios_fts_update AFTER UPDATE OF nome, email ON usuarios BEGIN
+               INSERT INTO usuarios_fts (usuarios_fts, rowid, nome, email)
+               VALUES ('delete', old.id, old.nome, old.email);
+               INSERT INTO usuarios_fts (rowid, nome, email) VALUES (new.id, new.nome, new.email);
+           END""",
+        "INSERT INTO quadras_fts (quadras_fts) VALUES ('rebuild')",
+        "INSERT INTO usuarios_fts (usuarios_fts) VALUES ('rebuild')",
+    ]),
+    (6, 'Índice da limpeza de bloqueios de login vencidos', [
+        'CREATE INDEX IF NOT EXISTS ix_usuarios_bloqueado_ate ON usuarios (bloqueado_ate)',
+    ]),
+    (7, 'Reservas semanais recorrentes', [
+        # A tabela series_reserva é criada pelo create_all
+        _adicionar_serie_id,
+        'CREATE INDEX IF NOT EXISTS ix_reservas_serie_id ON reservas (serie_id)',
+    ]),
+    (8, 'Índice da busca de quadras livres', [
+        'CREATE INDEX IF NOT EXISTS ix_quadras_tipo_ativa_preco ON quadras (tipo, ativa, preco_hora)',
+        'CREATE INDEX IF NOT EXISTS ix_quadras_ativa_preco ON quadras (ativa, preco_hora)',
+    ]),
+    (9, 'Coordenadas das quadras e índice espacial (R*Tree)', [
+        _adicionar_coordenadas,
+        'CREATE VIRTUAL TABLE IF NOT EXISTS quadras_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)',
+        """CREATE TRIGGER IF NOT EXISTS quadras_rtree_insert AFTER INSERT ON quadras
+           WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+               INSERT INTO quadras_rtree (id, min_lat, max_lat, min_lon, max_lon)
+               VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS quadras_rtree_delete AFTER DELETE ON quadras BEGIN
+               DELETE FROM quadras_rtree WHERE id = old.id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS quadras_rtree_update AFTER UPDATE OF latitude, longitude ON quadras BEGIN
+               DELETE FROM quadras_rtree WHERE id = old.id;
+               INSERT INTO quadras_rtree (id, min_lat, max_lat, min_lon, max_lon)
+               SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+               WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+           END""",
+        'DELETE FROM quadras_rtree',
+        """INSERT INTO quadras_rtree (id, min_lat, max_lat, min_lon, max_lon)
+           SELECT id, latitude, latitude, longitude, longitude FROM quadras
+           WHERE latitude IS NOT NULL AND longitude IS NOT NULL""",
+    ]),
+    # As tabelas de resumo vêm do create_all; aqui só são preenchidas com o histórico
+    (10, 'Resumos diários, mensais e por horário das reservas',
+     [sql.format(origem='reservas') for sql in RECONSTRUIR_RESUMOS_SQL]),
+    # A tabela reservas_arquivo vem do create_all
+    (11, 'Arquivo de reservas antigas e view do histórico', [
+        VIEW_HISTORICO_SQL,
+    ]),
+    (12, 'Versão por quadra para o cache dos cartões do catálogo', [
+        _adicionar_atualizado_em_quadras,
+        'UPDATE quadras SET atualizado_em = criado_em WHERE atualizado_em IS NULL',
+    ]),
+    (13, 'Versão de cada dia do índice de ocupação', [
+        _adicionar_versao_ocupacao,
+        """CREATE TRIGGER IF NOT EXISTS ocupacao_diaria_versao AFTER UPDATE OF mascara ON ocupacao_diaria
+           WHEN new.mascara IS NOT old.mascara BEGIN
+               UPDATE ocupacao_diaria SET versao = old.versao + 1
+               WHERE quadra_id = new.quadra_id AND data = new.data;
+           END""",
+    ]),
+    # Num banco novo o create_all já cria a tabela com AUTOINCREMENT
+    (14, 'Ids de reservas nunca reusados depois do arquivamento', [
+        _reservas_com_autoincrement,
+    ]),
+]
+
+
+def versao_atual(conexao):
+    """Maior versão já aplicada (0 para um banco sem migrações)"""
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_versao ('
+        'versao INTEGER PRIMARY KEY, descricao VARCHAR(255) NOT NULL, aplicada_em DATETIME NOT NULL)'
+    ))
+    return conexao.execute(text('SELECT COALESCE(MAX(versao), 0) FROM schema_versao')).scalar()
+
+
+def aplicar_migracoes(engine=None):
+    """Aplica as migrações pendentes e retorna as versões aplicadas"""
+    engine = engine or db.engine
+    aplicadas = []
+    with engine.begin() as conexao:
+        atual = versao_atual(conexao)
+    for versao, descricao, passos in MIGRACOES:
+        if versao <= atual:
+            continue
+        with engine.begin() as conexao:
+            for passo in passos:
+                if callable(passo):
+                    passo(conexao)
+                else:
+                    conexao.execute(text(passo))
+            conexao.execute(
+                text('INSERT INTO schema_versao (versao, descricao, aplicada_em) VALUES (:v, :d, :a)'),
+                {'v': versao, 'd': descricao, 'a': datetime.utcnow()}
+            )
+        aplicadas.append(versao)
+    return aplicadas
+
+
+# ===== VERIFICAÇÃO DOS PLANOS DE CONSULTA =====
+
+# Rotas que leem a tabela inteira por definição (exportação completa)
+VARREDURAS_ESPERADAS = {'admin.exportar_usuarios'}
+# Varreduras de índice aceitas, por rota: a contagem limitada da paginação das listas
+# sem filtro (no máximo LIMITE_CONTAGEM + 1 entradas) e a contagem por status da fila
+# de emails, que percorre o índice de status da fila
+VARREDURAS_DE_INDICE_ESPERADAS = {
+    ('admin.usuarios', 'ix_usuarios_bloqueado_ate'),
+    ('admin.quadras', 'ix_quadras_ativa'),
+    ('admin.fila_emails', 'ix_email_outbox_status_proxima'),
+}
+
+
+def _variantes(hoje, quadra, busca_quadra):
+    """Query strings visitadas além da página base de cada rota (filtros, buscas e histórico)"""
+    return {
+        'quadras.listar': [f'tipo=futsal&data={hoje}&hora=19:00',
+                           f'tipo=futsal&data={hoje}&hora=18:00&hora_ate=21:00',
+                           'lat=-23.55&lon=-46.63&raio=5'],
+        'reservas.minhas_reservas': ['historico=1'],
+        'reservas.disponibilidade': ['tipo=futsal'] + ([f'quadras={quadra}'] if quadra else []),
+        'quadras.ver_reservas': ['status=ativa', f'data={hoje}', 'historico=1'],
+        'admin.ver_reservas_quadra': ['status=ativa', f'data={hoje}', 'historico=1'],
+        'admin.usuarios': ['busca=adm'],
+        'admin.quadras': [f'busca={busca_quadra}', 'tipo=futsal&status=ativa'],
+        'admin.sugerir_usuarios': ['q=adm'],
+        'admin.sugerir_quadras': [f'q={busca_quadra}'],
+    }
+
+
+def _caminhos_das_rotas(app):
+    """URLs GET das rotas `@somente_leitura` (que não gravam nada), com ids do próprio banco"""
+    from datetime import date
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    quadra = Quadra.query.order_by(Quadra.id).first()
+    usuario = Usuario.query.filter_by(role='usuario').order_by(Usuario.id).first()
+    valores = {'quadra_id': quadra.id if quadra else None, 'usuario_id': usuario.id if usuario else None}
+    busca_quadra = quadra.nome.split()[0][:3] if quadra else 'qua'
+    variantes = _variantes(date.today().isoformat(), valores['quadra_id'], busca_quadra)
+
+    adaptador = app.url_map.bind('localhost')
+    caminhos = []
+    for regra in app.url_map.iter_rules():
+        view = app.view_functions[regra.endpoint]
+        if 'GET' not in regra.methods or not getattr(view, 'somente_leitura', False):
+            continue
+        if any(valores.get(argumento) is None for argumento in regra.arguments):
+            continue
+        caminho = adaptador.build(regra.endpoint, {a: valores[a] for a in regra.arguments})
+        # por_pagina=1 garante uma segunda página (cursor) e pula o cache de página do catálogo
+        for consulta in ['por_pagina=1'] + variantes.get(regra.endpoint, []):
+            separador = '&' if '?' in caminho else '?'
+            caminhos.append((regra.endpoint,
+                             f'{caminho}{separador}{consulta}' + ('' if 'por_pagina' in consulta else '&por_pagina=1')))
+    return caminhos
+
+
+def _visitantes():
+    """Ids dos perfis que visitam as rotas: anônimo, usuário, dono de quadra e admin"""
+    from models.usuario_model import Usuario
+    from models.quadra_model import Quadra
+
+    quadra = Quadra.query.order_by(Quadra.id).first()
+    ids = [None]
+    for usuario in (Usuario.query.filter_by(role='usuario').order_by(Usuario.id).first(),
+                    quadra.dono if quadra else None,
+                    Usuario.query.filter_by(role='admin').order_by(Usuario.id).first()):
+        if usuario is not None:
+            ids.append(usuario.id)
+    return ids
+
+
+def _capturar_consultas(app, caminhos, visitantes):
+    """Visita as rotas com o test_client e retorna {sql: (endpoint, caminho, parâmetros)} dos SELECTs"""
+    capturadas = {}
+    atual = {}
+
+    def capturar(conn, cursor, sql, parametros, context, executemany):
+        if not executemany and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            capturadas.setdefault(sql, (atual['endpoint'], atual['caminho'], parametros))
+
+    event.listen(Engine, 'before_cursor_execute', capturar)
+    try:
+        for usuario_id in visitantes:
+            cliente = app.test_client()
+            if usuario_id is not None:
+                with cliente.session_transaction() as sessao:
+                    sessao['_user_id'] = str(usuario_id)
+                    sessao['_fresh'] = True
+            for endpoint, caminho in caminhos:
+                atual.update(endpoint=endpoint, caminho=caminho)
+                resposta = cliente.get(caminho, buffered=False)
+                # Exportações são streams: o primeiro bloco já executou a consulta
+                corpo = b''.join(islice(resposta.response, 2)).decode('utf-8', 'replace')
+                resposta.close()
+                # Segunda página da paginação por cursor (keyset)
+                seguinte = re.search(r'href="([^"]*[?&](?:amp;)?cursor=[^"]*)"', corpo)
+                if seguinte:
+                    atual['caminho'] = html.unescape(seguinte.group(1))
+                    cliente.get(atual['caminho']).close()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', capturar)
+    return capturadas
+
+
+def _nivel_externo(sql):
+    """O SQL sem o conteúdo entre parênteses: só as cláusulas da consulta mais externa"""
+    partes, profundidade = [], 0
+    for caractere in sql:
+        if caractere == '(':
+            profundidade += 1
+        elif caractere == ')':
+            profundidade -= 1
+        elif profundidade == 0:
+            partes.append(caractere)
+    return ''.join(partes)
+
+
+def _varredura_completa(plano, sql, indices_aceitos=()):
+    """Se alguma etapa do plano percorre uma tabela ou um índice inteiro.
+
+    `plano` são as linhas (id, pai, _, detalhe) do EXPLAIN QUERY PLAN. `SCAN t USING
+    [COVERING] INDEX` também é varredura. Não contam: tabelas virtuais (como o
+    R*Tree) com alguma restrição, o resultado de uma subconsulta
+    (CO-ROUTINE/MATERIALIZE) e o laço mais externo da consulta mais externa quando ela
+    tem ORDER BY e LIMIT e lê na ordem do índice, sem ordenação à parte (a primeira
+    página de uma lista sem filtro para no limite). `indices_aceitos` lista os índices
+    cuja varredura foi aceita explicitamente.
+    """
+    subconsultas = {m.group(1) for *_, d in plano for m in [re.match(r'(?:CO-ROUTINE|MATERIALIZE) (\S+)', d)] if m}
+    externo = _nivel_externo(sql)
+    externas = [linha for linha in plano if linha[1] == 0]
+    pagina_na_ordem = (re.search(r'\bORDER BY\b', externo) and re.search(r'\bLIMIT\b', externo)
+                       and not any('TEMP B-TREE FOR' in d and 'ORDER BY' in d for *_, d in externas))
+    lacos = [linha for linha in externas if linha[3].startswith(('SCAN ', 'SEARCH '))]
+    primeiro_laco = lacos[0] if lacos else None
+    for linha in plano:
+        detalhe = linha[3]
+        if not detalhe.startswith('SCAN ') or 'CONSTANT ROW' in detalhe:
+            continue
+        if re.search(r'VIRTUAL TABLE INDEX \d+:\S', detalhe) or detalhe.split()[1] in subconsultas:
+            continue
+        if pagina_na_ordem and linha is primeiro_laco:
+            continue
+        indice = re.search(r'USING (?:COVERING )?INDEX (\S+)', detalhe)
+        if indice and indice.group(1) in indices_aceitos:
+            continue
+        return True
+    return False
+
+
+def verificar_planos(app):
+    """Roda EXPLAIN QUERY PLAN em cada SELECT que as rotas de leitura executam de fato.
+
+    As rotas `@somente_leitura` são visitadas (GET) por cada perfil de usuário, com
+    filtros, buscas e a segunda página de cada lista. Retorna uma lista de
+    (caminho, sql, plano, ok); `ok` é falso se alguma etapa do plano fizer varredura
+    completa de tabela.
+    """
+    caminhos = _caminhos_das_rotas(app)
+    visitantes = _visitantes()
+    db.session.rollback()
+    # As requisições simuladas rodam num contexto vazio, para cada uma abrir o próprio
+    # contexto de aplicação (e o próprio `g`) em vez de herdar o do comando
+    capturadas = contextvars.Context().run(_capturar_consultas, app, caminhos, visitantes)
+
+    resultado = []
+    conexao = db.engine.raw_connection()
+    try:
+        for sql, (endpoint, caminho, parametros) in capturadas.items():
+            plano = conexao.cursor().execute('EXPLAIN QUERY PLAN ' + sql, parametros).fetchall()
+            aceitos = {indice for rota, indice in VARREDURAS_DE_INDICE_ESPERADAS if rota == endpoint}
+            ok = endpoint in VARREDURAS_ESPERADAS or not _varredura_completa(plano, sql, aceitos)
+            resultado.append((caminho, sql, [linha[3] for linha in plano], ok))
+    finally:
+        conexao.close()
+    return resultado
@@ -0,0 +1,55 @@
+"""Orçamento de comandos SQL por rota.
+
+Cada rota pode declarar quantos comandos SQL pode executar por requisição com
+`@orcamento_queries(n)`, que vale para GET/HEAD; os demais métodos têm orçamento
+próprio, por exemplo `@orcamento_queries(4, POST=8)`, e sem ele não são checados. Os
+comandos são contados por evento do SQLAlchemy; quando a rota estoura o orçamento, o
+aviso vai para o log ou, com `ORCAMENTO_QUERIES_ESTRITO = True`, a requisição falha.
+A checagem roda ao final da requisição, depois de qualquer commit: o modo estrito é
+para desenvolvimento e CI, o erro não desfaz o que foi gravado.
+"""
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class OrcamentoQueriesExcedido(Exception):
+    pass
+
+
+def orcamento_queries(limite, **por_metodo):
+    """Declara o número máximo de comandos SQL da rota em GET/HEAD e, opcionalmente, por método"""
+    def decorador(view):
+        view.orcamento_queries = {'GET': limite, 'HEAD': limite, **por_metodo}
+        return view
+    return decorador
+
+
+def limite_do_orcamento(view, metodo):
+    """Orçamento da rota para o método HTTP, ou None se não houver"""
+    return getattr(view, 'orcamento_queries', {}).get(metodo)
+
+
+def _contar_comando(conn, cursor, sql, parametros, context, executemany):
+    # BEGIN é controle de transação (ver services/armazenamento.py), não uma consulta
+    if has_request_context() and not sql.startswith('BEGIN'):
+        g.total_queries = g.get('total_queries', 0) + 1
+
+
+def init_orcamento_queries(app):
+    """Liga a contagem de comandos SQL e a checagem do orçamento ao final de cada requisição"""
+    if not event.contains(Engine, 'before_cursor_execute', _contar_comando):
+        event.listen(Engine, 'before_cursor_execute', _contar_comando)
+
+    @app.after_request
+    def checar_orcamento(response):
+        view = current_app.view_functions.get(request.endpoint)
+        limite = limite_do_orcamento(view, request.method)
+        total = g.get('total_queries', 0)
+        response.headers['X-Total-Queries'] = str(total)
+        if limite is not None and total > limite:
+            mensagem = f'{request.endpoint} executou {total} comandos SQL (orçamento: {limite})'
+            if current_app.config.get('ORCAMENTO_QUERIES_ESTRITO'):
+                raise OrcamentoQueriesExcedido(mensagem)
+            current_app.logger.warning(mensagem)
+        return response
@@ -0,0 +1,165 @@
+"""Paginação por cursor (keyset).
+
+A página seguinte é buscada a partir dos valores de ordenação do último item exibido
+(`WHERE (data, hora_inicio, id) < (...)`), e não por OFFSET. O custo de cada página é
+o mesmo em qualquer profundidade e inserções concorrentes não deslocam os itens entre
+páginas. Os cursores são opacos para o navegador (JSON em base64).
+
+O total exibido também tem custo limitado: a contagem para em `LIMITE_CONTAGEM` e,
+acima disso, a página mostra "mais de N".
+"""
+import base64
+import bisect
+import json
+from datetime import date, time
+from flask import request, url_for
+from sqlalchemy import func, inspect, tuple_
+
+POR_PAGINA_PADRAO = 20
+POR_PAGINA_MAXIMO = 100
+LIMITE_CONTAGEM = 1000
+
+
+class Pagina:
+    def __init__(self, itens, total, anterior, proximo, limite_contagem=None):
+        self.itens = itens
+        self.total = total
+        self.anterior = anterior
+        self.proximo = proximo
+        self.limite_contagem = limite_contagem
+
+    @property
+    def total_excede_limite(self):
+        return self.limite_contagem is not None and self.total > self.limite_contagem
+
+    @property
+    def total_exibido(self):
+        return f'mais de {self.limite_contagem}' if self.total_excede_limite else str(self.total)
+
+    def _url(self, cursor):
+        argumentos = request.args.to_dict()
+        argumentos['cursor'] = cursor
+        return url_for(request.endpoint, **request.view_args, **argumentos)
+
+    @property
+    def url_anterior(self):
+        return self._url(self.anterior) if self.anterior else None
+
+    @property
+    def url_proximo(self):
+        return self._url(self.proximo) if self.proximo else None
+
+
+def _codificar(direcao, valores):
+    valores = [v.isoformat() if isinstance(v, (date, time)) else v for v in valores]
+    texto = json.dumps([direcao, valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _ler_cursor(cursor, tamanho):
+    """(direcao, valores) sem conversão de tipos; levanta ValueError se o cursor for inválido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        direcao, valores = json.loads(texto)
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError) as erro:
+        raise ValueError(erro)
+    if direcao not in ('p', 'a') or len(valores) != tamanho:
+        raise ValueError('cursor inválido')
+    return direcao, valores
+
+
+def _decodificar(cursor, colunas):
+    """Retorna (direcao, valores) ou None se o cursor for inválido"""
+    try:
+        direcao, valores = _ler_cursor(cursor, len(colunas))
+        convertidos = []
+        for coluna, valor in zip(colunas, valores):
+            tipo = coluna.type.python_type
+            convertidos.append(tipo.fromisoformat(valor) if tipo in (date, time) else tipo(valor))
+        return direcao, convertidos
+    except (ValueError, TypeError, UnicodeDecodeError, json.JSONDecodeError):
+        return None
+
+
+def contar(query, limite=None):
+    """COUNT(*) com os mesmos filtros da consulta, sem carregar as linhas.
+
+    Com `limite`, a contagem para ao chegar nele (o custo fica limitado mesmo quando
+    cada linha exige uma subconsulta).
+    """
+    chave_primaria = inspect(query.column_descriptions[0]['entity']).primary_key[0]
+    if limite is None:
+        return query.order_by(None).with_entities(func.count(chave_primaria)).scalar()
+    linhas = query.order_by(None).with_entities(chave_primaria).limit(limite).subquery()
+    return query.session.query(func.count()).select_from(linhas).scalar()
+
+
+def por_pagina_solicitado():
+    """Tamanho de página pedido em ?por_pagina=, limitado a POR_PAGINA_MAXIMO"""
+    por_pagina = request.args.get('por_pagina', POR_PAGINA_PADRAO, type=int)
+    return max(1, min(por_pagina, POR_PAGINA_MAXIMO))
+
+
+def paginar(query, colunas, descendente=True, limite_contagem=LIMITE_CONTAGEM):
+    """Retorna a página indicada por ?cursor= da consulta ordenada por `colunas`.
+
+    `colunas` deve terminar em uma coluna única (normalmente o id) para que a ordem seja total.
+    O total é contado até `limite_contagem` + 1 linhas.
+    """
+    por_pagina = por_pagina_solicitado()
+    total = contar(query, limite=limite_contagem + 1)
+
+    chave = tuple_(*colunas)
+    cursor = request.args.get('cursor')
+    posicao = _decodificar(cursor, colunas) if cursor else None
+    voltando = posicao is not None and posicao[0] == 'a'
+
+    if posicao is not None:
+        valores = tuple_(*posicao[1])
+        # Avançar em ordem decrescente (ou voltar em ordem crescente) busca chaves menores
+        query = query.filter(chave < valores if descendente != voltando else chave > valores)
+
+    ordem_decrescente = descendente != voltando
+    query = query.order_by(*[c.desc() if ordem_decrescente else c.asc() for c in colunas])
+    itens = query.limit(por_pagina + 1).all()
+
+    tem_mais = len(itens) > por_pagina
+    itens = itens[:por_pagina]
+    if voltando:
+        itens.reverse()
+
+    def cursor_do_item(direcao, item):
+        return _codificar(direcao, [getattr(item, c.key) for c in colunas])
+
+    anterior = proximo = None
+    if itens:
+        if posicao is not None and (not voltando or tem_mais):
+            anterior = cursor_do_item('a', itens[0])
+        if voltando or tem_mais:
+            proximo = cursor_do_item('p', itens[-1])
+    return Pagina(itens, total, anterior, proximo, limite_contagem)
+
+
+def paginar_lista(chaves):
+    """Como `paginar`, para uma lista já ordenada (crescente) de tuplas de ordenação em memória.
+
+    Os itens da página são as próprias tuplas; a última posição de cada uma deve ser única.
+    """
+    por_pagina = por_pagina_solicitado()
+    cursor = request.args.get('cursor')
+    inicio = 0
+    try:
+        if cursor and chaves:
+            direcao, valores = _ler_cursor(cursor, len(chaves[0]))
+            if direcao == 'p':
+                inicio = bisect.bisect_right(chaves, tuple(valores))
+            else:
+                inicio = max(bisect.bisect_left(chaves, tuple(valores)) - por_pagina, 0)
+    except (ValueError, TypeError):
+        inicio = 0  # cursor inválido: volta para a primeira página
+    fim = inicio + por_pagina
+    itens = chaves[inicio:fim]
+
+    anterior = _codificar('a', itens[0]) if itens and inicio > 0 else None
+    proximo = _codificar('p', itens[-1]) if itens and fim < len(chaves) else None
+    return Pagina(itens, len(chaves), anterior, proximo)
@@ -0,0 +1,366 @@
+import hashlib
+import json
+from datetime import date, time, timedelta
+from sqlalchemy import select, func, cast, literal, and_, exists
+from sqlalchemy.dialects.sqlite import insert
+from models import db, datetime
+from models.quadra_model import Quadra
+from models.reserva_model import Reserva
+from models.serie_model import SerieReserva
+from models.ocupacao_model import OcupacaoDiaria, HORAS_FUNCIONAMENTO
+from services.cache import CacheLRU
+from services.resumos import registrar_nos_resumos, registrar_lote_nos_resumos
+
+# Rótulos exibidos na tela de reserva, na mesma ordem dos bits da máscara
+ROTULOS_HORARIOS = [(hora, f'{hora:02d}:00') for hora in HORAS_FUNCIONAMENTO]
+
+# Horizontes (em dias) oferecidos na tela de gerenciamento de horários
+HORIZONTES_ESTATISTICAS = (7, 30, 90)
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom']
+
+# Estatísticas por (quadra_id, dias, hoje); o TTL cobre reservas feitas em outros processos
+_cache_estatisticas = CacheLRU(tamanho_maximo=512, ttl=60)
+
+# Corpo JSON da disponibilidade pelo validador (ETag); o validador já cobre a mudança de dados
+_cache_disponibilidade = CacheLRU(tamanho_maximo=256)
+
+
+def mascara_ocupacao(quadra_id, data):
+    """Lê a máscara de horários ocupados da quadra no dia (leitura por chave primária)"""
+    tabela = OcupacaoDiaria.__table__
+    mascara = db.session.execute(
+        select(tabela.c.mascara).where(tabela.c.quadra_id == quadra_id, tabela.c.data == data)
+    ).scalar()
+    return mascara or 0
+
+
+def horario_livre(mascara, hora):
+    """Verifica se a hora está livre na máscara"""
+    return not mascara & OcupacaoDiaria.bit(hora)
+
+
+def _marcar_ocupacao(quadra_id, data, hora):
+    tabela = OcupacaoDiaria.__table__
+    bit = OcupacaoDiaria.bit(hora)
+    db.session.execute(
+        insert(tabela).values(quadra_id=quadra_id, data=data, mascara=bit).on_conflict_do_update(
+            index_elements=['quadra_id', 'data'],
+            set_={'mascara': tabela.c.mascara.op('|')(bit)}
+        )
+    )
+
+
+def _liberar_ocupacao(quadra_id, data, hora):
+    tabela = OcupacaoDiaria.__table__
+    db.session.execute(
+        tabela.update()
+        .where(tabela.c.quadra_id == quadra_id, tabela.c.data == data)
+        .values(mascara=tabela.c.mascara.op('&')(~OcupacaoDiaria.bit(hora)))
+    )
+
+
+def reservar_horario(quadra_id, usuario_id, data, hora_inicio, hora_fim):
+    """Reserva um horário em um único comando, sem janela entre a checagem e a inserção.
+
+    Retorna o id da nova reserva, ou None se o horário já estiver ocupado.
+    """
+    agora = datetime.utcnow()
+    comando = insert(Reserva.__table__).values(
+        quadra_id=quadra_id,
+        usuario_id=usuario_id,
+        data=data,
+        hora_inicio=hora_inicio,
+        hora_fim=hora_fim,
+        status='ativa',
+        criado_em=agora,
+        atualizado_em=agora
+    ).on_conflict_do_nothing(
+        index_elements=['quadra_id', 'data', 'hora_inicio'],
+        index_where=Reserva.status == 'ativa'
+    ).returning(Reserva.id)
+
+    reserva_id = db.session.execute(comando).scalar()
+    if reserva_id is None:
+        db.session.rollback()
+        return None
+
+    # O índice de ocupação e os resumos são atualizados na mesma transação da reserva
+    _marcar_ocupacao(quadra_id, data, hora_inicio.hour)
+    registrar_nos_resumos(quadra_id, [data], hora_inicio.hour, reservas=1)
+    db.session.commit()
+    invalidar_estatisticas(quadra_id)
+    return reserva_id
+
+
+def registrar_cancelamento(reserva):
+    """Cancela a reserva, libera o horário no índice de ocupação e atualiza os resumos"""
+    reserva.status = 'cancelada'
+    _liberar_ocupacao(reserva.quadra_id, reserva.data, reserva.hora_inicio.hour)
+    registrar_nos_resumos(reserva.quadra_id, [reserva.data], reserva.hora_inicio.hour, reservas=-1, canceladas=1)
+    db.session.commit()
+    invalidar_estatisticas(reserva.quadra_id)
+
+
+def datas_da_serie(dia_semana, data_inicio, data_fim):
+    """Datas do dia da semana entre data_inicio e data_fim (inclusive)"""
+    primeira = data_inicio + timedelta(days=(dia_semana - data_inicio.weekday()) % 7)
+    semanas = (data_fim - primeira).days // 7 + 1 if primeira <= data_fim else 0
+    return [primeira + timedelta(weeks=i) for i in range(semanas)]
+
+
+def reservar_serie(quadra_id, usuario_id, dia_semana, hora_inicio, hora_fim, data_inicio, data_fim):
+    """Reserva o mesmo horário toda semana, numa única transação.
+
+    Os conflitos de todas as datas saem de uma consulta ao índice de ocupação; as
+    datas livres entram num único INSERT (e num único upsert da ocupação). Retorna
+    (serie_id, datas reservadas, datas em conflito); serie_id é None se nenhuma
+    data estava livre.
+    """
+    datas = datas_da_serie(dia_semana, data_inicio, data_fim)
+    tabela_ocupacao = OcupacaoDiaria.__table__
+    bit = OcupacaoDiaria.bit(hora_inicio.hour)
+    ocupadas = set(db.session.execute(
+        select(tabela_ocupacao.c.data).where(
+            tabela_ocupacao.c.quadra_id == quadra_id,
+            tabela_ocupacao.c.data.in_(datas),
+            tabela_ocupacao.c.mascara.op('&')(bit) != 0
+        )
+    ).scalars())
+    livres = [d for d in datas if d not in ocupadas]
+    if not livres:
+        db.session.rollback()
+        return None, [], datas
+
+    serie = SerieReserva(quadra_id=quadra_id, usuario_id=usuario_id, dia_semana=dia_semana,
+                         hora_inicio=hora_inicio, hora_fim=hora_fim,
+                         data_inicio=livres[0], data_fim=livres[-1])
+    db.session.add(serie)
+    db.session.flush()
+
+    agora = datetime.utcnow()
+    # O índice único parcial continua valendo: uma data tomada entre a consulta e a
+    # inserção (por outro processo) só não volta no RETURNING
+    comando = insert(Reserva.__table__).values([
+        {'quadra_id': quadra_id, 'usuario_id': usuario_id, 'serie_id': serie.id, 'data': d,
+         'hora_inicio': hora_inicio, 'hora_fim': hora_fim, 'status': 'ativa',
+         'criado_em': agora, 'atualizado_em': agora}
+        for d in livres
+    ]).on_conflict_do_nothing(
+        index_elements=['quadra_id', 'data', 'hora_inicio'],
+        index_where=Reserva.status == 'ativa'
+    ).returning(Reserva.data)
+    reservadas = sorted(db.session.execute(comando).scalars())
+    if not reservadas:
+        db.session.rollback()
+        return None, [], datas
+
+    db.session.execute(
+        insert(tabela_ocupacao).values([
+            {'quadra_id': quadra_id, 'data': d, 'mascara': bit} for d in reservadas
+        ]).on_conflict_do_update(
+            index_elements=['quadra_id', 'data'],
+            set_={'mascara': tabela_ocupacao.c.mascara.op('|')(bit)}
+        )
+    )
+    registrar_nos_resumos(quadra_id, reservadas, hora_inicio.hour, reservas=1)
+    serie_id = serie.id  # lido antes do commit, que expira a série
+    db.session.commit()
+    invalidar_estatisticas(quadra_id)
+    conflitos = sorted(set(datas) - set(reservadas))
+    return serie_id, reservadas, conflitos
+
+
+def cancelar_serie(serie):
+    """Cancela as reservas futuras ainda ativas da série; retorna quantas foram canceladas"""
+    tabela = Reserva.__table__
+    canceladas = db.session.execute(
+        tabela.update()
+        .where(tabela.c.serie_id == serie.id, tabela.c.status == 'ativa', tabela.c.data >= date.today())
+        .values(status='cancelada', atualizado_em=datetime.utcnow())
+        .returning(tabela.c.data)
+    ).scalars().all()
+    if canceladas:
+        tabela_ocupacao = OcupacaoDiaria.__table__
+        db.session.execute(
+            tabela_ocupacao.update()
+            .where(tabela_ocupacao.c.quadra_id == serie.quadra_id, tabela_ocupacao.c.data.in_(canceladas))
+            .values(mascara=tabela_ocupacao.c.mascara.op('&')(~OcupacaoDiaria.bit(serie.hora_inicio.hour)))
+        )
+        registrar_nos_resumos(serie.quadra_id, canceladas, serie.hora_inicio.hour, reservas=-1, canceladas=1)
+    serie.status = 'cancelada'
+    db.session.commit()
+    invalidar_estatisticas(serie.quadra_id)
+    return len(canceladas)
+
+
+def registrar_reservas_em_lote(reservas):
+    """Atualiza o índice de ocupação e os resumos para um lote de reservas já inseridas
+    [(quadra_id, data, hora, status)], na transação corrente (importação em lote)"""
+    mascaras = {}
+    for quadra_id, data, hora, status in reservas:
+        if status == 'ativa':
+            mascaras[(quadra_id, data)] = mascaras.get((quadra_id, data), 0) | OcupacaoDiaria.bit(hora)
+    if mascaras:
+        tabela = OcupacaoDiaria.__table__
+        comando = insert(tabela)
+        db.session.execute(comando.on_conflict_do_update(
+            index_elements=['quadra_id', 'data'],
+            set_={'mascara': tabela.c.mascara.op('|')(comando.excluded.mascara)}
+        ), [{'quadra_id': quadra_id, 'data': data, 'mascara': mascara}
+            for (quadra_id, data), mascara in mascaras.items()])
+    registrar_lote_nos_resumos(reservas)
+    for quadra_id in {r[0] for r in reservas}:
+        invalidar_estatisticas(quadra_id)
+
+
+def reconstruir_ocupacao():
+    """Recalcula o índice de ocupação a partir das reservas ativas"""
+    tabela = OcupacaoDiaria.__table__
+    hora = cast(func.substr(Reserva.hora_inicio, 1, 2), db.Integer)
+    mascaras = (
+        select(Reserva.quadra_id, Reserva.data, func.sum(literal(1).op('<<')(hora)))
+        .where(Reserva.status == 'ativa')
+        .group_by(Reserva.quadra_id, Reserva.data)
+    )
+    # As versões recomeçam acima da maior anterior, para nenhum validador antigo voltar a valer
+    versao = db.session.execute(select(func.coalesce(func.max(tabela.c.versao), 0) + 1)).scalar()
+    db.session.execute(tabela.delete())
+    db.session.execute(tabela.insert().from_select(
+        ['quadra_id', 'data', 'mascara', 'versao'], mascaras.add_columns(literal(versao))))
+    db.session.commit()
+    _cache_estatisticas.limpar()
+
+
+def estatisticas_ocupacao(quadra_id, dias):
+    """Reservas, horários livres e percentual de ocupação por dia nos próximos `dias` dias.
+
+    Uma única consulta por faixa de chave primária no índice de ocupação, guardada em cache
+    até a próxima reserva ou cancelamento da quadra.
+    """
+    hoje = date.today()
+    chave = (quadra_id, dias, hoje)
+    estatisticas = _cache_estatisticas.obter(chave)
+    if estatisticas is not None:
+        return estatisticas
+    
+    tabela = OcupacaoDiaria.__table__
+    ultimo_dia = hoje + timedelta(days=dias - 1)
+    mascaras = dict(db.session.execute(
+        select(tabela.c.data, tabela.c.mascara)
+        .where(tabela.c.quadra_id == quadra_id, tabela.c.data.between(hoje, ultimo_dia))
+    ).all())
+    
+    total_horarios = len(HORAS_FUNCIONAMENTO)
+    estatisticas = []
+    for i in range(dias):
+        dia = hoje + timedelta(days=i)
+        reservas_ativas = mascaras.get(dia, 0).bit_count()
+        estatisticas.append({
+            'data': dia,
+            'dia_semana': DIAS_SEMANA[dia.weekday()],
+            'reservas': reservas_ativas,
+            'disponivel': total_horarios - reservas_ativas,
+            'percentual': round(reservas_ativas / total_horarios * 100, 1)
+        })
+    
+    _cache_estatisticas.guardar(chave, estatisticas)
+    return estatisticas
+
+
+def _quadras_da_disponibilidade(quadra_ids, tipo, max_quadras):
+    quadras = select(Quadra.id).where(Quadra.ativa == True)
+    if quadra_ids:
+        quadras = quadras.where(Quadra.id.in_(quadra_ids))
+    if tipo:
+        quadras = quadras.where(Quadra.tipo == tipo)
+    return quadras.order_by(Quadra.id).limit(max_quadras).subquery()
+
+
+def versao_disponibilidade(inicio, dias, quadra_ids=None, tipo=None, max_quadras=100):
+    """Validador da matriz de `disponibilidade_quadras`, sem montá-la.
+
+    Lê só a contagem e a soma das versões dos dias de cada quadra (a versão de um dia
+    sobe a cada mudança da máscara), então muda sempre que a matriz mudar.
+    """
+    fim = inicio + timedelta(days=dias - 1)
+    tabela = OcupacaoDiaria.__table__
+    quadras = _quadras_da_disponibilidade(quadra_ids, tipo, max_quadras)
+    linhas = db.session.execute(
+        select(quadras.c.id, func.count(tabela.c.data), func.coalesce(func.sum(tabela.c.versao), 0))
+        .outerjoin(tabela, and_(tabela.c.quadra_id == quadras.c.id, tabela.c.data.between(inicio, fim)))
+        .group_by(quadras.c.id)
+        .order_by(quadras.c.id)
+    ).all()
+    chave = json.dumps([inicio.isoformat(), dias, [list(linha) for linha in linhas]], separators=(',', ':'))
+    return hashlib.sha1(chave.encode()).hexdigest()
+
+
+def corpo_disponibilidade(versao, montar):
+    """Corpo da resposta para o validador `versao`; `montar()` só roda se não estiver em cache"""
+    corpo = _cache_disponibilidade.obter(versao)
+    if corpo is None:
+        corpo = montar()
+        _cache_disponibilidade.guardar(versao, corpo)
+    return corpo
+
+
+def disponibilidade_quadras(inicio, dias, quadra_ids=None, tipo=None, max_quadras=100):
+    """Horários ocupados de várias quadras ativas num período, numa única consulta.
+
+    Lê o índice de ocupação (uma faixa de chave primária por quadra) e devolve
+    {quadra_id: [[mascara, dias], ...]}: a máscara de cada dia (bit `hora` ligado =
+    ocupado) em run-length, um par por sequência de dias iguais. Quadras sem nenhuma
+    reserva no período ficam com um único par [0, dias].
+    """
+    fim = inicio + timedelta(days=dias - 1)
+    tabela = OcupacaoDiaria.__table__
+    quadras = _quadras_da_disponibilidade(quadra_ids, tipo, max_quadras)
+
+    linhas = db.session.execute(
+        select(quadras.c.id, tabela.c.data, tabela.c.mascara)
+        .outerjoin(tabela, and_(tabela.c.quadra_id == quadras.c.id, tabela.c.data.between(inicio, fim)))
+        .order_by(quadras.c.id)
+    ).all()
+
+    mascaras = {}
+    for quadra_id, data, mascara in linhas:
+        por_dia = mascaras.setdefault(quadra_id, {})
+        if data is not None:
+            por_dia[data] = mascara
+
+    resultado = {}
+    for quadra_id, por_dia in mascaras.items():
+        sequencias = []
+        for i in range(dias):
+            mascara = por_dia.get(inicio + timedelta(days=i), 0)
+            if sequencias and sequencias[-1][0] == mascara:
+                sequencias[-1][1] += 1
+            else:
+                sequencias.append([mascara, 1])
+        resultado[quadra_id] = sequencias
+    return resultado
+
+
+def filtro_quadra_livre(data, hora_de, hora_ate):
+    """Condição para Quadra.query: a quadra tem algum horário livre em `data` entre
+    `hora_de` e `hora_ate` (inclusive).
+
+    Anti-join com as reservas ativas, resolvido no banco por busca no índice
+    (quadra_id, data, hora_inicio) para cada quadra candidata; nenhuma reserva é
+    carregada. Para uma hora só é um NOT EXISTS; para uma faixa, a quadra entra se
+    houver menos reservas na faixa do que horas.
+    """
+    da_quadra_no_dia = and_(Reserva.quadra_id == Quadra.id, Reserva.data == data, Reserva.status == 'ativa')
+    if hora_de == hora_ate:
+        return ~exists().where(da_quadra_no_dia, Reserva.hora_inicio == time(hora_de))
+    ocupadas = (
+        select(func.count())
+        .where(da_quadra_no_dia, Reserva.hora_inicio.between(time(hora_de), time(hora_ate)))
+        .scalar_subquery()
+    )
+    return ocupadas < hora_ate - hora_de + 1
+
+
+def invalidar_estatisticas(quadra_id):
+    """Descarta as estatísticas em cache da quadra"""
+    _cache_estatisticas.invalidar_se(lambda chave: chave[0] == quadra_id)
@@ -0,0 +1,188 @@
+"""Resumos de reservas por quadra para o painel do dono.
+
+Três tabelas pequenas (por dia, por mês e por dia da semana e hora) são atualizadas
+na mesma transação de cada reserva ou cancelamento, de modo que o painel lê só os
+resumos, com custo limitado pelo número de quadras e não pelo histórico. A receita é
+`reservas x preco_hora` com o preço atual da quadra, calculada na leitura.
+"""
+from collections import Counter
+from datetime import date, timedelta
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+from models import db
+from models.resumo_model import ResumoDiario, ResumoMensal, ResumoHorario
+from models.ocupacao_model import HORAS_FUNCIONAMENTO
+
+# Janelas do painel
+MESES_PAINEL = 12
+DIAS_PAINEL = 30
+
+# Recalcula os resumos a partir das reservas (comando reconstruir-resumos e migração 10).
+# `{origem}` é a view reservas_historico, para contar também as arquivadas; a migração 10,
+# anterior ao arquivamento, lê a tabela reservas.
+RECONSTRUIR_RESUMOS_SQL = [
+    'DELETE FROM resumo_diario',
+    'DELETE FROM resumo_mensal',
+    'DELETE FROM resumo_horario',
+    """INSERT INTO resumo_diario (quadra_id, data, reservas, canceladas)
+       SELECT quadra_id, data, SUM(status = 'ativa'), SUM(status = 'cancelada')
+       FROM {origem} GROUP BY quadra_id, data""",
+    """INSERT INTO resumo_mensal (quadra_id, mes, reservas, canceladas)
+       SELECT quadra_id, date(data, 'start of month'), SUM(reservas), SUM(canceladas)
+       FROM resumo_diario GROUP BY quadra_id, date(data, 'start of month')""",
+    """INSERT INTO resumo_horario (quadra_id, dia_semana, hora, reservas)
+       SELECT quadra_id, (CAST(strftime('%w', data) AS INTEGER) + 6) % 7,
+              CAST(substr(hora_inicio, 1, 2) AS INTEGER), COUNT(*)
+       FROM {origem} WHERE status = 'ativa' GROUP BY 1, 2, 3""",
+]
+
+
+def _somar(tabela, chaves, linhas):
+    """Upsert que soma os contadores de `linhas` aos já gravados"""
+    # executemany com o comando sem valores embutidos: o SQL compilado vem do cache
+    comando = insert(tabela)
+    contadores = [coluna for coluna in linhas[0] if coluna not in chaves]
+    db.session.execute(comando.on_conflict_do_update(
+        index_elements=chaves,
+        set_={coluna: tabela.c[coluna] + comando.excluded[coluna] for coluna in contadores}
+    ), linhas)
+
+
+def registrar_nos_resumos(quadra_id, datas, hora, reservas=0, canceladas=0):
+    """Soma `reservas` e `canceladas` (por data) aos resumos da quadra, na transação corrente.
+
+    Uma reserva nova é reservas=1; um cancelamento é reservas=-1, canceladas=1.
+    """
+    if not datas:
+        return
+    _somar(ResumoDiario.__table__, ['quadra_id', 'data'], [
+        {'quadra_id': quadra_id, 'data': d, 'reservas': reservas, 'canceladas': canceladas} for d in datas
+    ])
+    por_mes = Counter(d.replace(day=1) for d in datas)
+    _somar(ResumoMensal.__table__, ['quadra_id', 'mes'], [
+        {'quadra_id': quadra_id, 'mes': mes, 'reservas': reservas * n, 'canceladas': canceladas * n}
+        for mes, n in por_mes.items()
+    ])
+    if reservas:
+        por_dia_semana = Counter(d.weekday() for d in datas)
+        _somar(ResumoHorario.__table__, ['quadra_id', 'dia_semana', 'hora'], [
+            {'quadra_id': quadra_id, 'dia_semana': dia, 'hora': hora, 'reservas': reservas * n}
+            for dia, n in por_dia_semana.items()
+        ])
+
+
+def registrar_lote_nos_resumos(reservas):
+    """Soma aos resumos um lote de reservas novas [(quadra_id, data, hora, status)], com
+    um upsert por tabela (importação em lote)"""
+    diario, mensal, horario = Counter(), Counter(), Counter()
+    for quadra_id, data, hora, status in reservas:
+        ativa = status == 'ativa'
+        diario[(quadra_id, data, ativa)] += 1
+        mensal[(quadra_id, data.replace(day=1), ativa)] += 1
+        if ativa:
+            horario[(quadra_id, data.weekday(), hora)] += 1
+    if not diario:
+        return
+    _somar(ResumoDiario.__table__, ['quadra_id', 'data'], _contadores(diario, 'data'))
+    _somar(ResumoMensal.__table__, ['quadra_id', 'mes'], _contadores(mensal, 'mes'))
+    if horario:
+        _somar(ResumoHorario.__table__, ['quadra_id', 'dia_semana', 'hora'], [
+            {'quadra_id': quadra_id, 'dia_semana': dia, 'hora': hora, 'reservas': n}
+            for (quadra_id, dia, hora), n in horario.items()
+        ])
+
+
+def _contadores(contagem, coluna):
+    """{(quadra_id, chave, ativa): n} -> linhas com reservas e canceladas por (quadra_id, chave)"""
+    linhas = {}
+    for (quadra_id, chave, ativa), n in contagem.items():
+        linha = linhas.setdefault((quadra_id, chave), {'quadra_id': quadra_id, coluna: chave,
+                                                       'reservas': 0, 'canceladas': 0})
+        linha['reservas' if ativa else 'canceladas'] += n
+    return list(linhas.values())
+
+
+def reconstruir_resumos():
+    """Recalcula todos os resumos a partir das reservas, incluindo as arquivadas"""
+    for sql in RECONSTRUIR_RESUMOS_SQL:
+        db.session.execute(text(sql.format(origem='reservas_historico')))
+    db.session.commit()
+
+
+def _meses_ate(mes, quantidade):
+    """Os `quantidade` meses terminando em `mes` (primeiros dias), do mais antigo ao mais recente"""
+    meses = [mes]
+    while len(meses) < quantidade:
+        anterior = meses[-1] - timedelta(days=1)
+        meses.append(anterior.replace(day=1))
+    return meses[::-1]
+
+
+def _taxa(canceladas, reservas):
+    total = canceladas + reservas
+    return round(canceladas / total * 100, 1) if total else 0.0
+
+
+def painel_quadras(quadras, hoje=None):
+    """Números do painel do dono para `quadras`, lidos só dos resumos (três consultas).
+
+    Retorna os últimos MESES_PAINEL meses, os últimos DIAS_PAINEL dias, os totais por
+    quadra nos meses do painel e o mapa de calor dia da semana x hora.
+    """
+    hoje = hoje or date.today()
+    ids = [q.id for q in quadras]
+    precos = {q.id: q.preco_hora for q in quadras}
+    meses = _meses_ate(hoje.replace(day=1), MESES_PAINEL)
+    dias = [hoje - timedelta(days=i) for i in range(DIAS_PAINEL - 1, -1, -1)]
+
+    mensal = db.session.execute(
+        select(ResumoMensal.quadra_id, ResumoMensal.mes, ResumoMensal.reservas, ResumoMensal.canceladas)
+        .where(ResumoMensal.quadra_id.in_(ids), ResumoMensal.mes.between(meses[0], meses[-1]))
+    ).all()
+    diario = db.session.execute(
+        select(ResumoDiario.quadra_id, ResumoDiario.data, ResumoDiario.reservas)
+        .where(ResumoDiario.quadra_id.in_(ids), ResumoDiario.data.between(dias[0], dias[-1]))
+    ).all()
+    horario = db.session.execute(
+        select(ResumoHorario.dia_semana, ResumoHorario.hora, ResumoHorario.reservas)
+        .where(ResumoHorario.quadra_id.in_(ids))
+    ).all()
+
+    por_mes = {mes: {'mes': mes, 'reservas': 0, 'canceladas': 0, 'receita': 0.0} for mes in meses}
+    por_quadra = {q.id: {'quadra': q, 'reservas_mes': 0, 'receita_mes': 0.0,
+                         'reservas': 0, 'canceladas': 0, 'receita': 0.0} for q in quadras}
+    for quadra_id, mes, reservas, canceladas in mensal:
+        receita = reservas * precos[quadra_id]
+        for linha in (por_mes[mes], por_quadra[quadra_id]):
+            linha['reservas'] += reservas
+            linha['canceladas'] += canceladas
+            linha['receita'] += receita
+        if mes == meses[-1]:
+            por_quadra[quadra_id]['reservas_mes'] = reservas
+            por_quadra[quadra_id]['receita_mes'] = receita
+    for linha in list(por_mes.values()) + list(por_quadra.values()):
+        linha['taxa_cancelamento'] = _taxa(linha['canceladas'], linha['reservas'])
+
+    por_dia = {dia: {'data': dia, 'reservas': 0, 'receita': 0.0} for dia in dias}
+    for quadra_id, data, reservas in diario:
+        por_dia[data]['reservas'] += reservas
+        por_dia[data]['receita'] += reservas * precos[quadra_id]
+
+    horas = list(HORAS_FUNCIONAMENTO)
+    mapa = [[0] * len(horas) for _ in range(7)]
+    for dia_semana, hora, reservas in horario:
+        if hora in HORAS_FUNCIONAMENTO:
+            mapa[dia_semana][horas.index(hora)] += reservas
+
+    meses = list(por_mes.values())
+    return {
+        'meses': meses,
+        'mes_atual': meses[-1],
+        'dias': list(por_dia.values()),
+        'quadras': list(por_quadra.values()),
+        'horas': horas,
+        'mapa': mapa,
+        'mapa_maximo': max(max(linha) for linha in mapa),
+        'reservas_periodo': sum(m['reservas'] for m in meses),
+        'taxa_cancelamento': _taxa(sum(m['canceladas'] for m in meses), sum(m['reservas'] for m in meses)),
+    }
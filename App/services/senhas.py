@@ -0,0 +1,166 @@
+"""Hash de senhas (bcrypt) fora da thread da requisição.
+
+Os hashes rodam em um pool de processos limitado. Quando todas as vagas
+(`SENHAS_MAX_PENDENTES`) estão ocupadas, ou o resultado não chega em
+`SENHAS_TIMEOUT`, o pedido é recusado com `ServicoSenhasOcupado` em vez de
+entrar numa fila sem limite. Uma vaga só é liberada quando o hash termina: o que
+estourou o tempo continua contando até o processo acabá-lo.
+
+Cada worker do servidor tem o próprio pool: com `gunicorn -w N` são N pools. Por
+isso o padrão de processos é núcleos ÷ workers (`WEB_CONCURRENCY`, a variável
+que o gunicorn também lê para o número de workers), e não núcleos por worker.
+
+Configuração:
+    BCRYPT_LOG_ROUNDS        custo do bcrypt (padrão 12)
+    SENHAS_LATENCIA_ALVO_MS  se definido, calibra o custo para esse tempo por hash
+    SENHAS_PROCESSOS         processos do pool (padrão: núcleos ÷ workers; 0 = na própria thread)
+    SENHAS_MAX_PENDENTES     hashes simultâneos aceitos (padrão: 2 x processos)
+    SENHAS_TIMEOUT           segundos de espera pelo resultado (padrão 10)
+"""
+import math
+import os
+import threading
+import time as relogio
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TempoEsgotado
+
+import bcrypt
+
+CUSTO_PADRAO = 12
+CUSTO_MINIMO = 10
+CUSTO_MAXIMO = 20
+# bcrypt só considera os primeiros 72 bytes da senha
+TAMANHO_MAXIMO_SENHA = 72
+
+
+class ServicoSenhasOcupado(Exception):
+    pass
+
+
+def _bytes(senha):
+    return senha.encode('utf-8')[:TAMANHO_MAXIMO_SENHA]
+
+
+def _gerar(senha, custo):
+    return bcrypt.hashpw(_bytes(senha), bcrypt.gensalt(custo)).decode('utf-8')
+
+
+def _verificar(senha, senha_hash):
+    try:
+        return bcrypt.checkpw(_bytes(senha), senha_hash.encode('utf-8'))
+    except ValueError:
+        # Hash corrompido ou de outro formato
+        return False
+
+
+def custo_do_hash(senha_hash):
+    """Custo gravado no hash ('$2b$12$...' -> 12); None se não for bcrypt"""
+    partes = (senha_hash or '').split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def calibrar_custo(latencia_alvo_ms):
+    """Maior custo cujo hash leva até `latencia_alvo_ms` nesta máquina.
+
+    Mede um hash no custo mínimo; cada ponto a mais dobra o tempo.
+    """
+    inicio = relogio.perf_counter()
+    _gerar('calibracao', CUSTO_MINIMO)
+    tempo_ms = (relogio.perf_counter() - inicio) * 1000
+    custo = CUSTO_MINIMO + math.floor(math.log2(max(latencia_alvo_ms / tempo_ms, 1)))
+    return min(custo, CUSTO_MAXIMO)
+
+
+class ServicoSenhas:
+    def __init__(self, app=None):
+        self.custo = CUSTO_PADRAO
+        self.processos = 0
+        self.timeout = 10
+        self._executor = None
+        self._vagas = None
+        self._trava = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        latencia_alvo = app.config.get('SENHAS_LATENCIA_ALVO_MS')
+        if latencia_alvo:
+            self.custo = calibrar_custo(float(latencia_alvo))
+            app.config['BCRYPT_LOG_ROUNDS'] = self.custo
+        else:
+            self.custo = int(app.config.get('BCRYPT_LOG_ROUNDS', CUSTO_PADRAO))
+
+        processos = app.config.get('SENHAS_PROCESSOS')
+        if processos is None:
+            processos = max((os.cpu_count() or 1) // max(int(app.config.get('WORKERS', 1)), 1), 1)
+        self.processos = int(processos)
+        max_pendentes = int(app.config.get('SENHAS_MAX_PENDENTES', 2 * max(self.processos, 1)))
+        self.timeout = float(app.config.get('SENHAS_TIMEOUT', 10))
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self.encerrar()
+        app.extensions['senhas'] = self
+
+    def _pool(self):
+        # Criado no primeiro uso, para não abrir processos em comandos que não fazem hash
+        with self._trava:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processos)
+            return self._executor
+
+    def _executar(self, funcao, *argumentos):
+        vagas = self._vagas
+        if vagas is not None and not vagas.acquire(blocking=False):
+            raise ServicoSenhasOcupado('Muitos hashes de senha em andamento')
+        if self.processos == 0:
+            try:
+                return funcao(*argumentos)
+            finally:
+                if vagas is not None:
+                    vagas.release()
+        try:
+            futuro = self._pool().submit(funcao, *argumentos)
+        except BaseException:
+            if vagas is not None:
+                vagas.release()
+            raise
+        if vagas is not None:
+            # A vaga só volta quando o hash termina (ou é cancelado), não quando a espera
+            # desiste: um hash que estourou o tempo continua ocupando o pool até acabar
+            futuro.add_done_callback(lambda _futuro: vagas.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TempoEsgotado:
+            futuro.cancel()
+            raise ServicoSenhasOcupado('Tempo de espera do hash de senha esgotado') from None
+
+    def gerar_hash(self, senha):
+        """Hash bcrypt da senha com o custo configurado"""
+        return self._executar(_gerar, senha, self.custo)
+
+    def gerar_hashes(self, lista_senhas):
+        """Hashes de várias senhas de uma vez (importação em lote), divididos entre os
+        processos do pool. Não passa pelo limite de pendentes das requisições."""
+        if not lista_senhas:
+            return []
+        if self.processos == 0:
+            return [_gerar(senha, self.custo) for senha in lista_senhas]
+        pedaco = max(len(lista_senhas) // (self.processos * 4), 1)
+        return list(self._pool().map(_gerar, lista_senhas, [self.custo] * len(lista_senhas), chunksize=pedaco))
+
+    def verificar(self, senha, senha_hash):
+        """Confere a senha com o hash gravado"""
+        return self._executar(_verificar, senha, senha_hash)
+
+    def precisa_rehash(self, senha_hash):
+        """True se o hash foi gerado com um custo diferente do configurado"""
+        return custo_do_hash(senha_hash) != self.custo
+
+    def encerrar(self):
+        with self._trava:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+senhas = ServicoSenhas()
@@ -0,0 +1,59 @@
+"""Usuário logado sem consulta ao banco a cada requisição.
+
+O `user_loader` do Flask-Login busca a identidade (id, nome, email, role,
+bloqueado_ate) num cache LRU do processo. Toda alteração desses campos deve chamar
+`invalidar_usuario`; o TTL só limita o atraso de alterações feitas por outro processo.
+"""
+from flask_login import UserMixin
+from models import db, datetime
+from models.usuario_model import Usuario
+from services.cache import CacheLRU
+
+TTL_USUARIOS = 300
+
+_cache_usuarios = CacheLRU(4096, ttl=TTL_USUARIOS)
+
+
+class UsuarioSessao(UserMixin):
+    """Identidade do usuário logado; para alterar o cadastro, carregue o Usuario"""
+
+    def __init__(self, id, nome, email, role, bloqueado_ate):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.role = role
+        self.bloqueado_ate = bloqueado_ate
+
+    def esta_bloqueado(self):
+        return self.bloqueado_ate is not None and datetime.utcnow() < self.bloqueado_ate
+
+    def is_dono_quadra(self):
+        return self.role == 'dono_quadra'
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def __repr__(self):
+        return f'<UsuarioSessao {self.email}>'
+
+
+def carregar_usuario(usuario_id):
+    """Identidade do usuário pelo id, do cache ou do banco; None se não existir"""
+    usuario = _cache_usuarios.obter(usuario_id)
+    if usuario is None:
+        linha = db.session.query(
+            Usuario.id, Usuario.nome, Usuario.email, Usuario.role, Usuario.bloqueado_ate
+        ).filter(Usuario.id == usuario_id).first()
+        if linha is None:
+            return None
+        usuario = UsuarioSessao(*linha)
+        _cache_usuarios.guardar(usuario_id, usuario)
+    return usuario
+
+
+def invalidar_usuario(usuario_id):
+    _cache_usuarios.invalidar(usuario_id)
+
+
+def estatisticas_cache_usuarios():
+    return _cache_usuarios.estatisticas()
@@ -0,0 +1,68 @@
+"""Cache de templates Jinja.
+
+- Bytecode: os templates compilados ficam em `instance/jinja_cache`, compartilhados
+  pelos processos, e `precompilar_templates` compila todos na inicialização.
+- Fragmentos: a tag `{% cache chave, ... %}...{% endcache %}` guarda o HTML do bloco
+  no processo. A chave deve conter tudo de que o bloco depende, por exemplo
+  `{% cache 'quadra', quadra.id, quadra.atualizado_em, quadra.dono.nome, perfil_visitante %}`:
+  editar uma quadra só refaz o cartão dela.
+"""
+import os
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from services.cache import CacheLRU
+
+PASTA_BYTECODE = 'jinja_cache'
+
+_cache_fragmentos = CacheLRU(8192)
+
+
+class CacheFragmento(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        linha = next(parser.stream).lineno
+        chave = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            chave.append(parser.parse_expression())
+        corpo = parser.parse_statements(('name:endcache',), drop_needle=True)
+        chamada = self.call_method('_renderizar', [nodes.List(chave)])
+        return nodes.CallBlock(chamada, [], [], corpo).set_lineno(linha)
+
+    def _renderizar(self, chave, caller):
+        chave = tuple(chave)
+        html = _cache_fragmentos.obter(chave)
+        if html is None:
+            html = caller()
+            _cache_fragmentos.guardar(chave, html)
+        return html
+
+
+def _perfil_visitante():
+    if not current_user.is_authenticated:
+        return 'anonimo'
+    return current_user.role
+
+
+def init_templates(app):
+    pasta = os.path.join(app.instance_path, PASTA_BYTECODE)
+    os.makedirs(pasta, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(pasta)
+    app.jinja_env.add_extension(CacheFragmento)
+
+    @app.context_processor
+    def variaveis_cache():
+        return {'perfil_visitante': _perfil_visitante()}
+
+
+def precompilar_templates(app):
+    """Compila todos os templates (e grava o bytecode), para o primeiro acesso não pagar por isso"""
+    nomes = app.jinja_env.list_templates(extensions=['html'])
+    for nome in nomes:
+        app.jinja_env.get_template(nome)
+    return len(nomes)
+
+
+def estatisticas_cache_fragmentos():
+    return _cache_fragmentos.estatisticas()
@@ -0,0 +1,190 @@
+"""Limite de tentativas de login.
+
+As falhas são contadas em janelas deslizantes na memória do processo, por conta
+(email digitado, exista ou não) e por IP. A checagem antes do login só lê; o banco
+só é escrito quando o estado muda de fato: uma conta passa a ficar bloqueada, ou
+um login certo zera um bloqueio/contador gravado.
+
+Com `THROTTLE_COMPARTILHADO = True` os bloqueios de IP e de emails inexistentes
+também vão para a tabela `bloqueios_login`, para valerem em todos os processos.
+Bloqueios vencidos são removidos em lote, no máximo a cada `INTERVALO_LIMPEZA`.
+"""
+import threading
+import time as relogio
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db
+from models.usuario_model import Usuario
+from models.bloqueio_model import BloqueioLogin
+from services.sessao import invalidar_usuario
+
+JANELA = timedelta(minutes=15)
+LIMITE_CONTA = 5
+LIMITE_IP = 20
+BLOQUEIO_CONTA = timedelta(hours=24)
+BLOQUEIO_IP = timedelta(minutes=15)
+INTERVALO_LIMPEZA = timedelta(minutes=5)
+TAMANHO_LOTE_LIMPEZA = 500
+MAXIMO_CHAVES = 100_000
+
+
+class ContadorDeslizante:
+    """Eventos por chave nos últimos `janela` segundos, com número limitado de chaves"""
+
+    def __init__(self, janela, maximo_chaves=MAXIMO_CHAVES):
+        self.janela = janela.total_seconds()
+        self.maximo_chaves = maximo_chaves
+        self._eventos = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _podar(self, fila, agora):
+        while fila and fila[0] <= agora - self.janela:
+            fila.popleft()
+
+    def registrar(self, chave):
+        """Registra um evento e retorna quantos a chave tem na janela"""
+        agora = relogio.monotonic()
+        with self._trava:
+            fila = self._eventos.get(chave)
+            if fila is None:
+                fila = self._eventos[chave] = deque()
+            self._eventos.move_to_end(chave)
+            self._podar(fila, agora)
+            fila.append(agora)
+            while len(self._eventos) > self.maximo_chaves:
+                self._eventos.popitem(last=False)
+            return len(fila)
+
+    def contar(self, chave):
+        agora = relogio.monotonic()
+        with self._trava:
+            fila = self._eventos.get(chave)
+            if not fila:
+                return 0
+            self._podar(fila, agora)
+            return len(fila)
+
+    def zerar(self, chave):
+        with self._trava:
+            self._eventos.pop(chave, None)
+
+    def podar_tudo(self):
+        agora = relogio.monotonic()
+        with self._trava:
+            for chave in list(self._eventos):
+                self._podar(self._eventos[chave], agora)
+                if not self._eventos[chave]:
+                    del self._eventos[chave]
+
+
+def _chave_conta(email):
+    return f'conta:{(email or "").strip().lower()}'
+
+
+def _chave_ip(ip):
+    return f'ip:{ip or "desconhecido"}'
+
+
+class ThrottleLogin:
+    def __init__(self):
+        self.compartilhado = False
+        self.falhas = ContadorDeslizante(JANELA)
+        self._bloqueios = {}
+        self._trava = threading.Lock()
+        self._proxima_limpeza = datetime.min
+
+    def init_app(self, app):
+        self.compartilhado = bool(app.config.get('THROTTLE_COMPARTILHADO', False))
+        app.extensions['throttle_login'] = self
+
+    def bloqueado_ate(self, email, ip):
+        """Fim do bloqueio do IP ou do email digitado, ou None. Não escreve nada."""
+        agora = datetime.utcnow()
+        chaves = (_chave_ip(ip), _chave_conta(email))
+        with self._trava:
+            fins = [self._bloqueios[c] for c in chaves if c in self._bloqueios and self._bloqueios[c] > agora]
+        if self.compartilhado and not fins:
+            fim = db.session.query(func.max(BloqueioLogin.bloqueado_ate)).filter(
+                BloqueioLogin.chave.in_(chaves),
+                BloqueioLogin.bloqueado_ate > agora
+            ).execution_options(pool_leitura=True).scalar()
+            if fim is not None:
+                fins.append(fim)
+        return max(fins) if fins else None
+
+    def _bloquear(self, chave, duracao):
+        ate = datetime.utcnow() + duracao
+        with self._trava:
+            self._bloqueios[chave] = ate
+        if self.compartilhado:
+            db.session.merge(BloqueioLogin(chave=chave, bloqueado_ate=ate))
+            db.session.commit()
+
+    def registrar_falha(self, email, ip, usuario=None):
+        """Conta uma senha errada (ou email inexistente) para a conta e para o IP"""
+        if self.falhas.registrar(_chave_ip(ip)) >= LIMITE_IP:
+            self._bloquear(_chave_ip(ip), BLOQUEIO_IP)
+
+        tentativas = self.falhas.registrar(_chave_conta(email))
+        if tentativas < LIMITE_CONTA:
+            return
+        if usuario is None:
+            self._bloquear(_chave_conta(email), BLOQUEIO_CONTA)
+        elif not usuario.esta_bloqueado():
+            usuario.tentativas_login = tentativas
+            usuario.bloqueado_ate = datetime.utcnow() + BLOQUEIO_CONTA
+            db.session.commit()
+            invalidar_usuario(usuario.id)
+
+    def registrar_sucesso(self, usuario):
+        """Zera o contador da conta; retorna True se havia estado gravado para limpar"""
+        self.falhas.zerar(_chave_conta(usuario.email))
+        if usuario.tentativas_login or usuario.bloqueado_ate is not None:
+            usuario.tentativas_login = 0
+            usuario.bloqueado_ate = None
+            return True
+        return False
+
+    def desbloquear_conta(self, email):
+        """Esquece as falhas em memória da conta (desbloqueio pelo admin)"""
+        chave = _chave_conta(email)
+        self.falhas.zerar(chave)
+        with self._trava:
+            self._bloqueios.pop(chave, None)
+
+    def limpar_expirados(self, forcar=False):
+        """Remove bloqueios vencidos, em lotes; sem `forcar`, roda no máximo a cada INTERVALO_LIMPEZA"""
+        agora = datetime.utcnow()
+        with self._trava:
+            if not forcar and agora < self._proxima_limpeza:
+                return 0
+            self._proxima_limpeza = agora + INTERVALO_LIMPEZA
+            for chave in [c for c, ate in self._bloqueios.items() if ate <= agora]:
+                del self._bloqueios[chave]
+        self.falhas.podar_tudo()
+
+        removidos = 0
+        while True:
+            # Só lê pelo índice (no pool de leitura, mesmo no POST do login); a escrita,
+            # que confere o vencimento de novo, acontece apenas se houver bloqueios vencidos
+            ids = [id for (id,) in db.session.query(Usuario.id).filter(
+                Usuario.bloqueado_ate <= agora).limit(TAMANHO_LOTE_LIMPEZA).execution_options(pool_leitura=True)]
+            if not ids:
+                break
+            Usuario.query.filter(Usuario.id.in_(ids), Usuario.bloqueado_ate <= agora).update(
+                {Usuario.bloqueado_ate: None, Usuario.tentativas_login: 0}, synchronize_session=False)
+            db.session.commit()
+            for id in ids:
+                invalidar_usuario(id)
+            removidos += len(ids)
+
+        if self.compartilhado:
+            vencidos = BloqueioLogin.query.filter(BloqueioLogin.bloqueado_ate <= agora)
+            if db.session.query(vencidos.exists()).execution_options(pool_leitura=True).scalar():
+                vencidos.delete(synchronize_session=False)
+                db.session.commit()
+        return removidos
+
+
+throttle_login = ThrottleLogin()